@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/2.1/ref/settings/
 
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -20,12 +22,17 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # See https://docs.djangoproject.com/en/2.1/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = '*(&%ynr$-v05!2nz79%*-z#o*rzzm2u=44od3&cpxtb_$ylp3c'
+SECRET_KEY = os.environ.get(
+    'SECRET_KEY',
+    '*(&%ynr$-v05!2nz79%*-z#o*rzzm2u=44od3&cpxtb_$ylp3c'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DEBUG', '0') == '1'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [
+    host for host in os.environ.get('ALLOWED_HOSTS', '').split(',') if host
+]
 
 
 # Application definition
@@ -37,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'core',
@@ -45,7 +53,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,6 +67,46 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'app.urls'
 
+# Per request query counts and timings, see
+# core.middleware.RequestMetricsMiddleware
+REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS', '1') == '1'
+REQUEST_METRICS_SERVER_TIMING = (
+    os.environ.get('REQUEST_METRICS_SERVER_TIMING', '1') == '1'
+)
+# Fraction of requests logged, slow requests are always logged
+REQUEST_METRICS_SAMPLE_RATE = float(
+    os.environ.get('REQUEST_METRICS_SAMPLE_RATE', 0)
+)
+REQUEST_METRICS_SLOW_MS = int(os.environ.get('REQUEST_METRICS_SLOW_MS', 500))
+# Slowest statements kept per request and logged when it is slow
+REQUEST_METRICS_SLOW_QUERIES = 10
+
+# Who may read /metrics: addresses or networks, comma separated, or
+# requests with an "Authorization: Bearer METRICS_TOKEN" header
+METRICS_ALLOWED_IPS = [
+    network for network in
+    os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+    if network
+]
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'app.requests': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -85,9 +136,109 @@ DATABASES = {
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # Keep connections open between requests. Each app server thread
+        # holds one, so Postgres needs GUNICORN_WORKERS x GUNICORN_THREADS
+        # x app containers connections (32 per container by default, see
+        # gunicorn.conf.py), which must stay below its max_connections
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+    }
+}
+
+# Read replicas, e.g. DB_REPLICA_HOSTS=replica1,replica2. Safe requests
+# read from one of them, see core.middleware.ReplicaMiddleware
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+    filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1
+):
+    DATABASES[f'replica{number}'] = dict(
+        DATABASES['default'],
+        HOST=host,
+        TEST={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Seconds a client reads from the primary after writing
+DB_READ_YOUR_WRITES_SECONDS = int(
+    os.environ.get('DB_READ_YOUR_WRITES_SECONDS', 5)
+)
+# Seconds before retrying a replica that failed to connect
+DB_REPLICA_RETRY_SECONDS = int(os.environ.get('DB_REPLICA_RETRY_SECONDS', 30))
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
+# Cache versions, ETags, token invalidation and replica stickiness are
+# only consistent when every process shares the cache
+if not DEBUG and CACHES['default']['BACKEND'].endswith('.LocMemCache'):
+    raise ImproperlyConfigured(
+        'Set CACHE_BACKEND to a shared cache, LocMemCache is per process'
+    )
+if 'memcached' in CACHES['default']['BACKEND'] and \
+        not CACHES['default']['LOCATION']:
+    raise ImproperlyConfigured('Set CACHE_LOCATION to the memcached server')
+
+RECIPE_CACHE_TIMEOUT = int(os.environ.get('RECIPE_CACHE_TIMEOUT', 300))
+
+# Token authentication lookups, cached per process and in CACHES
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 300))
+TOKEN_AUTH_LOCAL_TTL = int(os.environ.get('TOKEN_AUTH_LOCAL_TTL', 5))
+TOKEN_AUTH_LOCAL_MAX_SIZE = 10000
+
+
+# REST framework
+# JSON is encoded and decoded with orjson, falling back to the standard
+# library when it isn't installed
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/2.1/topics/auth/passwords/
+# New hashes use PASSWORD_HASHER, the others stay available so existing
+# hashes still verify and are upgraded on the next successful login
+
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+_password_hashers = {
+    'argon2': 'user.hashers.PooledArgon2PasswordHasher',
+    'bcrypt': 'user.hashers.PooledBCryptSHA256PasswordHasher',
+    'pbkdf2': 'user.hashers.PooledPBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [_password_hashers[PASSWORD_HASHER]] + [
+    path for name, path in _password_hashers.items()
+    if name != PASSWORD_HASHER
+]
+
+PASSWORD_HASH_WORKERS = int(
+    os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+)
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 32))
+# Seconds API requests wait for a queue slot before answering 429, the
+# queue already absorbs bursts so by default they don't wait at all
+PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 0))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
@@ -131,4 +282,41 @@ MEDIA_URL = '/media/'
 STATIC_ROOT = '/vol/web/static'
 MEDIA_ROOT = '/vol/web/media'
 
+# WhiteNoise serves collected static files with far future cache headers.
+# Media is only served by Django when DEBUG is on, the proxy in
+# docker-compose-deploy.yml serves it in production
+STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
+
+# Spool uploads to disk early; a temp dir on the media volume lets the
+# storage move the file into place instead of copying it
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+FILE_UPLOAD_TEMP_DIR = os.environ.get('FILE_UPLOAD_TEMP_DIR')
+
+# Recipe image variants generated after upload, longest side in pixels
+RECIPE_IMAGE_VARIANTS = {
+    'thumbnail': 150,
+    'medium': 600,
+}
+RECIPE_IMAGE_FORMATS = ('webp', 'jpeg')
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+RECIPE_IMAGE_ASYNC = os.environ.get('RECIPE_IMAGE_ASYNC', '1') == '1'
+
 AUTH_USER_MODEL = 'core.User'
+
+
+# Recipe API pagination
+
+RECIPE_PAGE_SIZE = int(os.environ.get('RECIPE_PAGE_SIZE', 50))
+RECIPE_MAX_PAGE_SIZE = int(os.environ.get('RECIPE_MAX_PAGE_SIZE', 500))
+
+# Text search configuration used for recipe search vectors and queries
+RECIPE_SEARCH_CONFIG = os.environ.get('RECIPE_SEARCH_CONFIG', 'english')
+RECIPE_SEARCH_MAX_RESULTS = int(
+    os.environ.get('RECIPE_SEARCH_MAX_RESULTS', 1000)
+)
+
+# Most tag and ingredient suggestions returned for one query
+RECIPE_SUGGEST_LIMIT = 10
+
+# Recipes read per database round trip when exporting
+RECIPE_EXPORT_CHUNK_SIZE = 2000
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from collections import defaultdict, namedtuple
+from urllib.parse import urlsplit
+
+
+Request = namedtuple('Request', 'method path headers body',
+                     defaults=((), b''))
+
+
+class Results:
+    """Latencies and errors of a run, by scenario name"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.elapsed = 0.0
+
+
+def parse_url(url):
+    """Return the host, port and path prefix of an http:// URL"""
+    parts = urlsplit(url)
+    if parts.scheme != 'http' or not parts.hostname:
+        raise ValueError('Only http:// URLs are supported')
+
+    path = parts.path or '/'
+    if parts.query:
+        path = f'{path}?{parts.query}'
+
+    return parts.hostname, parts.port or 80, path
+
+
+def encode(request, host):
+    """Return the bytes of an HTTP/1.1 keep-alive request"""
+    lines = [
+        f'{request.method} {request.path} HTTP/1.1',
+        f'Host: {host}',
+        'Connection: keep-alive',
+    ]
+    lines.extend(f'{name}: {value}' for name, value in request.headers)
+    if request.body or request.method not in ('GET', 'HEAD'):
+        lines.append(f'Content-Length: {len(request.body)}')
+
+    return '\r\n'.join([*lines, '', '']).encode('latin-1') + request.body
+
+
+def run(host, port, next_request, concurrency, seconds, warmup=0):
+    """Send requests from concurrent connections for a number of seconds
+
+    next_request returns a (name, request bytes) pair each time a client
+    is ready to send. Responses during the first warmup seconds aren't
+    recorded. Returns the Results.
+    """
+    return asyncio.run(
+        _run(host, port, next_request, concurrency, seconds, warmup)
+    )
+
+
+async def _run(host, port, next_request, concurrency, seconds, warmup):
+    """Run the clients until the deadline"""
+    results = Results()
+    start = time.perf_counter() + warmup
+    deadline = start + seconds
+    await asyncio.gather(*(
+        _client(host, port, next_request, start, deadline, results)
+        for _ in range(concurrency)
+    ))
+    results.elapsed = time.perf_counter() - start
+
+    return results
+
+
+async def _client(host, port, next_request, start, deadline, results):
+    """Send requests on one connection, reconnecting when it closes"""
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        name, request = next_request()
+        sent = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request)
+            status, keep_alive = await _read_response(reader)
+            failed = status >= 400
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            failed, keep_alive = True, False
+        if sent >= start:
+            if failed:
+                results.errors[name] += 1
+            else:
+                results.latencies[name].append(
+                    (time.perf_counter() - sent) * 1000
+                )
+        if not keep_alive and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def _read_response(reader):
+    """Read one response, return its status and whether to reuse it"""
+    status_line = await reader.readuntil(b'\r\n')
+    version, status = status_line.split(b' ', 2)[:2]
+    headers = {}
+    while True:
+        line = await reader.readuntil(b'\r\n')
+        if line == b'\r\n':
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+
+    if headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    elif 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    else:
+        await reader.read()
+        return int(status), False
+
+    keep_alive = (version == b'HTTP/1.1'
+                  and headers.get('connection') != 'close')
+
+    return int(status), keep_alive
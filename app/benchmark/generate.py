@@ -0,0 +1,210 @@
+import random
+from itertools import accumulate
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Q
+
+from rest_framework.authtoken.models import Token
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.bulk import copy_insert
+from recipe.cache import bump_version
+from recipe.search import update_search_vectors
+from user.authentication import invalidate_token
+
+
+EMAIL_DOMAIN = 'benchmark.example'
+EMAIL = 'user{number}@' + EMAIL_DOMAIN
+PASSWORD = 'benchmark-password'
+
+TAGS = (
+    'Breakfast', 'Lunch', 'Dinner', 'Dessert', 'Snack', 'Vegan',
+    'Vegetarian', 'Gluten Free', 'Dairy Free', 'Quick', 'Slow Cooker',
+    'One Pot', 'Baking', 'Grill', 'Healthy', 'Comfort Food', 'Spicy',
+    'Italian', 'Mexican', 'Indian', 'Thai', 'Japanese', 'French', 'Greek',
+    'Budget', 'Kids', 'Party', 'Holiday', 'Summer', 'Winter',
+)
+INGREDIENTS = (
+    'Salt', 'Pepper', 'Olive Oil', 'Butter', 'Garlic', 'Onion', 'Flour',
+    'Sugar', 'Eggs', 'Milk', 'Tomato', 'Chicken', 'Beef', 'Pork', 'Salmon',
+    'Shrimp', 'Tofu', 'Rice', 'Pasta', 'Potato', 'Carrot', 'Celery',
+    'Bell Pepper', 'Spinach', 'Kale', 'Broccoli', 'Mushroom', 'Zucchini',
+    'Lemon', 'Lime', 'Ginger', 'Chili', 'Cumin', 'Paprika', 'Oregano',
+    'Basil', 'Thyme', 'Rosemary', 'Parsley', 'Cilantro', 'Soy Sauce',
+    'Honey', 'Vinegar', 'Cheddar', 'Parmesan', 'Mozzarella', 'Cream',
+    'Yogurt', 'Beans', 'Chickpeas', 'Lentils', 'Coconut Milk', 'Peanuts',
+    'Almonds', 'Oats', 'Bread', 'Tortilla', 'Avocado', 'Corn', 'Peas',
+)
+ADJECTIVES = (
+    'Classic', 'Easy', 'Crispy', 'Creamy', 'Smoky', 'Zesty', 'Hearty',
+    'Spicy', 'Roasted', 'Grilled', 'Baked', 'Fresh', 'Sticky', 'Golden',
+)
+DISHES = (
+    'Soup', 'Salad', 'Curry', 'Stew', 'Pasta', 'Tacos', 'Stir Fry', 'Pie',
+    'Risotto', 'Burger', 'Pancakes', 'Bowl', 'Casserole', 'Skewers',
+    'Noodles', 'Sandwich', 'Tart', 'Chili', 'Frittata', 'Dumplings',
+)
+
+
+def _weights(count):
+    """Return cumulative Zipf weights, a few items are much more popular"""
+    return list(accumulate(1 / rank for rank in range(1, count + 1)))
+
+
+def _pick(rng, ids, weights, low, high):
+    """Pick between low and high distinct ids, favouring popular ones"""
+    count = min(rng.randint(low, high), len(ids))
+    picked = set()
+    while len(picked) < count:
+        picked.add(rng.choices(ids, cum_weights=weights)[0])
+
+    return picked
+
+
+def _analyze(*models):
+    """Refresh PostgreSQL's statistics of tables that just grew"""
+    if connection.vendor != 'postgresql':
+        return
+
+    tables = ', '.join(
+        connection.ops.quote_name(model._meta.db_table) for model in models
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE {tables}')
+
+
+def generate(users, recipes, tags=20, ingredients=40, seed=1,
+             batch_size=10000, progress=None):
+    """Create benchmark users with tags, ingredients and recipes
+
+    The same arguments always produce the same data. Recipes are spread
+    over users and each recipe links 1-4 tags and 3-10 ingredients, with
+    a few users, tags and ingredients far more common than the rest.
+    Every user's password is PASSWORD. Rows go in with COPY on PostgreSQL
+    in batches of batch_size, calling progress(rows) after each batch.
+    """
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+    user_ids = []
+    for start in range(0, users, batch_size):
+        with transaction.atomic():
+            user_ids += copy_insert(
+                get_user_model(),
+                ('email', 'name', 'password', 'is_active', 'is_staff',
+                 'is_superuser'),
+                [(EMAIL.format(number=number), f'User {number}', password,
+                  True, False, False)
+                 for number in range(start, min(users, start + batch_size))]
+            )
+
+    names = {}
+    for model, choices, count in ((Tag, TAGS, tags),
+                                  (Ingredient, INGREDIENTS, ingredients)):
+        count = min(count, len(choices))
+        rows = [
+            (user_id, name)
+            for user_id in user_ids
+            for name in rng.sample(choices, count)
+        ]
+        ids = []
+        for start in range(0, len(rows), batch_size):
+            with transaction.atomic():
+                ids += copy_insert(model, ('user_id', 'name'),
+                                   rows[start:start + batch_size])
+        names[model] = {
+            user_id: ids[index * count:(index + 1) * count]
+            for index, user_id in enumerate(user_ids)
+        }
+
+    user_weights = _weights(len(user_ids))
+    tag_weights = _weights(min(tags, len(TAGS)))
+    ingredient_weights = _weights(min(ingredients, len(INGREDIENTS)))
+    created = 0
+    while created < recipes:
+        count = min(batch_size, recipes - created)
+        owners = rng.choices(user_ids, cum_weights=user_weights, k=count)
+        rows = [
+            (user_id,
+             f'{rng.choice(ADJECTIVES)} {rng.choice(DISHES)}',
+             rng.choice((5, 10, 15, 20, 30, 45, 60, 90, 120)),
+             f'{rng.randint(100, 5000) / 100:.2f}',
+             '')
+            for user_id in owners
+        ]
+        with transaction.atomic():
+            recipe_ids = copy_insert(
+                Recipe,
+                ('user_id', 'title', 'time_minutes', 'price', 'link'),
+                rows
+            )
+            for field, model, weights, low, high in (
+                ('tags', Tag, tag_weights, 1, 4),
+                ('ingredients', Ingredient, ingredient_weights, 3, 10),
+            ):
+                target = f'{model._meta.model_name}_id'
+                copy_insert(getattr(Recipe, field).through,
+                            ('recipe_id', target), [
+                    (recipe_id, related_id)
+                    for recipe_id, user_id in zip(recipe_ids, owners)
+                    for related_id in _pick(rng, names[model][user_id],
+                                            weights, low, high)
+                ])
+            # Planning the update with the stats of near empty tables makes
+            # it scan the relations once per recipe
+            _analyze(Recipe, Recipe.tags.through, Recipe.ingredients.through)
+            update_search_vectors(recipe_ids)
+        created += count
+        if progress is not None:
+            progress(created)
+
+    return user_ids
+
+
+def clear(batch_size=1000):
+    """Delete every benchmark user with their recipes
+
+    Rows are deleted with one DELETE per table and batch of batch_size
+    users, skipping the ORM's cascade collection and per row signals.
+    Recipes with images go through the ORM so their files are released.
+    Returns the number of users deleted.
+    """
+    user_model = get_user_model()
+    user_ids = list(user_model.objects.filter(
+        email__endswith=f'@{EMAIL_DOMAIN}'
+    ).order_by('id').values_list('id', flat=True))
+
+    for start in range(0, len(user_ids), batch_size):
+        ids = user_ids[start:start + batch_size]
+        keys = list(Token.objects.filter(
+            user_id__in=ids
+        ).values_list('key', flat=True))
+        with transaction.atomic():
+            Recipe.objects.filter(user_id__in=ids).filter(
+                Q(image__gt='') | Q(image_variants__isnull=False)
+            ).distinct().delete()
+            for queryset in (
+                Recipe.tags.through.objects.filter(recipe__user_id__in=ids),
+                Recipe.ingredients.through.objects.filter(
+                    recipe__user_id__in=ids
+                ),
+                Recipe.objects.filter(user_id__in=ids),
+                Tag.objects.filter(user_id__in=ids),
+                Ingredient.objects.filter(user_id__in=ids),
+                Token.objects.filter(user_id__in=ids),
+                LogEntry.objects.filter(user_id__in=ids),
+                user_model.groups.through.objects.filter(user_id__in=ids),
+                user_model.user_permissions.through.objects.filter(
+                    user_id__in=ids
+                ),
+                user_model.objects.filter(id__in=ids),
+            ):
+                queryset._raw_delete(queryset.db)
+        for user_id in ids:
+            bump_version(user_id)
+        for key in keys:
+            invalidate_token(key)
+
+    return len(user_ids)
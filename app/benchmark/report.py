@@ -0,0 +1,72 @@
+import statistics
+
+
+def percentile(values, percent):
+    """Return the nearest rank percentile of sorted values"""
+    index = max(0, int(round(percent / 100 * len(values))) - 1)
+
+    return values[min(index, len(values) - 1)]
+
+
+def summarize(latencies, errors, elapsed):
+    """Return throughput and latency percentiles for one scenario"""
+    latencies = sorted(latencies)
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    }
+    for name, percent in (('p50', 50), ('p95', 95), ('p99', 99)):
+        summary[f'{name}_ms'] = (
+            round(percentile(latencies, percent), 2) if latencies else None
+        )
+    summary['mean_ms'] = (
+        round(statistics.mean(latencies), 2) if latencies else None
+    )
+
+    return summary
+
+
+# Settings that must match for two runs to be compared
+COMPARABLE = (
+    'concurrency', 'seconds', 'warmup', 'clients', 'seed', 'users', 'recipes'
+)
+
+
+def mismatches(baseline, current):
+    """Return the run settings that differ between two reports"""
+    return [
+        key for key in COMPARABLE
+        if baseline['meta'].get(key) != current['meta'].get(key)
+    ]
+
+
+def regressions(baseline, current, threshold):
+    """Return messages for scenarios that got slower than the baseline
+
+    A scenario regresses when its p95 latency grows, or its throughput
+    drops, by more than threshold percent, or when it starts failing
+    requests.
+    """
+    messages = []
+    limit = threshold / 100
+    for name, result in current['scenarios'].items():
+        base = baseline['scenarios'].get(name)
+        if base is None or not base['requests']:
+            continue
+        if not result['requests']:
+            messages.append(f'{name}: no successful requests')
+            continue
+
+        if result['p95_ms'] > base['p95_ms'] * (1 + limit):
+            messages.append(
+                f"{name}: p95 {base['p95_ms']}ms -> {result['p95_ms']}ms"
+            )
+        if result['rps'] < base['rps'] * (1 - limit):
+            messages.append(
+                f"{name}: {base['rps']} -> {result['rps']} req/sec"
+            )
+        if result['errors'] and not base['errors']:
+            messages.append(f"{name}: {result['errors']} errors")
+
+    return messages
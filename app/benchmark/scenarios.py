@@ -0,0 +1,182 @@
+import io
+import json
+import random
+from collections import defaultdict
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from benchmark.driver import Request
+from benchmark.generate import EMAIL_DOMAIN, PASSWORD
+from core.models import Tag, Ingredient, Recipe
+
+
+class Context:
+    """Benchmark users with their tokens and data ids"""
+
+    def __init__(self, clients, seed=1, images=50, recipes_per_user=1000):
+        self.rng = random.Random(seed)
+        users = get_user_model().objects.filter(
+            email__endswith=f'@{EMAIL_DOMAIN}'
+        ).order_by('id')[:clients]
+        self.users = [
+            (user, Token.objects.get_or_create(user=user)[0].key)
+            for user in users
+        ]
+        ids = [user.id for user, _token in self.users]
+        self.recipes = self._ids(Recipe, ids, recipes_per_user)
+        self.tags = self._ids(Tag, ids)
+        self.ingredients = self._ids(Ingredient, ids)
+        self.images = [self._image(number) for number in range(images)]
+        self.upload_recipes = {}
+
+    def create_upload_recipes(self):
+        """Create a recipe per user for the upload_image scenario
+
+        Uploads go to these instead of the generated recipes, so deleting
+        the recipes a run created also deletes its images and variants.
+        """
+        self.upload_recipes = {
+            user.id: Recipe.objects.create(
+                user=user, title='Benchmark upload', time_minutes=5,
+                price=1
+            ).id
+            for user, _token in self.users
+        }
+
+    def _ids(self, model, user_ids, limit=None):
+        """Return ids of a model by user"""
+        ids = defaultdict(list)
+        for user_id in user_ids:
+            queryset = model.objects.filter(user_id=user_id).order_by('-id')
+            ids[user_id] = list(
+                queryset.values_list('id', flat=True)[:limit]
+            )
+
+        return ids
+
+    def _image(self, number):
+        """Return a small JPEG, each number gives different bytes"""
+        image = Image.effect_noise((64, 64), 64 + number).convert('RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=80)
+
+        return buffer.getvalue()
+
+    def user(self):
+        """Return a random benchmark user and their token"""
+        return self.rng.choice(self.users)
+
+
+def _authorized(token, *headers):
+    """Return request headers with the token's Authorization header"""
+    return (('Authorization', f'Token {token}'), *headers)
+
+
+def _json(method, path, token, data):
+    """Return a JSON request"""
+    return Request(
+        method, path,
+        _authorized(token, ('Content-Type', 'application/json')),
+        json.dumps(data).encode()
+    )
+
+
+def list_recipes(context):
+    """List the first page of a user's recipes"""
+    _user, token = context.user()
+
+    return Request('GET', reverse('recipe:recipe-list'), _authorized(token))
+
+
+def filter_recipes(context):
+    """List recipes with a tag and some ingredients"""
+    user, token = context.user()
+    tags = context.tags[user.id]
+    ingredients = context.ingredients[user.id]
+    tags = context.rng.sample(tags, min(1, len(tags)))
+    ingredients = context.rng.sample(ingredients, min(2, len(ingredients)))
+    path = (f"{reverse('recipe:recipe-list')}"
+            f"?tags={','.join(map(str, tags))}"
+            f"&ingredients={','.join(map(str, ingredients))}")
+
+    return Request('GET', path, _authorized(token))
+
+
+def recipe_detail(context):
+    """Fetch one of a user's recipes"""
+    user, token = context.user()
+    recipe_id = context.rng.choice(context.recipes[user.id] or [0])
+
+    return Request(
+        'GET',
+        reverse('recipe:recipe-detail', args=[recipe_id]),
+        _authorized(token)
+    )
+
+
+def create_recipe(context):
+    """Create a recipe with some of the user's tags and ingredients"""
+    user, token = context.user()
+    rng = context.rng
+    tags = context.tags[user.id]
+    ingredients = context.ingredients[user.id]
+
+    return _json('POST', reverse('recipe:recipe-list'), token, {
+        'title': f'Benchmark recipe {rng.randint(1, 10 ** 9)}',
+        'time_minutes': rng.randint(5, 120),
+        'price': f'{rng.randint(100, 5000) / 100:.2f}',
+        'tags': rng.sample(tags, min(2, len(tags))),
+        'ingredients': rng.sample(ingredients, min(5, len(ingredients))),
+    })
+
+
+def upload_image(context):
+    """Upload a JPEG to a recipe created for the run"""
+    user, token = context.user()
+    recipe_id = context.upload_recipes.get(user.id, 0)
+    boundary = f'{context.rng.getrandbits(128):032x}'
+    body = b''.join((
+        f'--{boundary}\r\n'.encode(),
+        b'Content-Disposition: form-data; name="image"; '
+        b'filename="photo.jpg"\r\n',
+        b'Content-Type: image/jpeg\r\n\r\n',
+        context.rng.choice(context.images),
+        f'\r\n--{boundary}--\r\n'.encode(),
+    ))
+
+    return Request(
+        'POST',
+        reverse('recipe:recipe-upload-image', args=[recipe_id]),
+        _authorized(
+            token,
+            ('Content-Type', f'multipart/form-data; boundary={boundary}')
+        ),
+        body
+    )
+
+
+def token_login(context):
+    """Log in with email and password for a token"""
+    user, _token = context.user()
+    body = json.dumps({'email': user.email, 'password': PASSWORD}).encode()
+
+    return Request(
+        'POST', reverse('user:token'),
+        (('Content-Type', 'application/json'),), body
+    )
+
+
+# Run in this order, read only scenarios first so writes can't skew them
+SCENARIOS = {
+    'list': list_recipes,
+    'filter': filter_recipes,
+    'detail': recipe_detail,
+    'login': token_login,
+    'create': create_recipe,
+    'upload_image': upload_image,
+}
@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from rest_framework.authtoken.models import Token
+
+from benchmark import generate
+from core.models import Tag, Ingredient, Recipe
+from recipe.cache import get_version
+
+
+class GenerateTests(TestCase):
+
+    def test_generate_creates_counts(self):
+        """Test generating the requested number of rows"""
+        generate.generate(3, 25, tags=5, ingredients=12, batch_size=10)
+
+        users = get_user_model().objects.filter(
+            email__endswith=f'@{generate.EMAIL_DOMAIN}'
+        )
+        self.assertEqual(users.count(), 3)
+        self.assertEqual(Tag.objects.count(), 15)
+        self.assertEqual(Ingredient.objects.count(), 36)
+        self.assertEqual(Recipe.objects.count(), 25)
+        self.assertTrue(users[0].check_password(generate.PASSWORD))
+
+    def test_recipes_link_own_tags_and_ingredients(self):
+        """Test recipes only link tags and ingredients of their user"""
+        generate.generate(2, 20, tags=5, ingredients=12)
+
+        for recipe in Recipe.objects.prefetch_related('tags', 'ingredients'):
+            tags = recipe.tags.all()
+            ingredients = recipe.ingredients.all()
+            self.assertTrue(1 <= len(tags) <= 4)
+            self.assertTrue(3 <= len(ingredients) <= 10)
+            self.assertEqual(
+                {obj.user_id for obj in [*tags, *ingredients]},
+                {recipe.user_id}
+            )
+
+    def test_generate_is_reproducible(self):
+        """Test the same seed creates the same recipes"""
+        def snapshot():
+            return [
+                (recipe.title, recipe.time_minutes, recipe.price,
+                 sorted(tag.name for tag in recipe.tags.all()))
+                for recipe in Recipe.objects.order_by('id')
+            ]
+
+        generate.generate(2, 10, seed=7)
+        first = snapshot()
+        generate.clear()
+        generate.generate(2, 10, seed=7)
+
+        self.assertEqual(snapshot(), first)
+
+    def test_clear_deletes_benchmark_rows(self):
+        """Test clearing deletes benchmark users and all their rows"""
+        other = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        Tag.objects.create(user=other, name='Kept')
+        user_ids = generate.generate(3, 20, tags=5, ingredients=12)
+        Token.objects.create(user_id=user_ids[0])
+        version = get_version(user_ids[0])
+
+        with self.assertNumQueries(29):
+            self.assertEqual(generate.clear(batch_size=2), 3)
+
+        self.assertEqual(list(get_user_model().objects.all()), [other])
+        self.assertEqual(Recipe.objects.count(), 0)
+        self.assertEqual(Ingredient.objects.count(), 0)
+        self.assertEqual(Tag.objects.get().name, 'Kept')
+        self.assertFalse(Token.objects.exists())
+        self.assertNotEqual(get_version(user_ids[0]), version)
+
+    def test_command_refuses_existing_data(self):
+        """Test the command needs --clear to replace benchmark data"""
+        call_command('generate_benchmark_data', users=2, recipes=5,
+                     stdout=StringIO())
+
+        with self.assertRaises(CommandError):
+            call_command('generate_benchmark_data', users=2, recipes=5,
+                         stdout=StringIO())
+
+        call_command('generate_benchmark_data', users=1, recipes=3,
+                     clear=True, stdout=StringIO())
+        self.assertEqual(Recipe.objects.count(), 3)
+
+    def test_command_checks_users_before_clearing(self):
+        """Test an invalid --users leaves the existing data alone"""
+        call_command('generate_benchmark_data', users=2, recipes=5,
+                     stdout=StringIO())
+
+        with self.assertRaises(CommandError):
+            call_command('generate_benchmark_data', users=0, recipes=5,
+                         clear=True, stdout=StringIO())
+
+        self.assertEqual(Recipe.objects.count(), 5)
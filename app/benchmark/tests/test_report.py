@@ -0,0 +1,56 @@
+from django.test import SimpleTestCase
+
+from benchmark import report
+
+
+def _report(rps=100.0, p95_ms=10.0, errors=0, **meta):
+    return {
+        'meta': {'concurrency': 16, 'seconds': 10, 'seed': 1, **meta},
+        'scenarios': {'list': {'requests': 1000, 'rps': rps,
+                               'p95_ms': p95_ms, 'errors': errors}},
+    }
+
+
+class ReportTests(SimpleTestCase):
+
+    def test_summarize(self):
+        """Test summarizing latencies into percentiles"""
+        summary = report.summarize(range(1, 101), 2, 4)
+
+        self.assertEqual(summary['requests'], 100)
+        self.assertEqual(summary['errors'], 2)
+        self.assertEqual(summary['rps'], 25)
+        self.assertEqual(summary['p50_ms'], 50)
+        self.assertEqual(summary['p95_ms'], 95)
+        self.assertEqual(summary['p99_ms'], 99)
+
+    def test_summarize_without_requests(self):
+        """Test a scenario without successes has no percentiles"""
+        summary = report.summarize([], 3, 1)
+
+        self.assertEqual(summary['requests'], 0)
+        self.assertIsNone(summary['p95_ms'])
+
+    def test_regressions_within_threshold(self):
+        """Test small changes are not regressions"""
+        self.assertEqual(
+            report.regressions(_report(), _report(95, 10.5), 10), []
+        )
+
+    def test_regressions(self):
+        """Test slower latency, lower throughput and errors regress"""
+        messages = report.regressions(_report(), _report(80, 12, 3), 10)
+
+        self.assertEqual(len(messages), 3)
+        self.assertIn('p95 10.0ms -> 12ms', messages[0])
+
+    def test_mismatches(self):
+        """Test reporting run settings that differ"""
+        self.assertEqual(
+            report.mismatches(_report(), _report(concurrency=4)),
+            ['concurrency']
+        )
+        self.assertEqual(
+            report.mismatches(_report(warmup=2), _report(clients=5)),
+            ['warmup', 'clients']
+        )
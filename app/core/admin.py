@@ -26,7 +26,24 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class RecipeTagInline(admin.TabularInline):
+    model = models.RecipeTag
+    raw_id_fields = ['tag']
+    extra = 1
+
+
+class RecipeIngredientInline(admin.TabularInline):
+    model = models.RecipeIngredient
+    raw_id_fields = ['ingredient']
+    extra = 1
+
+
+class RecipeAdmin(admin.ModelAdmin):
+    inlines = [RecipeTagInline, RecipeIngredientInline]
+
+
 admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Tag)
 admin.site.register(models.Ingredient)
-admin.site.register(models.Recipe)
+admin.site.register(models.Recipe, RecipeAdmin)
+admin.site.register(models.RecipeImageVariant)
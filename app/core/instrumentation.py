@@ -0,0 +1,93 @@
+import heapq
+import threading
+import time
+from contextlib import contextmanager
+
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """Timings collected while handling one request
+
+    Only the keep_sql slowest statements are kept, so requests running
+    many queries use bounded memory.
+    """
+
+    def __init__(self, keep_sql=10):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.keep_sql = keep_sql
+        self.sql = []
+        self.timings = {}
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """Count and time a query, see connection.execute_wrapper"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += duration
+            self._keep(duration, sql)
+
+    def _keep(self, duration, sql):
+        """Keep a statement if it is among the slowest so far"""
+        if len(self.sql) < self.keep_sql:
+            heapq.heappush(self.sql, (duration, sql))
+        elif self.sql and duration > self.sql[0][0]:
+            heapq.heapreplace(self.sql, (duration, sql))
+
+    def add(self, name, duration):
+        """Add seconds spent in a named phase, e.g. serializer"""
+        self.timings[name] = self.timings.get(name, 0.0) + duration
+
+    def slowest_sql(self, count):
+        """Return the slowest statements as (milliseconds, sql) pairs"""
+        return [
+            (round(duration * 1000, 2), sql)
+            for duration, sql in sorted(self.sql, reverse=True)[:count]
+        ]
+
+
+def start_request(keep_sql=10):
+    """Start collecting metrics for the current thread's request"""
+    _local.metrics = RequestMetrics(keep_sql)
+
+    return _local.metrics
+
+
+def finish_request():
+    """Stop collecting metrics for the current thread"""
+    _local.metrics = None
+
+
+def current():
+    """Return the metrics of the request being handled, if any"""
+    return getattr(_local, 'metrics', None)
+
+
+@contextmanager
+def timer(name):
+    """Add the time spent in the block to the current request"""
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(name, time.perf_counter() - start)
+
+
+class TimedDataMixin:
+    """Record the time a serializer spends building its data"""
+
+    @property
+    def data(self):
+        with timer('serializer'):
+            return super().data
@@ -0,0 +1,109 @@
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.core.management.base import BaseCommand
+
+from core.models import Tag, Recipe
+
+
+class Command(BaseCommand):
+    """ Django command to benchmark the assigned_only tag filter """
+
+    help = ('Seed users with tagged recipes and compare the JOIN + DISTINCT '
+            'and EXISTS implementations of assigned_only')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--tags-per-recipe', type=int, default=5)
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            users = self._seed(options)
+            for name, build in (('distinct', self._distinct_join),
+                                ('exists', self._exists)):
+                timings = self._time(build, users, options['iterations'])
+                self.stdout.write(
+                    f'{name}: p50={self._percentile(timings, 50):.2f}ms '
+                    f'p95={self._percentile(timings, 95):.2f}ms'
+                )
+            # Never leave benchmark data behind
+            transaction.set_rollback(True)
+
+    def _seed(self, options):
+        """Create users, tags and recipes and return the users"""
+        self.stdout.write(
+            f"Seeding {options['users']} users x "
+            f"{options['recipes']} recipes..."
+        )
+        # A prefix per run can't collide with users already in the database
+        prefix = f'benchmark-{uuid.uuid4().hex[:12]}-'
+        User = get_user_model()
+        User.objects.bulk_create([
+            User(email=f'{prefix}{n}@email.com', password='!')
+            for n in range(options['users'])
+        ])
+        users = list(User.objects.filter(email__startswith=prefix))
+        through = Recipe.tags.through
+        for user in users:
+            Tag.objects.bulk_create([
+                Tag(user=user, name=f'Tag {n}')
+                for n in range(options['tags'])
+            ])
+            Recipe.objects.bulk_create([
+                Recipe(user=user, title=f'Recipe {n}', time_minutes=10,
+                       price=5)
+                for n in range(options['recipes'])
+            ])
+            # Only the first half of the tags are ever assigned
+            tag_ids = list(
+                Tag.objects.filter(user=user).values_list('id', flat=True)
+            )[:max(options['tags'] // 2, 1)]
+            recipe_ids = Recipe.objects.filter(
+                user=user
+            ).values_list('id', flat=True)
+            links = []
+            for index, recipe_id in enumerate(recipe_ids):
+                for n in range(options['tags_per_recipe']):
+                    tag_id = tag_ids[(index + n) % len(tag_ids)]
+                    links.append(through(recipe_id=recipe_id, tag_id=tag_id))
+            through.objects.bulk_create(links, ignore_conflicts=True)
+
+        return users
+
+    def _distinct_join(self, user):
+        """Previous implementation joining recipes then deduplicating"""
+        return Tag.objects.filter(
+            recipe__isnull=False, user=user
+        ).order_by('-name').distinct()
+
+    def _exists(self, user):
+        """Current implementation using a correlated EXISTS subquery"""
+        assigned = Recipe.tags.through.objects.filter(tag=OuterRef('pk'))
+
+        return Tag.objects.annotate(
+            assigned=Exists(assigned)
+        ).filter(assigned=True, user=user).order_by('-name')
+
+    def _time(self, build, users, iterations):
+        """Return query timings in milliseconds"""
+        timings = []
+        for _ in range(iterations):
+            for user in users:
+                start = time.perf_counter()
+                list(build(user))
+                timings.append((time.perf_counter() - start) * 1000)
+
+        return timings
+
+    def _percentile(self, timings, percent):
+        """Return the nearest-rank percentile of the timings"""
+        ordered = sorted(timings)
+        index = max(int(round(percent / 100 * len(ordered))) - 1, 0)
+
+        return ordered[index]
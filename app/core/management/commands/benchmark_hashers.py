@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """ Django command to benchmark the configured password hashers """
+
+    help = ('Time password verification, which dominates login, for each '
+            'configured hasher and report logins/sec per core and on the '
+            'hashing pool')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        workers = settings.PASSWORD_HASH_WORKERS
+        for hasher in get_hashers():
+            if hasher.library:
+                try:
+                    hasher._load_library()
+                except ValueError:
+                    self.stdout.write(f'{hasher.algorithm}: not installed')
+                    continue
+            encoded = hasher.encode('benchmark-pass', hasher.salt())
+            per_core = self._rate(hasher, encoded, options['seconds'], 1)
+            pooled = self._rate(hasher, encoded, options['seconds'], workers)
+            self.stdout.write(
+                f'{hasher.algorithm}: {per_core:.1f} logins/sec per core, '
+                f'{pooled:.1f} logins/sec on {workers} workers'
+            )
+
+    def _rate(self, hasher, encoded, seconds, workers):
+        """Return verifications per second across the given threads"""
+        deadline = time.perf_counter() + seconds
+
+        def verify():
+            count = 0
+            while time.perf_counter() < deadline:
+                hasher.verify('benchmark-pass', encoded)
+                count += 1
+            return count
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(verify) for _ in range(workers)]
+            total = sum(future.result() for future in futures)
+
+        return total / (time.perf_counter() - start)
@@ -0,0 +1,84 @@
+import io
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core import renderers
+
+
+class Command(BaseCommand):
+    """ Django command to benchmark the JSON renderers and parsers """
+
+    help = ('Render and parse a page of recipes with DRF\'s json based '
+            'renderer and the orjson based one')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stdout.write('orjson is not installed, FastJSONRenderer '
+                              'falls back to json')
+        payload = self._payload(options['recipes'])
+        body = JSONRenderer().render(payload)
+        self.stdout.write(
+            f"{options['recipes']} recipes, {len(body) / 1024:.0f}KB"
+        )
+
+        for name, renderer, parser in (
+            ('json', JSONRenderer(), JSONParser()),
+            ('fast', renderers.FastJSONRenderer(),
+             renderers.FastJSONParser()),
+        ):
+            render = self._time(
+                lambda: renderer.render(payload), options['iterations']
+            )
+            parse = self._time(
+                lambda: parser.parse(io.BytesIO(body)), options['iterations']
+            )
+            self.stdout.write(
+                f'{name}: render p50={render:.2f}ms parse p50={parse:.2f}ms'
+            )
+
+    def _payload(self, count):
+        """Return data shaped like an expanded recipe list page"""
+        results = []
+        for n in range(count):
+            results.append(OrderedDict([
+                ('id', n),
+                ('title', f'Recipe {n}'),
+                ('ingredients', [
+                    OrderedDict([('id', i), ('name', f'Ingredient {i}')])
+                    for i in range(n % 10)
+                ]),
+                ('tags', [
+                    OrderedDict([('id', i), ('name', f'Tag {i}')])
+                    for i in range(n % 5)
+                ]),
+                ('price', Decimal('5.00') + n),
+                ('link', f'https://example.com/recipes/{n}'),
+                ('time_minutes', 30),
+                ('image_variants', {
+                    'thumbnail_webp': f'http://localhost/media/{n}_t.webp',
+                    'medium_jpeg': f'http://localhost/media/{n}_m.jpeg',
+                }),
+            ]))
+
+        return OrderedDict([('next', None), ('previous', None),
+                            ('results', results)])
+
+    def _time(self, func, iterations):
+        """Return the median run time of func in milliseconds"""
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        return sorted(timings)[len(timings) // 2]
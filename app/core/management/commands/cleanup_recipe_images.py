@@ -0,0 +1,116 @@
+import os
+from datetime import timedelta
+
+from django.db import transaction
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Recipe, RecipeImageVariant, ImageBlob
+
+
+VARIANTS_DIRECTORY = 'uploads/recipe/variants/'
+
+
+class Command(BaseCommand):
+    """ Django command to delete unreferenced recipe image files """
+
+    help = ('Delete recipe image files no recipe or variant references and '
+            'rebuild image reference counts')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List unreferenced files without deleting them',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=3600,
+            help='Keep unreferenced files younger than this many seconds, '
+                 'they may belong to an upload still in progress',
+        )
+
+    def handle(self, *args, **options):
+        storage = Recipe._meta.get_field('image').storage
+        self.cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+        stored = set(self._stored_files(storage, 'uploads/recipe'))
+        images = {
+            name for name in stored
+            if not name.startswith(VARIANTS_DIRECTORY)
+        } | set(ImageBlob.objects.values_list('name', flat=True))
+
+        removed = in_use = 0
+        for name in sorted(images):
+            result = self._check_image(storage, name, options['dry_run'])
+            if result == 'unused':
+                removed += 1
+                self.stdout.write(f'Unreferenced: {name}')
+            elif result == 'used':
+                in_use += 1
+        for name in sorted(stored - images):
+            if self._unused_variant(storage, name):
+                removed += 1
+                self.stdout.write(f'Unreferenced: {name}')
+                if not options['dry_run']:
+                    storage.delete(name)
+
+        action = 'Found' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {removed} unreferenced files, '
+            f'{in_use} images in use'
+        ))
+
+    def _check_image(self, storage, name, dry_run):
+        """Recount an image's references, deleting it when it has none
+
+        Runs with the image's blob row locked, so uploads reusing the file
+        and references released meanwhile wait for the recount. Returns
+        'used', 'unused' or 'recent'.
+        """
+        with transaction.atomic():
+            blob = ImageBlob.objects.lock(name)
+            total = Recipe.objects.filter(image=name).count()
+            if total:
+                if blob.refcount != total and not dry_run:
+                    blob.refcount = total
+                    blob.save(update_fields=['refcount'])
+                return 'used'
+            if storage.exists(name) and self._is_recent(storage, name):
+                return 'recent'
+            if not dry_run:
+                storage.delete(name)
+                blob.delete()
+            else:
+                transaction.set_rollback(True)
+
+            return 'unused'
+
+    def _unused_variant(self, storage, name):
+        """Return whether a variant file is old and has no variant row
+
+        Variant files are written before their rows are committed, so
+        recent files are kept.
+        """
+        return (
+            not RecipeImageVariant.objects.filter(image=name).exists()
+            and not self._is_recent(storage, name)
+        )
+
+    def _is_recent(self, storage, name):
+        """Return whether a file is younger than --min-age"""
+        return storage.get_modified_time(name) > self.cutoff
+
+    def _stored_files(self, storage, directory):
+        """Yield every file name below a storage directory"""
+        if not storage.exists(directory):
+            return
+        directories, files = storage.listdir(directory)
+        for filename in files:
+            if not filename.startswith('.upload-'):
+                yield os.path.join(directory, filename)
+        for subdirectory in directories:
+            yield from self._stored_files(
+                storage,
+                os.path.join(directory, subdirectory)
+            )
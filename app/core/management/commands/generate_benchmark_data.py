@@ -0,0 +1,54 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmark import generate
+
+
+class Command(BaseCommand):
+    """ Django command to create reproducible benchmark data """
+
+    help = ('Create benchmark users, tags, ingredients and recipes. The same '
+            'arguments always create the same data')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000,
+                            help='From 1000 up to millions of rows')
+        parser.add_argument('--tags', type=int, default=20,
+                            help='Tags per user')
+        parser.add_argument('--ingredients', type=int, default=40,
+                            help='Ingredients per user')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete earlier benchmark data first')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('--users must be at least 1')
+        existing = get_user_model().objects.filter(
+            email__endswith=f'@{generate.EMAIL_DOMAIN}'
+        )
+        if options['clear']:
+            generate.clear(batch_size=options['batch_size'])
+        elif existing.exists():
+            raise CommandError('Benchmark data already exists, pass --clear '
+                               'or use an empty database')
+
+        start = time.perf_counter()
+
+        def progress(rows):
+            rate = rows / max(time.perf_counter() - start, 1e-9)
+            self.stdout.write(f'Created {rows} recipes ({rate:.0f} rows/sec)')
+
+        generate.generate(
+            options['users'], options['recipes'], tags=options['tags'],
+            ingredients=options['ingredients'], seed=options['seed'],
+            batch_size=options['batch_size'], progress=progress
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {options['users']} users and {options['recipes']} "
+            f"recipes in {time.perf_counter() - start:.1f}s"
+        ))
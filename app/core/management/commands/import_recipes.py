@@ -0,0 +1,245 @@
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.bulk import copy_insert
+from recipe.cache import bump_version
+from recipe.export import NAME_SEPARATOR, unescape_cell
+from recipe.search import update_search_vectors
+
+
+RECIPE_FIELDS = ('user_id', 'title', 'time_minutes', 'price', 'link')
+NAME_FIELDS = (('tags', Tag), ('ingredients', Ingredient))
+
+
+class Command(BaseCommand):
+    """ Django command to import recipes from NDJSON or CSV """
+
+    help = ('Stream recipes in the export format from a file or stdin and '
+            'insert them in batches, creating missing tags and ingredients')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to read, or - for stdin')
+        parser.add_argument('--user', required=True,
+                            help='Email of the user owning the recipes')
+        parser.add_argument('--format', choices=('ndjson', 'csv'),
+                            help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows committed per transaction')
+        parser.add_argument('--checkpoint',
+                            help='File recording committed rows, so a '
+                                 'failed import resumes where it stopped')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist")
+
+        input_format = options['format'] or self._guess_format(
+            options['path']
+        )
+        skip = self._read_checkpoint(options['checkpoint'], user)
+        if skip:
+            self.stdout.write(f'Resuming after row {skip}')
+
+        self.names = {
+            Tag: dict(Tag.objects.filter(user=user).values_list('name', 'id')),
+            Ingredient: dict(
+                Ingredient.objects.filter(user=user).values_list('name', 'id')
+            ),
+        }
+        imported = 0
+        start = time.perf_counter()
+        with self._open(options['path']) as stream:
+            rows = islice(self._checked_rows(stream, input_format), skip, None)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                with transaction.atomic():
+                    recipe_ids = self._import_batch(user, batch)
+                    self._write_checkpoint(
+                        options['checkpoint'],
+                        skip + imported + len(batch),
+                        len(batch),
+                        recipe_ids[0]
+                    )
+                bump_version(user.pk)
+                imported += len(batch)
+                self.stdout.write(
+                    f'Imported {skip + imported} rows '
+                    f'({self._rate(imported, start):.0f} rows/sec)'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} recipes '
+            f'({self._rate(imported, start):.0f} rows/sec)'
+        ))
+
+    def _guess_format(self, path):
+        """Return the input format from the file extension"""
+        extension = os.path.splitext(path)[1].lstrip('.').lower()
+        if extension not in ('ndjson', 'csv'):
+            raise CommandError('Pass --format when reading stdin or a file '
+                               'without a .ndjson or .csv extension')
+
+        return extension
+
+    def _open(self, path):
+        """Open the input file, or wrap stdin so it isn't closed"""
+        if path == '-':
+            return open(sys.stdin.fileno(), encoding='utf-8', closefd=False,
+                        newline='')
+
+        return open(path, encoding='utf-8', newline='')
+
+    def _rows(self, stream, input_format):
+        """Yield each row's line number and the row with lists of names"""
+        if input_format == 'csv':
+            reader = csv.DictReader(stream)
+            for row in reader:
+                row = {
+                    key: unescape_cell(value) if value else value
+                    for key, value in row.items()
+                }
+                for field, _model in NAME_FIELDS:
+                    value = row.get(field) or ''
+                    row[field] = value.split(NAME_SEPARATOR) if value else []
+                yield reader.line_num, row
+            return
+
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError as exc:
+                raise CommandError(f'Line {number} is not JSON: {exc}')
+
+    def _checked_rows(self, stream, input_format):
+        """Yield rows checked against the model fields
+
+        Fails on the first invalid row, before its batch reaches the
+        database.
+        """
+        rows = self._rows(stream, input_format)
+        for number, (line, row) in enumerate(rows, 1):
+            try:
+                yield self._check_row(row)
+            except ValidationError as exc:
+                raise CommandError(
+                    f'Row {number} is invalid (line {line}): '
+                    f'{"; ".join(exc.messages)}'
+                )
+
+    def _check_row(self, row):
+        """Return a row's recipe values and names, cleaned by the models"""
+        if not isinstance(row, dict):
+            raise ValidationError('Expected an object.')
+
+        values = []
+        for name in RECIPE_FIELDS[1:]:
+            field = Recipe._meta.get_field(name)
+            value = row.get(name)
+            if value is None and field.blank:
+                value = ''
+            try:
+                values.append(field.clean(value, None))
+            except ValidationError as exc:
+                raise ValidationError(f'{name}: {" ".join(exc.messages)}')
+        checked = {'recipe': tuple(values)}
+        for name, model in NAME_FIELDS:
+            names = row.get(name) or []
+            if not isinstance(names, list) or not all(
+                isinstance(value, str) for value in names
+            ):
+                raise ValidationError(f'{name}: Expected a list of names.')
+            field = model._meta.get_field('name')
+            try:
+                checked[name] = {field.clean(value, None) for value in names}
+            except ValidationError as exc:
+                raise ValidationError(f'{name}: {" ".join(exc.messages)}')
+
+        return checked
+
+    def _import_batch(self, user, batch):
+        """Insert a batch of recipes with their tags and ingredients
+
+        Returns the new recipe ids.
+        """
+        recipes = [(user.pk, *row['recipe']) for row in batch]
+        tag_ids = self._name_ids(user, Tag, batch, 'tags')
+        ingredient_ids = self._name_ids(user, Ingredient, batch, 'ingredients')
+        recipe_ids = copy_insert(Recipe, RECIPE_FIELDS, recipes)
+
+        for field, ids in (('tags', tag_ids), ('ingredients', ingredient_ids)):
+            through = getattr(Recipe, field).through
+            target = f'{field[:-1]}_id'
+            copy_insert(through, ('recipe_id', target), [
+                (recipe_id, ids[name])
+                for recipe_id, row in zip(recipe_ids, batch)
+                for name in row[field]
+            ])
+        update_search_vectors(recipe_ids)
+
+        return recipe_ids
+
+    def _name_ids(self, user, model, batch, field):
+        """Return the name to id map, creating names it doesn't have yet"""
+        known = self.names[model]
+        missing = {
+            name for row in batch for name in row[field]
+            if name not in known
+        }
+        if missing:
+            model.objects.bulk_create(
+                [model(user=user, name=name) for name in missing],
+                ignore_conflicts=True
+            )
+            known.update(model.objects.filter(
+                user=user, name__in=missing
+            ).values_list('name', 'id'))
+
+        return known
+
+    def _read_checkpoint(self, path, user):
+        """Return the number of rows a previous run committed
+
+        The checkpoint is written just before its batch commits, so the
+        batch's first recipe existing tells whether the commit happened.
+        """
+        if not path or not os.path.exists(path):
+            return 0
+
+        with open(path) as checkpoint:
+            rows, batch, recipe_id = map(int, checkpoint.read().split())
+        if Recipe.objects.filter(user=user, id=recipe_id).exists():
+            return rows
+
+        return rows - batch
+
+    def _write_checkpoint(self, path, rows, batch, recipe_id):
+        """Durably record the rows imported once the current batch commits"""
+        if not path:
+            return
+
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as checkpoint:
+            checkpoint.write(f'{rows} {batch} {recipe_id}')
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        os.replace(temporary, path)
+
+    def _rate(self, rows, start):
+        """Return rows per second since start"""
+        return rows / max(time.perf_counter() - start, 1e-9)
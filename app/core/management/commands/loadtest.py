@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmark import driver
+from benchmark.report import summarize
+
+
+class Command(BaseCommand):
+    """ Django command to load test a running server over HTTP """
+
+    help = ('Send GET requests from concurrent keep-alive connections and '
+            'report throughput and latency percentiles')
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='e.g. http://localhost:8000'
+                                        '/api/recipe/recipes/')
+        parser.add_argument('--token', help='Token sent in Authorization')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--seconds', type=float, default=10)
+
+    def handle(self, *args, **options):
+        try:
+            host, port, path = driver.parse_url(options['url'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        headers = ()
+        if options['token']:
+            headers = (('Authorization', f"Token {options['token']}"),)
+        request = driver.encode(
+            driver.Request('GET', path, headers), f'{host}:{port}'
+        )
+
+        results = driver.run(host, port, lambda: ('get', request),
+                             options['concurrency'], options['seconds'])
+        summary = summarize(results.latencies['get'], results.errors['get'],
+                            results.elapsed)
+        if not summary['requests']:
+            raise CommandError(
+                f"No successful requests ({summary['errors']} errors)"
+            )
+
+        self.stdout.write(
+            f"{summary['requests']} requests in {results.elapsed:.1f}s, "
+            f"{summary['rps']:.1f} req/sec, {summary['errors']} errors"
+        )
+        self.stdout.write(
+            f"latency p50={summary['p50_ms']:.1f}ms "
+            f"p95={summary['p95_ms']:.1f}ms "
+            f"p99={summary['p99_ms']:.1f}ms "
+            f"mean={summary['mean_ms']:.1f}ms"
+        )
@@ -0,0 +1,172 @@
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from benchmark import driver, report
+from benchmark.generate import EMAIL_DOMAIN
+from benchmark.scenarios import SCENARIOS, Context
+from core.models import Recipe
+
+
+class Command(BaseCommand):
+    """ Django command to benchmark API scenarios against a server """
+
+    help = ('Run each scenario against a running server with the data from '
+            'generate_benchmark_data, report throughput and latency '
+            'percentiles as JSON and compare them with a baseline')
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='e.g. http://localhost:8000')
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help='Comma separated, from '
+                                 + ', '.join(SCENARIOS))
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--seconds', type=float, default=10,
+                            help='Measured seconds per scenario')
+        parser.add_argument('--warmup', type=float, default=2,
+                            help='Unmeasured seconds before each scenario')
+        parser.add_argument('--clients', type=int, default=20,
+                            help='Benchmark users sending requests')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='File to write the JSON to')
+        parser.add_argument('--baseline',
+                            help='JSON report of an earlier run to compare '
+                                 'with, failing on regressions')
+        parser.add_argument('--threshold', type=float, default=10,
+                            help='Percent change counted as a regression')
+
+    def handle(self, *args, **options):
+        names = [name for name in options['scenarios'].split(',') if name]
+        unknown = set(names) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(
+                f"Unknown scenarios: {', '.join(sorted(unknown))}"
+            )
+        try:
+            host, port, _path = driver.parse_url(options['url'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        context = Context(options['clients'], seed=options['seed'])
+        if not context.users:
+            raise CommandError('No benchmark users, run '
+                               'generate_benchmark_data first')
+
+        meta = self._meta(options)
+        last_id = Recipe.objects.aggregate(last_id=Max('id'))['last_id']
+        results = {}
+        try:
+            if 'upload_image' in names:
+                context.create_upload_recipes()
+            for name in names:
+                results[name] = self._run(name, context, host, port, options)
+                self.stdout.write(self._line(name, results[name]))
+        finally:
+            # Keep the data the same for the next run
+            Recipe.objects.filter(
+                user__in=[user for user, _token in context.users],
+                id__gt=last_id or 0
+            ).delete()
+
+        current = {'meta': meta, 'scenarios': results}
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(current, output, indent=2, sort_keys=True)
+            self.stdout.write(f"Wrote {options['output']}")
+
+        if options['baseline']:
+            self._compare(current, options)
+
+    def _run(self, name, context, host, port, options):
+        """Run one scenario and return its summary"""
+        scenario = SCENARIOS[name]
+        address = f'{host}:{port}'
+
+        def next_request():
+            return name, driver.encode(scenario(context), address)
+
+        results = driver.run(
+            host, port, next_request, options['concurrency'],
+            options['seconds'], warmup=options['warmup']
+        )
+
+        return report.summarize(
+            results.latencies[name], results.errors[name], results.elapsed
+        )
+
+    def _line(self, name, summary):
+        """Return a scenario's summary as one line"""
+        if not summary['requests']:
+            return (f"{name}: no successful requests, "
+                    f"{summary['errors']} errors")
+
+        return (
+            f"{name}: {summary['rps']:.1f} req/sec, "
+            f"p50={summary['p50_ms']:.1f}ms p95={summary['p95_ms']:.1f}ms "
+            f"p99={summary['p99_ms']:.1f}ms, {summary['errors']} errors"
+        )
+
+    def _meta(self, options):
+        """Return what a report needs to be compared with another one"""
+        users = get_user_model().objects.filter(
+            email__endswith=f'@{EMAIL_DOMAIN}'
+        )
+
+        return {
+            'commit': os.environ.get('GIT_COMMIT') or self._commit(),
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'concurrency': options['concurrency'],
+            'seconds': options['seconds'],
+            'warmup': options['warmup'],
+            'clients': options['clients'],
+            'seed': options['seed'],
+            'users': users.count(),
+            'recipes': Recipe.objects.filter(user__in=users).count(),
+        }
+
+    def _commit(self):
+        """Return the checked out git commit, if there is one"""
+        try:
+            result = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, check=True
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+        return result.stdout.decode().strip()
+
+    def _compare(self, current, options):
+        """Fail when the run regressed against the baseline"""
+        with open(options['baseline']) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        differences = report.mismatches(baseline, current)
+        if differences:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline ran with different {', '.join(differences)}, "
+                f"results may not be comparable"
+            ))
+
+        regressions = report.regressions(
+            baseline, current, options['threshold']
+        )
+        if regressions:
+            raise CommandError(
+                f"Slower than {baseline['meta'].get('commit') or 'baseline'}"
+                f": {'; '.join(regressions)}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"No regressions over {options['threshold']:g}% against "
+            f"{baseline['meta'].get('commit') or 'baseline'}"
+        ))
@@ -1,21 +1,96 @@
+import statistics
 import time
 
-from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+
+from core import readiness
 
 
 class Command(BaseCommand):
     """ Django command to pause execution until database is available """
 
+    help = ('Wait until the database answers a query, optionally until '
+            'migrations are applied, and warm up connections')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--timeout', type=float, default=60,
+                            help='Seconds to wait before failing')
+        parser.add_argument('--max-delay', type=float, default=5,
+                            help='Longest pause between attempts')
+        parser.add_argument('--check-migrations', action='store_true',
+                            help='Also wait until every migration is applied')
+        parser.add_argument('--warm', type=int, default=0,
+                            help='Connections to open at once once ready')
+
     def handle(self, *args, **options):
+        alias = options['database']
+        start = time.perf_counter()
+        deadline = time.monotonic() + options['timeout']
         self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
+
+        attempts = self._wait(
+            lambda: readiness.check_database(alias),
+            options['timeout'], options['max_delay'], 'Database unavailable'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Database available! ({attempts} attempts, '
+            f'{time.perf_counter() - start:.2f}s)'
+        ))
+
+        if options['check_migrations']:
+            migrations_start = time.perf_counter()
+            attempts = self._wait(
+                lambda: self._check_migrations(alias),
+                max(0, deadline - time.monotonic()), options['max_delay'],
+                'Migrations pending'
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Migrations applied ({attempts} attempts, '
+                f'{time.perf_counter() - migrations_start:.2f}s)'
+            ))
+
+        if options['warm'] > 0:
+            warm_start = time.perf_counter()
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+                timings = readiness.warm_connections(
+                    options['warm'], alias, close=True
+                )
+            except OperationalError as exc:
+                raise CommandError(f'Warming connections failed: {exc}')
+            self.stdout.write(
+                f'Warmed {len(timings)} connections in '
+                f'{(time.perf_counter() - warm_start) * 1000:.1f}ms '
+                f'(connect p50={statistics.median(timings):.1f}ms '
+                f'max={max(timings):.1f}ms)'
+            )
+
+    def _wait(self, check, timeout, max_delay, message):
+        """Retry check with backoff, failing the command on timeout"""
+        def on_retry(attempt, exc, delay):
+            self.stdout.write(
+                f'{message} ({self._summary(exc)}), '
+                f'retrying in {delay:.2f}s...'
+            )
+
+        try:
+            return readiness.wait_until(
+                check, timeout, cap=max_delay, on_retry=on_retry
+            )
+        except readiness.NotReady as exc:
+            raise CommandError(
+                f'{message}, gave up waiting: {self._summary(exc)}'
+            )
+
+    def _check_migrations(self, alias):
+        """Raise OperationalError while migrations are unapplied"""
+        pending = readiness.unapplied_migrations(alias)
+        if pending:
+            raise OperationalError(
+                f'{len(pending)} unapplied, next is {pending[0]}'
+            )
 
-        self.stdout.write(self.style.SUCCESS('Database available!'))
+    def _summary(self, exc):
+        """Return an error message on one line"""
+        return ' '.join(str(exc).split())
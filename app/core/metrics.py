@@ -0,0 +1,61 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+
+REQUEST_LATENCY = Histogram(
+    'app_request_duration_seconds',
+    'Request wall time by route, method and status',
+    ['view', 'method', 'status'],
+    buckets=(.005, .01, .025, .05, .075, .1, .25, .5, .75, 1, 2.5, 5, 10)
+)
+REQUEST_QUERIES = Histogram(
+    'app_request_db_queries',
+    'Database queries per request by route',
+    ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+)
+REQUEST_DB_TIME = Histogram(
+    'app_request_db_duration_seconds',
+    'Database time per request by route',
+    ['view'],
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'app_requests_in_progress',
+    'Requests being handled',
+    multiprocess_mode='livesum'
+)
+WORKER_PROCESSES = Gauge(
+    'app_worker_processes',
+    'Processes serving requests',
+    multiprocess_mode='livesum'
+)
+CACHE_REQUESTS = Counter(
+    'app_cache_requests',
+    'Cache lookups by cache and result, hit or miss',
+    ['cache', 'result']
+)
+IMAGE_UPLOAD_BYTES = Histogram(
+    'recipe_image_upload_bytes',
+    'Size of uploaded recipe images',
+    buckets=(16384, 65536, 262144, 1048576, 4194304, 16777216)
+)
+IMAGE_UPLOAD_DURATION = Histogram(
+    'recipe_image_upload_duration_seconds',
+    'Time to store an uploaded recipe image'
+)
+IMAGE_VARIANTS_DURATION = Histogram(
+    'recipe_image_variants_duration_seconds',
+    'Time to generate the variants of a recipe image',
+    buckets=(.05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+)
+
+
+def cache_lookup(cache, hit, local=False):
+    """Count a cache hit or miss, local hits came from process memory"""
+    if not hit:
+        result = 'miss'
+    elif local:
+        result = 'local_hit'
+    else:
+        result = 'hit'
+    CACHE_REQUESTS.labels(cache, result).inc()
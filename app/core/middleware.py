@@ -0,0 +1,154 @@
+import hashlib
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from rest_framework.permissions import SAFE_METHODS
+
+from core import instrumentation, metrics, routers
+
+
+PRIMARY_KEY = 'db:primary:{digest}'
+
+logger = logging.getLogger('app.requests')
+
+
+def _client_key(request):
+    """Return a cache key for the request's credentials, if it has any"""
+    credentials = (request.META.get('HTTP_AUTHORIZATION')
+                   or request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    if not credentials:
+        return None
+
+    return PRIMARY_KEY.format(
+        digest=hashlib.sha256(credentials.encode()).hexdigest()
+    )
+
+
+class ReplicaMiddleware:
+    """Read from a replica during safe requests
+
+    After a client writes, its requests read from the primary for
+    DB_READ_YOUR_WRITES_SECONDS so it sees its own changes while the
+    replicas catch up. Clients are told apart by their token or session.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = _client_key(request)
+        if request.method in SAFE_METHODS:
+            if key is None or not cache.get(key):
+                routers.use_replica(routers.pick_replica())
+        elif key is not None:
+            cache.set(key, True, settings.DB_READ_YOUR_WRITES_SECONDS)
+
+        try:
+            return self.get_response(request)
+        finally:
+            routers.use_replica(None)
+
+
+class RequestMetricsMiddleware:
+    """Measure each request's queries, phases, response size and duration
+
+    Queries are timed with connection.execute_wrapper, so this works with
+    DEBUG off. Timings are sent back in a Server-Timing header and
+    recorded in the Prometheus histograms of core.metrics. A sample of
+    requests is logged as JSON, and requests slower than
+    REQUEST_METRICS_SLOW_MS are always logged with their slowest SQL.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        metrics.WORKER_PROCESSES.set(1)
+
+    def __call__(self, request):
+        request_metrics = instrumentation.start_request(
+            settings.REQUEST_METRICS_SLOW_QUERIES
+        )
+        metrics.REQUESTS_IN_PROGRESS.inc()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(
+                        request_metrics.execute_wrapper
+                    ))
+                response = self.get_response(request)
+        finally:
+            metrics.REQUESTS_IN_PROGRESS.dec()
+            instrumentation.finish_request()
+
+        duration = (time.perf_counter() - request_metrics.start) * 1000
+        self._observe(request, response, request_metrics, duration)
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            response['Server-Timing'] = self._server_timing(
+                request_metrics, duration
+            )
+
+        slow = duration >= settings.REQUEST_METRICS_SLOW_MS
+        if slow or random.random() < settings.REQUEST_METRICS_SAMPLE_RATE:
+            self._log(request, response, request_metrics, duration, slow)
+
+        return response
+
+    def _observe(self, request, response, request_metrics, duration):
+        """Record the request in the Prometheus histograms"""
+        match = request.resolver_match
+        # Label by route, paths would create a series per recipe
+        view = match.view_name if match else 'unresolved'
+        metrics.REQUEST_LATENCY.labels(
+            view, request.method, str(response.status_code)
+        ).observe(duration / 1000)
+        metrics.REQUEST_QUERIES.labels(view).observe(request_metrics.queries)
+        metrics.REQUEST_DB_TIME.labels(view).observe(request_metrics.db_time)
+
+    def _server_timing(self, request_metrics, duration):
+        """Return the Server-Timing header value"""
+        entries = [
+            f'db;dur={request_metrics.db_time * 1000:.1f};'
+            f'desc="{request_metrics.queries} queries"'
+        ]
+        for name, seconds in request_metrics.timings.items():
+            entries.append(f'{name};dur={seconds * 1000:.1f}')
+        entries.append(f'total;dur={duration:.1f}')
+
+        return ', '.join(entries)
+
+    def _log(self, request, response, request_metrics, duration, slow):
+        """Write one JSON line describing the request"""
+        match = request.resolver_match
+        record = {
+            'view': match.view_name if match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration, 2),
+            'db_queries': request_metrics.queries,
+            'db_ms': round(request_metrics.db_time * 1000, 2),
+            'response_bytes': (
+                None if response.streaming else len(response.content)
+            ),
+        }
+        for name, seconds in request_metrics.timings.items():
+            record[f'{name}_ms'] = round(seconds * 1000, 2)
+
+        if slow:
+            record['slow_sql'] = request_metrics.slowest_sql(
+                settings.REQUEST_METRICS_SLOW_QUERIES
+            )
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.28 on 2026-10-18 01:52
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Merge tags and ingredients sharing a name for the same user"""
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, field in (('Tag', 'tags'), ('Ingredient', 'ingredients')):
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, field).through
+        fk = f'{model_name.lower()}_id'
+        duplicates = model.objects.values('user', 'name').annotate(
+            keep=Min('id'), total=Count('id')
+        ).filter(total__gt=1)
+        for duplicate in duplicates:
+            others = model.objects.filter(
+                user=duplicate['user'], name=duplicate['name']
+            ).exclude(id=duplicate['keep'])
+            for other in others:
+                linked = through.objects.filter(
+                    **{fk: duplicate['keep']}
+                ).values_list('recipe_id', flat=True)
+                through.objects.filter(
+                    **{fk: other.id}
+                ).exclude(recipe_id__in=list(linked)).update(
+                    **{fk: duplicate['keep']}
+                )
+            others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_recipe_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.28 on 2026-10-18 03:10
+
+import core.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_user_name_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeImageVariant',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=32)),
+                ('format', models.CharField(max_length=8)),
+                ('image', models.ImageField(upload_to=core.models.recipe_img_variant_file_path)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_variants', to='core.Recipe')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='recipeimagevariant',
+            constraint=models.UniqueConstraint(fields=('recipe', 'label', 'format'), name='core_recipeimagevariant_uniq'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.28 on 2026-10-18 04:16
+
+import core.operations
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import F, Func, OuterRef, Subquery, TextField, Value
+
+
+def fill_search_vectors(apps, schema_editor):
+    """Compute search vectors for existing recipes
+
+    The expression is a copy of recipe.search.search_vector as it was when
+    this migration was written, so later changes there can't alter it.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Recipe = apps.get_model('core', 'Recipe')
+    config = getattr(settings, 'RECIPE_SEARCH_CONFIG', 'english')
+
+    def names(model_name):
+        model = apps.get_model('core', model_name)
+        names = model.objects.filter(recipe=OuterRef('pk')).annotate(
+            names=Func(F('name'), Value(' '), function='string_agg')
+        ).values('names')
+
+        return Subquery(names, output_field=TextField())
+
+    Recipe.objects.update(search_vector=(
+        SearchVector('title', weight='A', config=config)
+        + SearchVector(names('Tag'), names('Ingredient'),
+                       weight='B', config=config)
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_imageblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        core.operations.PostgresAddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='core_recipe_search_gin'),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
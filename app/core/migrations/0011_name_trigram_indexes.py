@@ -0,0 +1,25 @@
+# Generated by Django 2.2.28 on 2026-10-18 05:19
+
+import core.operations
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        core.operations.PostgresAddIndex(
+            model_name='ingredient',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='core_ingredient_name_trgm', opclasses=['gin_trgm_ops'], fastupdate=False),
+        ),
+        core.operations.PostgresAddIndex(
+            model_name='tag',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='core_tag_name_trgm', opclasses=['gin_trgm_ops'], fastupdate=False),
+        ),
+    ]
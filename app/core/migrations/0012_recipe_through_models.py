@@ -0,0 +1,161 @@
+# Generated by Django 2.2.28 on 2026-10-18 07:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Reverse indexes created with raw SQL by 0007, renamed to fit Django's
+# 30 character limit on index names
+REVERSE_INDEXES = (
+    ('core_recipe_tags_tag_recipe_idx', 'core_recipe_tags_reverse_idx',
+     'core_recipe_tags', 'tag_id, recipe_id'),
+    ('core_recipe_ingredients_ingredient_recipe_idx',
+     'core_recipe_ingr_reverse_idx', 'core_recipe_ingredients',
+     'ingredient_id, recipe_id'),
+)
+
+
+def rename_indexes(schema_editor, indexes):
+    """Rename indexes, rebuilding them where ALTER INDEX isn't supported"""
+    for old, new, table, columns in indexes:
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(f'ALTER INDEX {old} RENAME TO {new}')
+        else:
+            schema_editor.execute(f'DROP INDEX {old}')
+            schema_editor.execute(f'CREATE INDEX {new} ON {table} ({columns})')
+
+
+def forwards(apps, schema_editor):
+    """Give the reverse indexes the names the models declare"""
+    rename_indexes(schema_editor, REVERSE_INDEXES)
+
+
+def backwards(apps, schema_editor):
+    """Restore the names 0007 gave the reverse indexes"""
+    rename_indexes(schema_editor, [
+        (new, old, table, columns)
+        for old, new, table, columns in REVERSE_INDEXES
+    ])
+
+
+FK_INDEXES = (
+    ('RecipeTag', ('recipe', 'tag')),
+    ('RecipeIngredient', ('recipe', 'ingredient')),
+)
+
+
+def drop_fk_indexes(apps, schema_editor):
+    """Drop the single column indexes Django made for the foreign keys"""
+    for model_name, field_names in FK_INDEXES:
+        model = apps.get_model('core', model_name)
+        for field_name in field_names:
+            column = model._meta.get_field(field_name).column
+            for index in schema_editor._constraint_names(
+                model, [column], index=True, type_=models.Index.suffix
+            ):
+                schema_editor.execute(
+                    schema_editor._delete_index_sql(model, index)
+                )
+
+
+def create_fk_indexes(apps, schema_editor):
+    """Recreate the single column foreign key indexes"""
+    for model_name, field_names in FK_INDEXES:
+        model = apps.get_model('core', model_name)
+        for field_name in field_names:
+            schema_editor.execute(schema_editor._create_index_sql(
+                model, [model._meta.get_field(field_name)]
+            ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_name_trigram_indexes'),
+    ]
+
+    operations = [
+        # The tables already exist as the fields' automatic through tables
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='RecipeTag',
+                    fields=[
+                        ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Recipe')),
+                        ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Tag')),
+                    ],
+                    options={
+                        'db_table': 'core_recipe_tags',
+                        'unique_together': {('recipe', 'tag')},
+                    },
+                ),
+                migrations.CreateModel(
+                    name='RecipeIngredient',
+                    fields=[
+                        ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Ingredient')),
+                        ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Recipe')),
+                    ],
+                    options={
+                        'db_table': 'core_recipe_ingredients',
+                        'unique_together': {('recipe', 'ingredient')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='recipe',
+                    name='tags',
+                    field=models.ManyToManyField(through='core.RecipeTag', to='core.Tag'),
+                ),
+                migrations.AlterField(
+                    model_name='recipe',
+                    name='ingredients',
+                    field=models.ManyToManyField(through='core.RecipeIngredient', to='core.Ingredient'),
+                ),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(forwards, backwards),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='recipetag',
+                    index=models.Index(fields=['tag', 'recipe'], name='core_recipe_tags_reverse_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='recipeingredient',
+                    index=models.Index(fields=['ingredient', 'recipe'], name='core_recipe_ingr_reverse_idx'),
+                ),
+            ],
+        ),
+        # Covered by the leading columns of the unique and reverse indexes.
+        # AlterField would also drop and revalidate the foreign keys
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(drop_fk_indexes, create_fk_indexes),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='recipetag',
+                    name='recipe',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.Recipe'),
+                ),
+                migrations.AlterField(
+                    model_name='recipetag',
+                    name='tag',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.Tag'),
+                ),
+                migrations.AlterField(
+                    model_name='recipeingredient',
+                    name='recipe',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.Recipe'),
+                ),
+                migrations.AlterField(
+                    model_name='recipeingredient',
+                    name='ingredient',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.Ingredient'),
+                ),
+            ],
+        ),
+    ]
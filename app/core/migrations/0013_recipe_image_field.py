@@ -0,0 +1,20 @@
+# Generated by Django 2.2.28 on 2026-10-18 03:34
+
+import core.models
+import core.storage
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_recipe_through_models'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=core.storage.ContentAddressedImageField(null=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.models.recipe_img_file_path),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.28 on 2026-10-18 09:40
+
+import core.operations
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import BtreeGinExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_recipe_image_field'),
+    ]
+
+    operations = [
+        BtreeGinExtension(),
+        core.operations.PostgresAddIndex(
+            model_name='ingredient',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['user', 'name'], name='core_ingredient_user_name_trgm', opclasses=['int4_ops', 'gin_trgm_ops'], fastupdate=False),
+        ),
+        core.operations.PostgresAddIndex(
+            model_name='tag',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['user', 'name'], name='core_tag_user_name_trgm', opclasses=['int4_ops', 'gin_trgm_ops'], fastupdate=False),
+        ),
+        core.operations.PostgresRemoveIndex(
+            model_name='ingredient',
+            name='core_ingredient_name_trgm',
+        ),
+        core.operations.PostgresRemoveIndex(
+            model_name='tag',
+            name='core_tag_name_trgm',
+        ),
+    ]
@@ -1,19 +1,71 @@
-import uuid
 import os
-from django.db import models
+from django.db import models, transaction
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models import F
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
                                         PermissionsMixin
 from django.conf import settings
 
+from core.storage import ContentAddressedStorage, ContentAddressedImageField
+
 
 def recipe_img_file_path(instance, filename):
-    """Generate file path for new recipe image"""
-    ext = filename.split('.')[-1]
-    filename = f'{uuid.uuid4()}.{ext}'
+    """Generate file path for new recipe image
 
+    ContentAddressedStorage keeps only the directory and extension, the
+    file is named after its digest.
+    """
     return os.path.join('uploads/recipe/', filename)
 
 
+def recipe_img_variant_file_path(instance, filename):
+    """Generate file path for a resized recipe image"""
+    return os.path.join('uploads/recipe/variants/', filename)
+
+
+class ImageBlobManager(models.Manager):
+    """Reference counting for content addressed files
+
+    A blob's row is locked while its file is deleted, and while an upload
+    decides whether to reuse the file, so one can't remove a file the
+    other has just found.
+    """
+
+    def lock(self, name):
+        """Lock a file's blob row, creating it, until the transaction ends"""
+        while True:
+            self.get_or_create(name=name)
+            blob = self.select_for_update().filter(name=name).first()
+            # None when the file was being deleted while we waited
+            if blob is not None:
+                return blob
+
+    def acquire(self, name):
+        """Record a new reference to a stored file"""
+        self.get_or_create(name=name)
+        self.filter(name=name).update(refcount=F('refcount') + 1)
+
+    def release(self, name, storage):
+        """Drop a reference to a stored file and delete it when unused"""
+        # Files stored before reference counting have no blob row
+        self.get_or_create(name=name)
+        self.filter(name=name, refcount__gt=0).update(
+            refcount=F('refcount') - 1
+        )
+        if not self.filter(name=name, refcount__gt=0).exists():
+            transaction.on_commit(lambda: self._delete_unused(name, storage))
+
+    def _delete_unused(self, name, storage):
+        """Delete a file unless it was referenced again before commit"""
+        with transaction.atomic():
+            blob = self.lock(name)
+            if blob.refcount:
+                return
+            storage.delete(name)
+            blob.delete()
+
+
 class UserManager(BaseUserManager):
     """docstring for UserManager."""
 
@@ -48,6 +100,13 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = 'email'
 
+    def refresh_from_db(self, using=None, fields=None):
+        """Load every deferred field the first time one is used"""
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields)
+
 
 class Tag(models.Model):
     """Recipe tag"""
@@ -57,6 +116,23 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='core_tag_user_name_uniq'
+            ),
+        ]
+        indexes = [
+            # btree_gin lets one scan match both the owner and the name
+            GinIndex(
+                fields=['user', 'name'],
+                opclasses=['int4_ops', 'gin_trgm_ops'],
+                fastupdate=False,
+                name='core_tag_user_name_trgm'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -69,6 +145,23 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='core_ingredient_user_name_uniq'
+            ),
+        ]
+        indexes = [
+            # btree_gin lets one scan match both the owner and the name
+            GinIndex(
+                fields=['user', 'name'],
+                opclasses=['int4_ops', 'gin_trgm_ops'],
+                fastupdate=False,
+                name='core_ingredient_user_name_trgm'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -83,9 +176,109 @@ class Recipe(models.Model):
     time_minutes = models.IntegerField()
     price = models.DecimalField(max_digits=5, decimal_places=2)
     link = models.CharField(max_length=255, blank=True)
-    ingredients = models.ManyToManyField('Ingredient')
-    tags = models.ManyToManyField('Tag')
-    image = models.ImageField(null=True, upload_to=recipe_img_file_path)
+    ingredients = models.ManyToManyField(
+        'Ingredient',
+        through='RecipeIngredient'
+    )
+    tags = models.ManyToManyField('Tag', through='RecipeTag')
+    image = ContentAddressedImageField(
+        null=True,
+        upload_to=recipe_img_file_path,
+        storage=ContentAddressedStorage()
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='core_recipe_search_gin'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Save the recipe and count its image in one transaction"""
+        # Keeps the image's blob locked from storing the file until the
+        # new reference to it is counted
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
+
+
+class RecipeTag(models.Model):
+    """Tag of a recipe"""
+    # The unique (recipe, tag) and (tag, recipe) indexes cover single
+    # column lookups on either side
+    recipe = models.ForeignKey(
+        'Recipe',
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    tag = models.ForeignKey('Tag', on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        db_table = 'core_recipe_tags'
+        unique_together = [('recipe', 'tag')]
+        indexes = [
+            models.Index(
+                fields=['tag', 'recipe'],
+                name='core_recipe_tags_reverse_idx'
+            ),
+        ]
+
+
+class RecipeIngredient(models.Model):
+    """Ingredient of a recipe"""
+    recipe = models.ForeignKey(
+        'Recipe',
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    ingredient = models.ForeignKey(
+        'Ingredient',
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+
+    class Meta:
+        db_table = 'core_recipe_ingredients'
+        unique_together = [('recipe', 'ingredient')]
+        indexes = [
+            models.Index(
+                fields=['ingredient', 'recipe'],
+                name='core_recipe_ingr_reverse_idx'
+            ),
+        ]
+
+
+class ImageBlob(models.Model):
+    """Number of recipes sharing a content addressed image file"""
+    name = models.CharField(max_length=255, unique=True)
+    refcount = models.PositiveIntegerField(default=0)
+
+    objects = ImageBlobManager()
+
+    def __str__(self):
+        return self.name
+
+
+class RecipeImageVariant(models.Model):
+    """Resized copy of a recipe image"""
+    recipe = models.ForeignKey(
+        'Recipe',
+        on_delete=models.CASCADE,
+        related_name='image_variants'
+    )
+    label = models.CharField(max_length=32)
+    format = models.CharField(max_length=8)
+    image = models.ImageField(upload_to=recipe_img_variant_file_path)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'label', 'format'],
+                name='core_recipeimagevariant_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} {self.label} {self.format}'
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+class PostgresAddIndex(migrations.AddIndex):
+    """Add a PostgreSQL-only index, recording it on other databases
+
+    Lets migrations run on SQLite during tests, where GIN indexes don't
+    exist and queries fall back to portable lookups.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state,
+                                      to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state,
+                                       to_state)
+
+
+class PostgresRemoveIndex(migrations.RemoveIndex):
+    """Remove a PostgreSQL-only index added by PostgresAddIndex"""
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state,
+                                      to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state,
+                                       to_state)
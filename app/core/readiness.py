@@ -0,0 +1,95 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.utils import OperationalError
+
+
+class NotReady(Exception):
+    """The database didn't become ready before the deadline"""
+
+
+def check_database(alias='default'):
+    """Run a query on the connection, raising OperationalError if it fails
+
+    Django opens connections lazily, so only a query proves the server is
+    up and accepting our credentials.
+    """
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except OperationalError:
+        # Drop the broken connection so the next attempt reconnects
+        connection.close()
+        raise
+
+
+def unapplied_migrations(alias='default'):
+    """Return the names of migrations not applied to the database yet"""
+    executor = MigrationExecutor(connections[alias])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+    return [f'{migration.app_label}.{migration.name}'
+            for migration, _backwards in plan]
+
+
+def backoff(attempt, base, cap):
+    """Return the delay before a retry, exponential with full jitter"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def wait_until(check, timeout, base=0.25, cap=5, on_retry=None):
+    """Call check until it stops raising OperationalError
+
+    Retries back off exponentially up to cap seconds and never sleep past
+    the deadline. Returns the number of attempts, or raises NotReady with
+    the last error once timeout seconds have passed.
+    """
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            check()
+            return attempt
+        except OperationalError as exc:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise NotReady(str(exc)) from exc
+            delay = min(remaining, backoff(attempt - 1, base, cap))
+            if on_retry is not None:
+                on_retry(attempt, exc, delay)
+            time.sleep(delay)
+
+
+def warm_connections(count, alias='default', executor=None, close=False):
+    """Open a connection on count threads at once and time each one
+
+    Connections belong to the thread that opened them, so pass the app
+    server's thread pool as executor to keep them for its request threads.
+    The threads wait for each other, which makes every task land on its
+    own thread. Returns the connect times in milliseconds.
+    """
+    barrier = threading.Barrier(count)
+
+    def warm():
+        start = time.perf_counter()
+        try:
+            check_database(alias)
+            return (time.perf_counter() - start) * 1000
+        finally:
+            barrier.wait()
+            if close:
+                connections[alias].close()
+
+    if executor is not None:
+        return [future.result()
+                for future in [executor.submit(warm) for _ in range(count)]]
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(lambda _: warm(), range(count)))
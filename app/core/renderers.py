@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from django.conf import settings
+
+from rest_framework import renderers, parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils import encoders
+
+from core.instrumentation import timer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_fallback_encoder = encoders.JSONEncoder()
+
+
+def _default(obj):
+    """Encode types orjson doesn't know the way DRF's encoder does"""
+    if type(obj) is Decimal:
+        # Prices are the most common case, skip the encoder's type checks
+        return float(obj)
+
+    return _fallback_encoder.default(obj)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSON renderer using orjson when it is installed
+
+    Falls back to DRF's json based renderer without orjson and for
+    indented output, e.g. in the browsable API.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render data into compact UTF-8 JSON"""
+        with timer('render'):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        """Render data with orjson unless the output must be formatted"""
+        if data is None:
+            return bytes()
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+
+        ret = orjson.dumps(data, default=_default,
+                           option=orjson.OPT_NON_STR_KEYS)
+
+        # Match DRF and keep the output a strict javascript subset
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028') \
+                  .replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONParser(parsers.JSONParser):
+    """JSON parser using orjson when it is installed"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse a UTF-8 request body into Python data"""
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
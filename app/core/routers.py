@@ -0,0 +1,90 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.utils import OperationalError
+
+
+_state = threading.local()
+_down_until = {}
+_down_lock = threading.Lock()
+
+
+def use_replica(alias):
+    """Send this thread's reads to a replica, or to the primary with None"""
+    _state.replica = alias
+
+
+def current_replica():
+    """Return the replica this thread reads from, if any"""
+    return getattr(_state, 'replica', None)
+
+
+def mark_down(alias):
+    """Stop reading from a replica for DB_REPLICA_RETRY_SECONDS"""
+    retry_at = time.monotonic() + settings.DB_REPLICA_RETRY_SECONDS
+    with _down_lock:
+        _down_until[alias] = retry_at
+
+
+def is_down(alias):
+    """Return whether a replica recently failed to connect"""
+    with _down_lock:
+        return _down_until.get(alias, 0) > time.monotonic()
+
+
+def _connect(alias):
+    """Open the replica connection if needed, returning whether it works"""
+    connection = connections[alias]
+    if connection.connection is not None:
+        return True
+    try:
+        connection.ensure_connection()
+        return True
+    except OperationalError:
+        connection.close()
+        mark_down(alias)
+        return False
+
+
+def pick_replica():
+    """Return a replica that accepts connections, or None for the primary
+
+    Connection failures take the replica out of rotation for a while, so
+    its outage costs one connection attempt per process and retry window.
+    """
+    replicas = [
+        alias for alias in settings.DATABASE_REPLICAS if not is_down(alias)
+    ]
+    random.shuffle(replicas)
+    for alias in replicas:
+        if _connect(alias):
+            return alias
+
+    return None
+
+
+class ReplicaRouter:
+    """Route reads to the replica picked for the current request"""
+
+    def db_for_read(self, model, **hints):
+        """Read from the request's replica outside primary transactions"""
+        replica = current_replica()
+        if replica is None or connections['default'].in_atomic_block:
+            return 'default'
+
+        return replica
+
+    def db_for_write(self, model, **hints):
+        """Always write to the primary"""
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Allow relations across replicas, they hold the same data"""
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Only migrate the primary, replicas follow it"""
+        return db not in settings.DATABASE_REPLICAS
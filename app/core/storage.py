@@ -0,0 +1,90 @@
+import hashlib
+import os
+import tempfile
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models.fields.files import ImageField, ImageFieldFile
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File storage that keeps one copy of each file under its digest
+
+    Files are hashed while they are written, so identical uploads share
+    the same name. References are counted by core.models.ImageBlob.
+    """
+
+    def _save(self, name, content):
+        """Write content to a temp file, then move it to its digest name
+
+        The file's blob row stays locked until the caller's transaction
+        ends, so save inside the transaction that counts the reference.
+        """
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        full_directory = self.path(directory)
+        os.makedirs(full_directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=full_directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            hexdigest = digest.hexdigest()
+            name = os.path.join(
+                directory, hexdigest[:2], hexdigest + extension
+            )
+            full_path = self.path(name)
+            with transaction.atomic():
+                # Blocks while the last reference's file is being deleted
+                apps.get_model('core', 'ImageBlob').objects.lock(name)
+                if os.path.exists(full_path):
+                    os.remove(temp_path)
+                else:
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    os.replace(temp_path, full_path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(full_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return name.replace('\\', '/')
+
+    def get_available_name(self, name, max_length=None):
+        """Return the name unchanged, identical content shares a file"""
+        return name
+
+
+class ContentAddressedFieldFile(ImageFieldFile):
+    """Image whose file may be shared with other rows"""
+
+    def delete(self, save=True):
+        """Clear the image, its file goes once no row references it
+
+        The reference is released when the instance is saved, see
+        core.models.ImageBlobManager.release.
+        """
+        if not self:
+            return
+        if hasattr(self, '_file'):
+            self.close()
+            del self.file
+        self.name = None
+        setattr(self.instance, self.field.name, self.name)
+        self._committed = False
+
+        if save:
+            self.instance.save()
+
+
+class ContentAddressedImageField(ImageField):
+    """Image field for ContentAddressedStorage"""
+    attr_class = ContentAddressedFieldFile
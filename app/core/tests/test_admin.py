@@ -2,6 +2,8 @@ from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
+from core import models
+
 
 class AdminSiteTests(TestCase):
 
@@ -40,3 +42,17 @@ class AdminSiteTests(TestCase):
         res = self.client.get(url)
 
         self.assertEqual(res.status_code, 200)
+
+    def test_recipe_change_page_edits_tags(self):
+        """Test the recipe edit page has tag and ingredient inlines"""
+        recipe = models.Recipe.objects.create(
+            user=self.user, title='Toast', time_minutes=5, price=1
+        )
+        tag = models.Tag.objects.create(user=self.user, name='Quick')
+        recipe.tags.add(tag)
+        url = reverse('admin:core_recipe_change', args=[recipe.id])
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, 'recipetag_set-TOTAL_FORMS')
+        self.assertContains(res, 'recipeingredient_set-TOTAL_FORMS')
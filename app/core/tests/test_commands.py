@@ -1,23 +1,258 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
 from unittest.mock import patch
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections
 from django.db.utils import OperationalError
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, LiveServerTestCase, \
+    override_settings
+from django.contrib.auth import get_user_model
+
+from rest_framework.authtoken.models import Token
+
+from benchmark.scenarios import SCENARIOS
+from core import readiness
 
 
 class CommandTests(TestCase):
 
     def test_wait_for_db_ready(self):
         """Test waiting for db when db is available"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+        with patch('core.readiness.check_database') as check:
+            out = StringIO()
+            call_command('wait_for_db', stdout=out)
+
+            self.assertEqual(check.call_count, 1)
+            self.assertIn('Database available! (1 attempts', out.getvalue())
 
     @patch('time.sleep', return_value=True)
     def test_wait_for_db(self, ts):
         """Test waiting for db"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+        with patch('core.readiness.check_database') as check:
+            check.side_effect = [OperationalError] * 5 + [None]
+            call_command('wait_for_db', stdout=StringIO())
+
+            self.assertEqual(check.call_count, 6)
+            self.assertEqual(ts.call_count, 5)
+
+    def test_wait_for_db_runs_query(self):
+        """Test the readiness check queries the real database"""
+        call_command('wait_for_db', stdout=StringIO())
+
+    @patch('core.readiness.time')
+    def test_wait_for_db_times_out(self, mock_time):
+        """Test waiting gives up once the timeout has passed"""
+        mock_time.monotonic.side_effect = range(0, 1000, 10)
+        with patch('core.readiness.check_database') as check:
+            check.side_effect = OperationalError('refused')
+            with self.assertRaisesMessage(CommandError, 'refused'):
+                call_command('wait_for_db', timeout=30, stdout=StringIO())
+
+        delays = [call[0][0] for call in mock_time.sleep.call_args_list]
+        self.assertEqual(len(delays), 2)
+        self.assertTrue(all(0 <= delay <= 5 for delay in delays))
+
+    def test_backoff_grows_and_is_capped(self):
+        """Test retry delays grow exponentially up to the cap"""
+        with patch('core.readiness.random.uniform') as uniform:
+            uniform.side_effect = lambda low, high: high
+            delays = [readiness.backoff(n, 0.25, 5) for n in range(7)]
+
+        self.assertEqual(delays, [0.25, 0.5, 1, 2, 4, 5, 5])
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_checks_migrations(self, ts):
+        """Test waiting until pending migrations are applied"""
+        with patch('core.readiness.unapplied_migrations') as pending:
+            pending.side_effect = [['core.0099_next'], []]
+            out = StringIO()
+            call_command('wait_for_db', check_migrations=True, stdout=out)
+
+        self.assertIn('Migrations pending (1 unapplied', out.getvalue())
+        self.assertIn('Migrations applied', out.getvalue())
+
+    def test_no_unapplied_migrations(self):
+        """Test the test database has every migration applied"""
+        self.assertEqual(readiness.unapplied_migrations(), [])
+
+    def test_benchmark_assigned_only(self):
+        """Test assigned_only benchmark reports both variants"""
+        out = StringIO()
+        call_command('benchmark_assigned_only', users=2, recipes=5, tags=4,
+                     iterations=2, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('distinct: p50=', output)
+        self.assertIn('exists: p50=', output)
+        self.assertFalse(
+            get_user_model().objects.filter(
+                email__startswith='benchmark'
+            ).exists()
+        )
+
+    def test_benchmark_assigned_only_keeps_existing_users(self):
+        """Test the benchmark runs alongside users it didn't create"""
+        user = get_user_model().objects.create_user(
+            'benchmark0@email.com',
+            'testpass123'
+        )
+        for _ in range(2):
+            call_command('benchmark_assigned_only', users=2, recipes=2,
+                         tags=2, iterations=1, stdout=StringIO())
+
+        self.assertEqual(
+            list(get_user_model().objects.filter(
+                email__startswith='benchmark'
+            )),
+            [user]
+        )
+
+    def test_benchmark_hashers(self):
+        """Test hasher benchmark reports a rate for each hasher"""
+        out = StringIO()
+        call_command('benchmark_hashers', seconds=0.05, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('pbkdf2_sha256: ', output)
+        self.assertIn('logins/sec per core', output)
+
+    def test_benchmark_renderers(self):
+        """Test renderer benchmark reports both renderers"""
+        out = StringIO()
+        call_command('benchmark_renderers', recipes=10, iterations=2,
+                     stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('json: render p50=', output)
+        self.assertIn('fast: render p50=', output)
+
+
+class WarmConnectionsTests(TransactionTestCase):
+
+    def test_wait_for_db_warms_connections(self):
+        """Test warming opens a connection on each thread"""
+        out = StringIO()
+        call_command('wait_for_db', warm=3, stdout=out)
+
+        self.assertIn('Warmed 3 connections', out.getvalue())
+
+    def test_warm_connections_uses_executor_threads(self):
+        """Test warming on a pool opens one connection per pool thread"""
+        barrier = threading.Barrier(2)
+
+        def connected():
+            barrier.wait()
+            is_open = connection.connection is not None
+            connection.close()
+            return is_open
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            timings = readiness.warm_connections(2, executor=pool)
+            still_open = list(pool.map(lambda _: connected(), range(2)))
+
+        self.assertEqual(len(timings), 2)
+        self.assertEqual(still_open, [True, True])
+
+
+class ServerTestCase(LiveServerTestCase):
+    """Live server that closes its request threads' connections"""
+
+    @classmethod
+    def setUpClass(cls):
+        # Persistent connections outlive the request threads and stop the
+        # test database from being dropped
+        database = connections.databases['default']
+        cls.conn_max_age = database['CONN_MAX_AGE']
+        database['CONN_MAX_AGE'] = 0
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections.databases['default']['CONN_MAX_AGE'] = cls.conn_max_age
+
+
+class LoadTestCommandTests(ServerTestCase):
+
+    def test_loadtest_reports_throughput(self):
+        """Test load test reports requests/sec and percentiles"""
+        user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        token = Token.objects.create(user=user)
+        out = StringIO()
+        call_command('loadtest', f'{self.live_server_url}/api/recipe/tags/',
+                     token=token.key, concurrency=2, seconds=0.5, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('req/sec, 0 errors', output)
+        self.assertIn('latency p50=', output)
+
+    def test_loadtest_fails_without_successes(self):
+        """Test load test fails when every request is rejected"""
+        with self.assertRaises(CommandError):
+            call_command('loadtest',
+                         f'{self.live_server_url}/api/recipe/tags/',
+                         concurrency=1, seconds=0.2, stdout=StringIO())
+
+
+@override_settings(RECIPE_IMAGE_ASYNC=False)
+class RunBenchmarkCommandTests(ServerTestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        call_command('generate_benchmark_data', users=2, recipes=10,
+                     stdout=StringIO())
+
+    def _run(self, path, **options):
+        call_command('run_benchmark', self.live_server_url,
+                     concurrency=1, seconds=0.2, warmup=0, output=path,
+                     stdout=StringIO(), **options)
+        with open(path) as output:
+            return json.load(output)
+
+    def test_run_benchmark_reports_every_scenario(self):
+        """Test each scenario runs without errors and is written as JSON"""
+        with tempfile.TemporaryDirectory() as directory:
+            result = self._run(os.path.join(directory, 'run.json'))
+
+        self.assertEqual(result['meta']['users'], 2)
+        self.assertEqual(set(result['scenarios']), set(SCENARIOS))
+        for name, summary in result['scenarios'].items():
+            self.assertGreater(summary['requests'], 0, name)
+            self.assertEqual(summary['errors'], 0, name)
+
+    def test_run_benchmark_fails_on_regression(self):
+        """Test comparing with a much faster baseline fails"""
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, 'baseline.json')
+            result = self._run(baseline, scenarios='list')
+            result['scenarios']['list']['p95_ms'] = 0.001
+            with open(baseline, 'w') as output:
+                json.dump(result, output)
+
+            with self.assertRaisesMessage(CommandError, 'list: p95'):
+                self._run(os.path.join(directory, 'run.json'),
+                          scenarios='list', baseline=baseline)
+
+    def test_run_benchmark_needs_data(self):
+        """Test the benchmark needs generated users"""
+        call_command('generate_benchmark_data', users=1, recipes=0,
+                     clear=True, stdout=StringIO())
+        get_user_model().objects.all().delete()
+
+        with self.assertRaisesMessage(CommandError, 'generate_benchmark'):
+            call_command('run_benchmark', self.live_server_url,
+                         stdout=StringIO())
@@ -0,0 +1,223 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from core.models import Tag, Ingredient, Recipe
+
+
+class ImportRecipesTests(TestCase):
+    """Test the import_recipes command"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self, filename, content):
+        """Write an input file and return its path"""
+        path = os.path.join(self.directory, filename)
+        with open(path, 'w') as input_file:
+            input_file.write(content)
+
+        return path
+
+    def _ndjson(self, rows):
+        """Write rows to an NDJSON file and return its path"""
+        return self._write(
+            'recipes.ndjson',
+            ''.join(json.dumps(row) + '\n' for row in rows)
+        )
+
+    def _import(self, path, **options):
+        """Run the import for the test user and return its output"""
+        out = StringIO()
+        call_command('import_recipes', path, user='test@email.com',
+                     stdout=out, **options)
+
+        return out.getvalue()
+
+    def test_import_ndjson(self):
+        """Test importing recipes reuses existing names"""
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        path = self._ndjson([
+            {'title': 'Tacos', 'time_minutes': 10, 'price': '5.50',
+             'tags': ['Dinner', 'Mexican'], 'ingredients': ['Beef']},
+            {'title': 'Toast', 'time_minutes': 5, 'price': '1.00',
+             'tags': ['Dinner'], 'ingredients': []},
+        ])
+
+        output = self._import(path)
+
+        self.assertIn('Imported 2 recipes', output)
+        self.assertIn('rows/sec', output)
+        tacos = Recipe.objects.get(title='Tacos')
+        self.assertEqual(tacos.user, self.user)
+        self.assertEqual(
+            sorted(tacos.tags.values_list('name', flat=True)),
+            ['Dinner', 'Mexican']
+        )
+        self.assertEqual(Tag.objects.filter(name='Dinner').count(), 1)
+        self.assertIn(tag, Recipe.objects.get(title='Toast').tags.all())
+        self.assertTrue(Ingredient.objects.filter(name='Beef').exists())
+
+    def test_import_csv(self):
+        """Test importing the CSV export format"""
+        path = self._write(
+            'recipes.csv',
+            'id,title,time_minutes,price,link,tags,ingredients\n'
+            '7,Tacos,10,5.50,,Dinner|Mexican,Beef\n'
+        )
+
+        self._import(path)
+
+        tacos = Recipe.objects.get()
+        self.assertEqual(tacos.title, 'Tacos')
+        self.assertEqual(tacos.tags.count(), 2)
+        self.assertEqual(tacos.ingredients.get().name, 'Beef')
+
+    def test_import_csv_unescapes_formulas(self):
+        """Test cells escaped by the CSV export are imported unchanged"""
+        path = self._write(
+            'recipes.csv',
+            'id,title,time_minutes,price,link,tags,ingredients\n'
+            "7,'=Tacos,10,5.50,,'@Dinner|Mexican,Beef\n"
+        )
+
+        self._import(path)
+
+        tacos = Recipe.objects.get()
+        self.assertEqual(tacos.title, '=Tacos')
+        self.assertTrue(tacos.tags.filter(name='@Dinner').exists())
+
+    def test_resume_after_failure(self):
+        """Test a failed import resumes after the last committed batch"""
+        rows = [
+            {'title': f'Recipe {n}', 'time_minutes': 5, 'price': '1.00'}
+            for n in range(4)
+        ]
+        rows[3]['price'] = 'free'
+        path = self._ndjson(rows)
+        checkpoint = os.path.join(self.directory, 'checkpoint')
+
+        with self.assertRaisesMessage(CommandError, 'Row 4 is invalid'):
+            self._import(path, batch_size=2, checkpoint=checkpoint)
+        self.assertEqual(Recipe.objects.count(), 2)
+
+        rows[3]['price'] = '1.00'
+        self._ndjson(rows)
+        output = self._import(path, batch_size=2, checkpoint=checkpoint)
+
+        self.assertIn('Resuming after row 2', output)
+        self.assertEqual(
+            sorted(Recipe.objects.values_list('title', flat=True)),
+            [f'Recipe {n}' for n in range(4)]
+        )
+
+    def test_resume_after_failure_following_commit(self):
+        """Test a batch committed just before a failure isn't imported twice"""
+        rows = [
+            {'title': f'Recipe {n}', 'time_minutes': 5, 'price': '1.00'}
+            for n in range(4)
+        ]
+        path = self._ndjson(rows)
+        checkpoint = os.path.join(self.directory, 'checkpoint')
+
+        with patch('core.management.commands.import_recipes.bump_version',
+                   side_effect=[None, RuntimeError]):
+            with self.assertRaises(RuntimeError):
+                self._import(path, batch_size=2, checkpoint=checkpoint)
+        self.assertEqual(Recipe.objects.count(), 4)
+
+        output = self._import(path, batch_size=2, checkpoint=checkpoint)
+
+        self.assertIn('Resuming after row 4', output)
+        self.assertEqual(Recipe.objects.count(), 4)
+
+    def test_invalid_names_rejected(self):
+        """Test tags and ingredients must be lists of names"""
+        for names in (['Dinner', 5], 'Dinner', [{'name': 'Dinner'}]):
+            path = self._ndjson([
+                {'title': 'Tacos', 'time_minutes': 10, 'price': '5.50'},
+                {'title': 'Toast', 'time_minutes': 5, 'price': '1.00',
+                 'tags': names},
+            ])
+
+            with self.assertRaisesMessage(
+                CommandError,
+                'Row 2 is invalid (line 2): tags'
+            ):
+                self._import(path)
+
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_field_limits_checked(self):
+        """Test values the columns can't hold fail with their line"""
+        invalid = (
+            ('title', 'x' * 256),
+            ('title', ''),
+            ('price', '1000.00'),
+            ('price', '1.005'),
+            ('time_minutes', 'soon'),
+        )
+        for field, value in invalid:
+            row = {'title': 'Tacos', 'time_minutes': 10, 'price': '5.50'}
+            row[field] = value
+            path = self._write(
+                'recipes.ndjson',
+                '\n' + json.dumps(row) + '\n'
+            )
+
+            with self.assertRaisesMessage(
+                CommandError,
+                f'Row 1 is invalid (line 2): {field}'
+            ):
+                self._import(path)
+
+        self.assertFalse(Recipe.objects.exists())
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL')
+    def test_integer_range_checked(self):
+        """Test times beyond the integer column fail before inserting"""
+        path = self._ndjson([
+            {'title': 'Tacos', 'time_minutes': 2 ** 31, 'price': '5.50'},
+        ])
+
+        with self.assertRaisesMessage(
+            CommandError,
+            'Row 1 is invalid (line 1): time_minutes'
+        ):
+            self._import(path)
+
+    def test_unknown_user(self):
+        """Test importing for a missing user fails"""
+        path = self._ndjson([])
+
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', path, user='nobody@email.com',
+                         stdout=StringIO())
+
+    def test_special_characters_kept(self):
+        """Test tabs, newlines and backslashes survive the import"""
+        title = 'Tab\there\nnew line \\N back\\slash'
+        path = self._ndjson([
+            {'title': title, 'time_minutes': 5, 'price': '1.00'},
+        ])
+
+        self._import(path)
+
+        self.assertEqual(Recipe.objects.get().title, title)
@@ -0,0 +1,108 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+
+from core.models import Tag, Ingredient, Recipe
+
+
+class IndexPlanTests(TestCase):
+    """Test the query planner uses the listing and filtering indexes"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        if connection.vendor == 'postgresql':
+            # Tiny test tables would otherwise always be sequentially scanned
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                # Rows rolled back by earlier tests still take up pages,
+                # which the planner counts when estimating table sizes
+                cursor.execute(
+                    'TRUNCATE core_tag, core_ingredient, core_recipe CASCADE'
+                )
+
+    def _user_name_index(self, model):
+        """Return the name the (user, name) unique index has in plans"""
+        if connection.vendor == 'sqlite':
+            return f'sqlite_autoindex_{model._meta.db_table}'
+
+        return f'{model._meta.db_table}_user_name_uniq'
+
+    def _assert_sorted_by_index(self, model):
+        """Assert a page of a model reads names in order from its index"""
+        if connection.vendor == 'postgresql':
+            users = get_user_model().objects.bulk_create(
+                get_user_model()(email=f'user{n}@email.com')
+                for n in range(20)
+            )
+            model.objects.bulk_create(
+                model(user=user, name=f'{model.__name__} {n}')
+                for n in range(200) for user in [self.user, *users]
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+        plan = model.objects.filter(user=self.user).order_by('-name') \
+            .values('id', 'name')[:settings.RECIPE_PAGE_SIZE + 1].explain()
+
+        self.assertIn(self._user_name_index(model), plan)
+        self.assertNotIn('Sort', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_tag_listing_uses_user_name_index(self):
+        """Test listing tags scans the (user, name) index without sorting"""
+        self._assert_sorted_by_index(Tag)
+
+    def test_ingredient_listing_uses_user_name_index(self):
+        """Test listing ingredients scans the (user, name) index in order"""
+        self._assert_sorted_by_index(Ingredient)
+
+    def test_filter_by_tags_uses_reverse_index(self):
+        """Test filtering recipes by tag uses the (tag, recipe) index"""
+        plan = Recipe.objects.filter(tags__id__in=[1, 2]).explain()
+
+        self.assertIn('core_recipe_tags_reverse_idx', plan)
+
+    def test_filter_by_ingredients_uses_reverse_index(self):
+        """Test filtering by ingredient uses the (ingredient, recipe) index"""
+        plan = Recipe.objects.filter(ingredients__id__in=[1, 2]).explain()
+
+        self.assertIn('core_recipe_ingr_reverse_idx', plan)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL')
+    def test_search_uses_gin_index(self):
+        """Test full-text search scans the search vector GIN index"""
+        plan = Recipe.objects.filter(
+            search_vector=SearchQuery('chicken', config='english')
+        ).explain()
+
+        self.assertIn('core_recipe_search_gin', plan)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL')
+    def test_suggest_uses_trigram_index(self):
+        """Test name autocomplete matches owner and name in one index"""
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f'user{n}@email.com') for n in range(20)
+        )
+        # Interleaved owners, so scanning one owner's rows isn't cheap
+        Ingredient.objects.bulk_create(
+            Ingredient(user=user, name=f'{user.email} ingredient {n}')
+            for n in range(1000) for user in users
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_ingredient')
+        plan = Ingredient.objects.filter(user=users[0]).filter(
+            Q(name__iregex='^tom') | Q(name__trigram_similar='tom')
+        ).explain()
+
+        self.assertIn('core_ingredient_user_name_trgm', plan)
+        self.assertIn(
+            f"Index Cond: ((user_id = {users[0].id}) AND ((name)::text %",
+            plan
+        )
@@ -0,0 +1,140 @@
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import instrumentation
+from core.models import Recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+@override_settings(REQUEST_METRICS_SAMPLE_RATE=0,
+                   REQUEST_METRICS_SLOW_MS=60000)
+class RequestMetricsMiddlewareTests(TestCase):
+    """Test requests report their queries and timings"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        Recipe.objects.create(
+            user=self.user,
+            title='Toast',
+            time_minutes=5,
+            price=1.00
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _timings(self, res):
+        """Return the Server-Timing entries by name"""
+        entries = {}
+        for entry in res['Server-Timing'].split(', '):
+            name, *params = entry.split(';')
+            entries[name] = params
+
+        return entries
+
+    def test_server_timing_header(self):
+        """Test the response reports db, serializer and render time"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL)
+
+        timings = self._timings(res)
+        self.assertIn(f'desc="{len(queries)} queries"', timings['db'])
+        self.assertIn('serializer', timings)
+        self.assertIn('render', timings)
+        self.assertIn('total', timings)
+
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=False)
+    def test_server_timing_header_disabled(self):
+        """Test the header can be turned off"""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertFalse(res.has_header('Server-Timing'))
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=1)
+    def test_sampled_request_logged(self):
+        """Test a sampled request is logged as one JSON line"""
+        with self.assertLogs('app.requests', 'INFO') as logs:
+            res = self.client.get(RECIPES_URL)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertEqual(record['view'], 'recipe:recipe-list')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['response_bytes'], len(res.content))
+        self.assertGreater(record['db_queries'], 0)
+        self.assertIn('serializer_ms', record)
+        self.assertNotIn('slow_sql', record)
+
+    @override_settings(REQUEST_METRICS_SLOW_MS=0)
+    def test_slow_request_logs_sql(self):
+        """Test slow requests are logged with their slowest queries"""
+        with self.assertLogs('app.requests', 'WARNING') as logs:
+            self.client.get(RECIPES_URL)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertTrue(record['slow_sql'])
+        duration, sql = record['slow_sql'][0]
+        self.assertIn('SELECT', sql)
+
+    @override_settings(REQUEST_METRICS_SLOW_MS=0,
+                       REQUEST_METRICS_SLOW_QUERIES=2)
+    def test_slow_request_logs_limited_sql(self):
+        """Test slow requests log at most the configured statements"""
+        with self.assertLogs('app.requests', 'WARNING') as logs:
+            self.client.get(RECIPES_URL)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertGreater(record['db_queries'], 2)
+        self.assertEqual(len(record['slow_sql']), 2)
+
+    def test_unsampled_request_not_logged(self):
+        """Test fast requests outside the sample aren't logged"""
+        with patch('core.middleware.logger') as logger:
+            self.client.get(RECIPES_URL)
+
+        logger.info.assert_not_called()
+        logger.warning.assert_not_called()
+
+    def test_timer_outside_request(self):
+        """Test timing code outside a request records nothing"""
+        with instrumentation.timer('serializer'):
+            pass
+
+        self.assertIsNone(instrumentation.current())
+
+
+class RequestMetricsTests(SimpleTestCase):
+    """Test the per request query records"""
+
+    def test_sql_bounded(self):
+        """Test only the slowest statements are kept however many run"""
+        durations = [5, 1, 9, 3, 7, 2, 8] * 100
+        clock = [0]
+        for duration in durations:
+            clock += [0, duration / 1000]
+        with patch('core.instrumentation.time.perf_counter',
+                   side_effect=clock):
+            request_metrics = instrumentation.RequestMetrics(keep_sql=3)
+            for number, _duration in enumerate(durations):
+                request_metrics.execute_wrapper(
+                    lambda *args: None, f'SELECT {number}', (), False, {}
+                )
+
+        self.assertEqual(request_metrics.queries, len(durations))
+        self.assertEqual(len(request_metrics.sql), 3)
+        self.assertEqual(
+            [ms for ms, _sql in request_metrics.slowest_sql(10)],
+            [9.0, 9.0, 9.0]
+        )
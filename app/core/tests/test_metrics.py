@@ -0,0 +1,173 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+
+METRICS_URL = reverse('metrics')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def sample(name, **labels):
+    """Return the current value of a metric sample, or 0"""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsEndpointTests(TestCase):
+    """Test the Prometheus metrics endpoint"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_metrics_exposed(self):
+        """Test request latency is exposed per route and status"""
+        self.client.get(RECIPES_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertIn(
+            b'app_request_duration_seconds_bucket{le="0.005",'
+            b'method="GET",status="200",view="recipe:recipe-list"}',
+            res.content
+        )
+        self.assertIn(b'app_worker_processes', res.content)
+
+    def test_metrics_hidden_from_other_addresses(self):
+        """Test clients outside METRICS_ALLOWED_IPS get a 404"""
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.7')
+
+        self.assertEqual(res.status_code, 404)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.0/8'])
+    def test_metrics_allowed_from_network(self):
+        """Test clients inside an allowed network can scrape"""
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='10.1.2.3')
+
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_bearer_token(self):
+        """Test scrapers elsewhere need the metrics token"""
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.7',
+                              HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(res.status_code, 404)
+
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.7',
+                              HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(res.status_code, 200)
+
+    def test_request_histograms_observed(self):
+        """Test each request adds to the latency and query histograms"""
+        latency = sample('app_request_duration_seconds_count',
+                         view='recipe:recipe-list', method='GET',
+                         status='200')
+        queries = sample('app_request_db_queries_count',
+                         view='recipe:recipe-list')
+
+        self.client.get(RECIPES_URL)
+
+        self.assertEqual(
+            sample('app_request_duration_seconds_count',
+                   view='recipe:recipe-list', method='GET', status='200'),
+            latency + 1
+        )
+        self.assertEqual(
+            sample('app_request_db_queries_count', view='recipe:recipe-list'),
+            queries + 1
+        )
+
+    def test_cache_lookups_counted(self):
+        """Test response cache hits and misses are counted"""
+        hits = sample('app_cache_requests_total',
+                      cache='recipe_response', result='hit')
+        misses = sample('app_cache_requests_total',
+                        cache='recipe_response', result='miss')
+
+        self.client.get(RECIPES_URL, {'page_size': 7})
+        self.client.get(RECIPES_URL, {'page_size': 7})
+
+        self.assertEqual(sample('app_cache_requests_total',
+                                cache='recipe_response', result='hit'),
+                         hits + 1)
+        self.assertEqual(sample('app_cache_requests_total',
+                                cache='recipe_response', result='miss'),
+                         misses + 1)
+
+    @override_settings(RECIPE_IMAGE_ASYNC=False)
+    def test_image_upload_observed(self):
+        """Test image upload size and duration are recorded"""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Toast',
+            time_minutes=5,
+            price=1.00
+        )
+        uploads = sample('recipe_image_upload_duration_seconds_count')
+        size = sample('recipe_image_upload_bytes_sum')
+        variants = sample('recipe_image_variants_duration_seconds_count')
+
+        url = reverse('recipe:recipe-upload-image', args=[recipe.id])
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (10, 10)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            res = self.client.post(url, {'image': ntf}, format='multipart')
+            uploaded = os.path.getsize(ntf.name)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            sample('recipe_image_upload_duration_seconds_count'), uploads + 1
+        )
+        self.assertEqual(sample('recipe_image_upload_bytes_sum'),
+                         size + uploaded)
+        self.assertEqual(
+            sample('recipe_image_variants_duration_seconds_count'),
+            variants + 1
+        )
+
+    def test_metrics_merged_across_processes(self):
+        """Test metrics written by several processes are added up"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory)
+        for _ in range(2):
+            subprocess.run(
+                [sys.executable, '-c',
+                 'from core import metrics; '
+                 'metrics.cache_lookup("recipe_response", True)'],
+                cwd=settings.BASE_DIR, env=env, check=True
+            )
+
+        with patch.dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory):
+            res = self.client.get(METRICS_URL)
+
+        self.assertIn(
+            b'app_cache_requests_total{cache="recipe_response",'
+            b'result="hit"} 2.0',
+            res.content
+        )
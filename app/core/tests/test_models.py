@@ -1,5 +1,6 @@
-from unittest.mock import patch
+from io import StringIO
 
+from django.core.management import call_command
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -75,12 +76,15 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(recipe), recipe.title)
 
-    @patch('uuid.uuid4')
-    def test_recipe_file_name_uuid(self, mock_uuid):
-        """Test that image is saved in the correct location"""
-        uuid = 'test-uuid'
-        mock_uuid.return_value = uuid
+    def test_recipe_file_path(self):
+        """Test images go in the recipe upload directory"""
         file_path = models.recipe_img_file_path(None, 'myimage.jpg')
 
-        expected_path = f'uploads/recipe/{uuid}.jpg'
-        self.assertEqual(file_path, expected_path)
+        self.assertEqual(file_path, 'uploads/recipe/myimage.jpg')
+
+    def test_migrations_match_models(self):
+        """Test every index and constraint is recorded in migrations"""
+        out = StringIO()
+        call_command('makemigrations', check=True, dry_run=True, stdout=out)
+
+        self.assertIn('No changes detected', out.getvalue())
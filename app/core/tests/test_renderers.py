@@ -0,0 +1,72 @@
+import io
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils.translation import ugettext_lazy as _
+
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from core import renderers
+
+
+class FastJSONRendererTests(TestCase):
+    """Test the orjson renderer matches DRF's json renderer"""
+
+    def setUp(self):
+        self.data = {
+            'price': Decimal('5.50'),
+            'title': _('Soup'),
+            'url': 'http://localhost/media/a\u2028b.jpg',
+            'tags': [{'id': 1, 'name': 'Dinner'}],
+        }
+
+    def test_render_matches_json(self):
+        """Test rendering gives the same document as DRF"""
+        fast = renderers.FastJSONRenderer().render(self.data)
+
+        self.assertEqual(
+            json.loads(fast),
+            json.loads(JSONRenderer().render(self.data))
+        )
+        self.assertIn(b'\\u2028', fast)
+
+    def test_render_uses_orjson(self):
+        """Test the fast path is active with the pinned requirements"""
+        self.assertIsNotNone(renderers.orjson)
+
+        with patch.object(renderers.orjson, 'dumps',
+                          wraps=renderers.orjson.dumps) as dumps:
+            renderers.FastJSONRenderer().render(self.data)
+
+        dumps.assert_called_once()
+
+    def test_render_without_orjson(self):
+        """Test rendering falls back to json without orjson"""
+        with patch.object(renderers, 'orjson', None):
+            fast = renderers.FastJSONRenderer().render(self.data)
+
+        self.assertEqual(fast, JSONRenderer().render(self.data))
+
+    def test_render_indented(self):
+        """Test indented rendering is left to DRF"""
+        fast = renderers.FastJSONRenderer().render(
+            self.data, 'application/json; indent=4'
+        )
+
+        self.assertIn(b'\n    ', fast)
+
+    def test_parse(self):
+        """Test request bodies are parsed"""
+        data = renderers.FastJSONParser().parse(
+            io.BytesIO(b'{"title": "Soup", "tags": [1, 2]}')
+        )
+
+        self.assertEqual(data, {'title': 'Soup', 'tags': [1, 2]})
+
+    def test_parse_invalid(self):
+        """Test invalid JSON raises a parse error"""
+        with self.assertRaises(ParseError):
+            renderers.FastJSONParser().parse(io.BytesIO(b'{"title": '))
@@ -0,0 +1,162 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import routers
+from core.models import Recipe
+from user import authentication
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """Test safe requests read from a replica, a SQLite file in tests"""
+
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        connections.databases['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.directory, 'replica.sqlite3'),
+        }
+        call_command('migrate', database='replica', verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        # Routing is on for the test only, so the replica can be flushed
+        replicas = override_settings(DATABASE_REPLICAS=['replica'])
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+        cache.clear()
+        authentication._local_tokens.clear()
+        routers._down_until.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        # Stand in for replication
+        self.user.save(using='replica')
+        self.token.save(using='replica')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def _titles(self):
+        """Return the recipe titles the list endpoint returns"""
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def _replica_recipe(self, title):
+        """Create a recipe that only the replica has"""
+        Recipe.objects.using('replica').create(
+            user_id=self.user.pk,
+            title=title,
+            time_minutes=5,
+            price=1.00
+        )
+
+    def test_safe_request_reads_replica(self):
+        """Test listing recipes reads from the replica"""
+        self._replica_recipe('Replica only')
+
+        self.assertEqual(self._titles(), ['Replica only'])
+
+    def test_replica_reads_not_cached(self):
+        """Test lists read from a replica are neither cached nor ETagged"""
+        self._replica_recipe('Replica only')
+
+        res = self.client.get(RECIPES_URL)
+        self.assertNotIn('ETag', res)
+
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res['X-Cache'], 'MISS')
+
+    def test_reads_primary_after_write(self):
+        """Test a client reads its own writes from the primary"""
+        self._replica_recipe('Replica only')
+        res = self.client.post(RECIPES_URL, {
+            'title': 'Just written',
+            'time_minutes': 5,
+            'price': 1.00
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self._titles(), ['Just written'])
+
+    def test_other_clients_not_pinned(self):
+        """Test one client's write doesn't move others to the primary"""
+        self.client.post(RECIPES_URL, {
+            'title': 'Just written',
+            'time_minutes': 5,
+            'price': 1.00
+        })
+        # Log in again, as a new client with a new token
+        self.token.delete()
+        Token.objects.using('replica').all().delete()
+        self.token = Token.objects.create(user=self.user)
+        self.token.save(using='replica')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self._replica_recipe('Replica only')
+
+        self.assertEqual(self._titles(), ['Replica only'])
+
+    def test_unreachable_replica_fails_over(self):
+        """Test reads use the primary while the replica is down"""
+        self._replica_recipe('Replica only')
+        Recipe.objects.create(
+            user=self.user,
+            title='Primary',
+            time_minutes=5,
+            price=1.00
+        )
+        connections['replica'].close()
+        original = dict(connections.databases['replica'])
+        connections.databases['replica']['NAME'] = os.path.join(
+            self.directory, 'missing', 'replica.sqlite3'
+        )
+        try:
+            self.assertEqual(self._titles(), ['Primary'])
+            self.assertTrue(routers.is_down('replica'))
+        finally:
+            connections['replica'].close()
+            connections.databases['replica'].update(original)
+
+    def test_writes_and_transactions_use_primary(self):
+        """Test the router sends writes and atomic reads to the primary"""
+        router = routers.ReplicaRouter()
+        routers.use_replica('replica')
+        try:
+            self.assertEqual(router.db_for_read(Recipe), 'replica')
+            self.assertEqual(router.db_for_write(Recipe), 'default')
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Recipe), 'default')
+        finally:
+            routers.use_replica(None)
+
+        self.assertEqual(router.db_for_read(Recipe), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'core'))
+        self.assertTrue(router.allow_migrate('default', 'core'))
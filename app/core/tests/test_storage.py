@@ -0,0 +1,223 @@
+import os
+import shutil
+import tempfile
+import threading
+from unittest import skipUnless
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.models import Recipe, ImageBlob
+from core.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Test files are stored once under their digest"""
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def tearDown(self):
+        shutil.rmtree(self.location)
+
+    def test_identical_content_stored_once(self):
+        """Test saving the same bytes twice returns the same name"""
+        name1 = self.storage.save('uploads/recipe/a.jpg', ContentFile(b'x'))
+        name2 = self.storage.save('uploads/recipe/b.JPG', ContentFile(b'x'))
+
+        self.assertEqual(name1, name2)
+        self.assertTrue(name1.startswith('uploads/recipe/'))
+        self.assertTrue(name1.endswith('.jpg'))
+        self.assertTrue(self.storage.exists(name1))
+
+    def test_different_content_stored_separately(self):
+        """Test different bytes get different names"""
+        name1 = self.storage.save('uploads/recipe/a.jpg', ContentFile(b'x'))
+        name2 = self.storage.save('uploads/recipe/a.jpg', ContentFile(b'y'))
+
+        self.assertNotEqual(name1, name2)
+
+    def test_no_temp_files_left(self):
+        """Test the temporary upload file is moved or removed"""
+        self.storage.save('uploads/recipe/a.jpg', ContentFile(b'x'))
+        self.storage.save('uploads/recipe/b.jpg', ContentFile(b'x'))
+
+        leftovers = [
+            filename
+            for _root, _dirs, files in os.walk(self.location)
+            for filename in files if filename.startswith('.upload-')
+        ]
+        self.assertEqual(leftovers, [])
+
+
+class ImageReferenceCountTests(TransactionTestCase):
+    """Test shared image files are deleted with their last reference"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings.enable()
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.media_root)
+
+    def _recipe_with_image(self, content):
+        """Create a recipe and attach an image with the given bytes"""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Toast',
+            time_minutes=5,
+            price=1.00
+        )
+        recipe.image.save('photo.jpg', ContentFile(content))
+
+        return recipe
+
+    def test_shared_image_counted(self):
+        """Test recipes with identical images share one counted file"""
+        recipe1 = self._recipe_with_image(b'same')
+        recipe2 = self._recipe_with_image(b'same')
+
+        self.assertEqual(recipe1.image.name, recipe2.image.name)
+        blob = ImageBlob.objects.get(name=recipe1.image.name)
+        self.assertEqual(blob.refcount, 2)
+
+    def test_file_kept_until_last_reference_deleted(self):
+        """Test deleting recipes only removes the file when unused"""
+        recipe1 = self._recipe_with_image(b'same')
+        recipe2 = self._recipe_with_image(b'same')
+        path = recipe1.image.path
+
+        recipe1.delete()
+        self.assertTrue(os.path.exists(path))
+
+        recipe2.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(ImageBlob.objects.exists())
+
+    def test_replaced_image_deleted(self):
+        """Test replacing a recipe's image deletes the old file"""
+        recipe = self._recipe_with_image(b'old')
+        old_path = recipe.image.path
+
+        recipe.image.save('photo.jpg', ContentFile(b'new'))
+
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(recipe.image.path))
+
+    def test_clearing_shared_image_keeps_file(self):
+        """Test deleting a field's file only removes it when unused"""
+        recipe1 = self._recipe_with_image(b'same')
+        recipe2 = self._recipe_with_image(b'same')
+        path = recipe1.image.path
+
+        recipe1.image.delete()
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(ImageBlob.objects.get().refcount, 1)
+
+        recipe2.image.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(ImageBlob.objects.exists())
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires row locks')
+    def test_upload_reusing_file_being_deleted(self):
+        """Test deleting the last reference waits for an upload reusing it"""
+        recipe1 = self._recipe_with_image(b'same')
+        recipe2 = Recipe.objects.create(
+            user=self.user,
+            title='Toast',
+            time_minutes=5,
+            price=1.00
+        )
+        path = recipe1.image.path
+
+        def delete_recipe():
+            Recipe.objects.get(id=recipe1.id).delete()
+            connection.close()
+
+        deleter = threading.Thread(target=delete_recipe)
+        with transaction.atomic():
+            # The file exists, so the upload reuses it
+            recipe2.image.save('photo.jpg', ContentFile(b'same'), save=False)
+            deleter.start()
+            deleter.join(0.5)
+            self.assertTrue(deleter.is_alive())
+            recipe2.save()
+        deleter.join()
+
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(ImageBlob.objects.get(name=recipe2.image.name)
+                         .refcount, 1)
+
+    def test_cleanup_command_removes_orphans(self):
+        """Test the cleanup command deletes unreferenced files"""
+        recipe = self._recipe_with_image(b'kept')
+        orphan = os.path.join(self.media_root, 'uploads/recipe/old.jpg')
+        with open(orphan, 'wb') as orphan_file:
+            orphan_file.write(b'orphan')
+        variant = os.path.join(self.media_root,
+                               'uploads/recipe/variants/old.webp')
+        os.makedirs(os.path.dirname(variant))
+        with open(variant, 'wb') as variant_file:
+            variant_file.write(b'orphan')
+        ImageBlob.objects.all().delete()
+
+        call_command('cleanup_recipe_images', min_age=0, stdout=StringIO())
+
+        self.assertFalse(os.path.exists(orphan))
+        self.assertFalse(os.path.exists(variant))
+        self.assertTrue(os.path.exists(recipe.image.path))
+        self.assertEqual(
+            ImageBlob.objects.get(name=recipe.image.name).refcount,
+            1
+        )
+        self.assertEqual(ImageBlob.objects.count(), 1)
+
+    def test_cleanup_command_keeps_recent_files(self):
+        """Test files younger than --min-age may be uploads in progress"""
+        orphan = os.path.join(self.media_root, 'uploads/recipe/new.jpg')
+        os.makedirs(os.path.dirname(orphan))
+        with open(orphan, 'wb') as orphan_file:
+            orphan_file.write(b'orphan')
+
+        call_command('cleanup_recipe_images', stdout=StringIO())
+
+        self.assertTrue(os.path.exists(orphan))
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires row locks')
+    def test_cleanup_waits_for_upload(self):
+        """Test cleanup recounts a file after the upload storing it commits"""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Toast',
+            time_minutes=5,
+            price=1.00
+        )
+
+        def cleanup():
+            call_command('cleanup_recipe_images', min_age=0,
+                         stdout=StringIO())
+            connection.close()
+
+        cleaner = threading.Thread(target=cleanup)
+        with transaction.atomic():
+            recipe.image.save('photo.jpg', ContentFile(b'new'), save=False)
+            cleaner.start()
+            cleaner.join(0.5)
+            self.assertTrue(cleaner.is_alive())
+            recipe.save()
+        cleaner.join()
+
+        self.assertTrue(os.path.exists(recipe.image.path))
+        self.assertEqual(ImageBlob.objects.get(name=recipe.image.name)
+                         .refcount, 1)
@@ -1,3 +1,55 @@
-# from django.shortcuts import render
+import hmac
+import ipaddress
+import os
 
-# Create your views here.
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, \
+                              CollectorRegistry, generate_latest, \
+                              multiprocess
+
+
+def _may_scrape(request):
+    """Return whether a request may read the metrics
+
+    Scrapers either connect from METRICS_ALLOWED_IPS or send METRICS_TOKEN
+    as a bearer token.
+    """
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    if settings.METRICS_TOKEN and hmac.compare_digest(
+        authorization.encode(), f'Bearer {settings.METRICS_TOKEN}'.encode()
+    ):
+        return True
+
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in settings.METRICS_ALLOWED_IPS
+    )
+
+
+def metrics(request):
+    """Expose metrics in the Prometheus text format
+
+    With PROMETHEUS_MULTIPROC_DIR set every worker process writes its
+    metrics to that directory, and they are merged here so any worker can
+    answer a scrape. Other clients get a 404, see _may_scrape.
+    """
+    if not _may_scrape(request):
+        raise Http404
+
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return HttpResponse(
+        generate_latest(registry),
+        content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,120 @@
+"""
+Gunicorn configuration for the production entry point.
+
+Gunicorn loads this file from the working directory. Every setting can be
+overridden with an environment variable, see README.md.
+"""
+
+import math
+import os
+
+
+def _int(name, default):
+    """Return an integer environment variable"""
+    return int(os.environ.get(name) or default)
+
+
+def _cpu_quota():
+    """Return the container's cgroup CPU limit, or None without one"""
+    try:
+        # cgroup v2, e.g. "200000 100000" or "max 100000"
+        with open('/sys/fs/cgroup/cpu.max') as cpu_max:
+            quota, period = cpu_max.read().split()[:2]
+    except (OSError, ValueError):
+        # cgroup v1, a quota of -1 means no limit
+        directory = '/sys/fs/cgroup/cpu'
+        try:
+            with open(f'{directory}/cpu.cfs_quota_us') as quota_file, \
+                    open(f'{directory}/cpu.cfs_period_us') as period_file:
+                quota, period = quota_file.read(), period_file.read()
+        except OSError:
+            return None
+    if quota.strip() in ('max', '-1'):
+        return None
+
+    return max(1, math.ceil(int(quota) / int(period)))
+
+
+def _cpus():
+    """Return the CPUs this container may use, not the host's count"""
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    quota = _cpu_quota()
+
+    return min(cpus, quota) if quota else cpus
+
+
+# Cloud Run passes the port to listen on in PORT
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+
+# Processes for CPU bound work, threads to overlap database round trips.
+# Each thread keeps a database connection open (DB_CONN_MAX_AGE), so one
+# container holds workers x threads connections, 8 x 4 = 32 at most with
+# the defaults
+workers = _int(
+    'GUNICORN_WORKERS',
+    min(_cpus() * 2 + 1, _int('GUNICORN_MAX_WORKERS', 8))
+)
+threads = _int('GUNICORN_THREADS', 4)
+worker_class = 'gthread'
+
+timeout = _int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _int('GUNICORN_KEEPALIVE', 5)
+
+# Recycle workers now and then so slow leaks can't build up
+max_requests = _int('GUNICORN_MAX_REQUESTS', 5000)
+max_requests_jitter = _int('GUNICORN_MAX_REQUESTS_JITTER', 500)
+
+# Avoid heartbeat writes to overlay filesystems
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# Request threads opened with a database connection, see post_worker_init
+_warm_connections = min(_int('GUNICORN_WARM_CONNECTIONS', threads), threads)
+
+
+def post_worker_init(worker):
+    """Open the database connections of the worker's request threads
+
+    With CONN_MAX_AGE the connections stay open, so the first requests
+    after a deploy don't pay for connection setup.
+    """
+    from django.conf import settings
+    from django.db.utils import OperationalError
+    from core.readiness import warm_connections
+
+    pool = getattr(worker, 'tpool', None)
+    if (not _warm_connections or pool is None
+            or not settings.DATABASES['default'].get('CONN_MAX_AGE')):
+        return
+
+    try:
+        timings = warm_connections(_warm_connections, executor=pool)
+    except OperationalError as exc:
+        worker.log.warning('Warming database connections failed: %s', exc)
+    else:
+        worker.log.info('Warmed %d database connections in %.1fms',
+                        len(timings), sum(timings))
+
+
+def on_starting(server):
+    """Clear metrics left by a previous run of the app server"""
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith('.db'):
+                os.remove(os.path.join(directory, name))
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,197 @@
+import io
+
+from django.db import connection, transaction
+from django.utils.translation import ugettext_lazy as _
+
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from recipe.cache import bump_version
+
+
+def bulk_create(model, objs):
+    """Insert objects in one query and return them with primary keys set"""
+    if connection.features.can_return_ids_from_bulk_insert:
+        return model.objects.bulk_create(objs)
+
+    # Backends that can't return ids need one INSERT per object
+    for obj in objs:
+        obj.save(force_insert=True)
+
+    return objs
+
+
+def copy_insert(model, fields, rows):
+    """Insert rows of field values with PostgreSQL's COPY, returning ids
+
+    Much faster than bulk_create for large batches, as no model instances
+    are built and nothing is compiled per row. Ids are reserved from the
+    table's sequence up front. Other databases fall back to bulk_create.
+    """
+    if connection.vendor != 'postgresql':
+        objs = bulk_create(model, [
+            model(**dict(zip(fields, row))) for row in rows
+        ])
+        return [obj.pk for obj in objs]
+    if not rows:
+        return []
+
+    meta = model._meta
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+            'FROM generate_series(1, %s)',
+            [meta.db_table, meta.pk.column, len(rows)]
+        )
+        ids = [pk for pk, in cursor.fetchall()]
+
+        buffer = io.StringIO()
+        for pk, row in zip(ids, rows):
+            buffer.write('\t'.join(map(_copy_value, (pk, *row))) + '\n')
+        buffer.seek(0)
+        columns = ', '.join(
+            quote(meta.get_field(field).column)
+            for field in (meta.pk.name, *fields)
+        )
+        cursor.copy_expert(
+            f'COPY {quote(meta.db_table)} ({columns}) FROM STDIN',
+            buffer
+        )
+
+    return ids
+
+
+def _copy_value(value):
+    """Encode a value for COPY's text format"""
+    if value is None:
+        return '\\N'
+
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t') \
+                     .replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _int_ids(values):
+    """Return values as integer ids, using None for invalid ids"""
+    ids = []
+    for value in values:
+        try:
+            ids.append(int(value))
+        except (TypeError, ValueError):
+            ids.append(None)
+
+    return ids
+
+
+class BulkMixin:
+    """Create, update and delete lists of objects in one transaction"""
+
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False)
+    def bulk(self, request):
+        """Apply a create, update or delete to a list of objects"""
+        if not isinstance(request.data, list):
+            msg = _('Expected a list of items.')
+            return Response(
+                {'non_field_errors': [msg]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        handler = {
+            'POST': self._bulk_create,
+            'PATCH': self._bulk_update,
+            'DELETE': self._bulk_delete,
+        }[request.method]
+        with transaction.atomic():
+            response = handler(request)
+        bump_version(request.user.pk)
+
+        return response
+
+    def get_bulk_queryset(self, ids):
+        """Return the user's objects with the given ids for the response"""
+        return self.queryset.filter(user=self.request.user, id__in=ids)
+
+    def _bulk_response(self, ids, status_code):
+        """Serialize the given objects in the order their ids were sent"""
+        objs = {obj.id: obj for obj in self.get_bulk_queryset(ids)}
+        serializer = self.get_serializer(
+            [objs[obj_id] for obj_id in ids],
+            many=True
+        )
+
+        return Response(serializer.data, status=status_code)
+
+    def _bulk_create(self, request):
+        """Validate and insert every item or none of them"""
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        objs = serializer.save(user=request.user)
+
+        return self._bulk_response(
+            [obj.id for obj in objs],
+            status.HTTP_201_CREATED
+        )
+
+    def _bulk_update(self, request):
+        """Partially update every listed object or none of them"""
+        ids = _int_ids(
+            item.get('id') if isinstance(item, dict) else None
+            for item in request.data
+        )
+        objs = {
+            obj.id: obj for obj in self.queryset.filter(
+                user=request.user,
+                id__in=[obj_id for obj_id in ids if obj_id is not None]
+            )
+        }
+        errors = []
+        seen = set()
+        for obj_id in ids:
+            if obj_id not in objs:
+                errors.append({'id': [_('Object not found.')]})
+            elif obj_id in seen:
+                errors.append({'id': [_('Object listed more than once.')]})
+            else:
+                errors.append({})
+            seen.add(obj_id)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(
+            [objs[obj_id] for obj_id in ids],
+            data=request.data,
+            many=True,
+            partial=True
+        )
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer.save()
+
+        return self._bulk_response(ids, status.HTTP_200_OK)
+
+    def _bulk_delete(self, request):
+        """Delete every listed object or none of them"""
+        ids = _int_ids(request.data)
+        queryset = self.queryset.filter(user=request.user, id__in=ids)
+        found = set(queryset.values_list('id', flat=True))
+        missing = [
+            str(value) for value, obj_id in zip(request.data, ids)
+            if obj_id not in found
+        ]
+        if missing:
+            msg = _('Objects not found: {ids}').format(ids=', '.join(missing))
+            return Response(
+                {'non_field_errors': [msg]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset.delete()
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
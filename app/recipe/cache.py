@@ -0,0 +1,100 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from rest_framework.response import Response
+
+from core import metrics, routers
+
+
+VERSION_KEY = 'recipe:version:{user_id}'
+RESPONSE_KEY = 'recipe:response:{user_id}:{version}:{endpoint}:{params}'
+HITS_KEY = 'recipe:cache:hits'
+MISSES_KEY = 'recipe:cache:misses'
+
+
+def _incr(key):
+    """Increment a counter in the cache, creating it if needed"""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=None):
+            return 1
+        return cache.incr(key)
+
+
+def get_version(user_id):
+    """Return the current cache version for a user's recipe data"""
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so an evicted counter never reuses a version
+        cache.add(key, int(time.time() * 1000000), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def bump_version(user_id):
+    """Invalidate every cached response for a user"""
+    key = VERSION_KEY.format(user_id=user_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return get_version(user_id)
+
+
+def stats():
+    """Return the response cache hit and miss counters"""
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+
+    return {
+        'hits': counters.get(HITS_KEY, 0),
+        'misses': counters.get(MISSES_KEY, 0),
+    }
+
+
+def response_key(request, endpoint):
+    """Build the cache key for a request to an endpoint"""
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    digest = hashlib.md5(
+        f'{request.get_host()}?{params}'.encode()
+    ).hexdigest()
+
+    return RESPONSE_KEY.format(
+        user_id=request.user.pk,
+        version=get_version(request.user.pk),
+        endpoint=endpoint,
+        params=digest,
+    )
+
+
+class CachedListMixin:
+    """Serve list responses from the per-user versioned cache
+
+    Responses read from a replica aren't stored, the replica may not have
+    caught up with the version they would be stored under.
+    """
+
+    def list(self, request, *args, **kwargs):
+        """Return the cached list response or build and cache it"""
+        key = response_key(request, self.basename)
+        data = cache.get(key)
+        metrics.cache_lookup('recipe_response', data is not None)
+        if data is not None:
+            _incr(HITS_KEY)
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        _incr(MISSES_KEY)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200 and routers.current_replica() is None:
+            cache.set(key, response.data, settings.RECIPE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+
+        return response
@@ -0,0 +1,141 @@
+import hashlib
+
+from django.utils.http import parse_etags, quote_etag
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from core import routers
+from recipe.cache import get_version
+
+
+def _strip_weak(etag):
+    """Return an ETag without its weak validator prefix"""
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def object_etag(instance, names):
+    """Return an ETag for the named fields of an object
+
+    Deferred fields are loaded first, in one query. Many to many fields
+    contribute their sorted ids. The ETag is the same for every
+    representation of the object and only changes when the object itself
+    does.
+    """
+    model = type(instance)
+    fields = [model._meta.get_field(name) for name in names]
+    deferred = instance.get_deferred_fields()
+    missing = [
+        field.attname for field in fields
+        if field.concrete and field.attname in deferred
+    ]
+    if missing:
+        instance.refresh_from_db(fields=missing)
+
+    state = []
+    for field in fields:
+        if field.many_to_many:
+            related = getattr(instance, field.name).all()
+            state.append(sorted(obj.pk for obj in related))
+        else:
+            state.append(getattr(instance, field.attname))
+    digest = hashlib.md5(repr(state).encode()).hexdigest()[:16]
+
+    return quote_etag(f'{model._meta.model_name}-{instance.pk}-{digest}')
+
+
+class ConditionalMixin:
+    """Support ETag conditional requests
+
+    List ETags come from the per-user cache version, which changes whenever
+    any of the user's recipes, tags, ingredients or account details change,
+    so they can be checked before serializing. Objects are tagged with
+    object_etag of their etag_fields, which default to the serializer's
+    model fields, so If-Match only conflicts with changes to that object.
+    Responses read from a replica get no ETag, as the replica may lag
+    behind.
+    """
+
+    etag_fields = None
+
+    def get_object_etag(self, instance):
+        """Return the strong ETag for an object's current state"""
+        names = self.etag_fields
+        if names is None:
+            model_fields = {
+                field.name for field in type(instance)._meta.get_fields()
+                if field.concrete or field.many_to_many
+            }
+            names = [
+                name for name in self.serializer_class.Meta.fields
+                if name in model_fields
+            ]
+
+        return object_etag(instance, names)
+
+    def get_etag(self, request):
+        """Return the strong list ETag for the user's data version"""
+        user_id = request.user.pk
+        representation = hashlib.md5(
+            f'{request.get_full_path()}:{request.accepted_media_type}'.encode()
+        ).hexdigest()[:12]
+
+        return quote_etag(
+            f'{user_id}-{get_version(user_id)}-{representation}'
+        )
+
+    def list(self, request, *args, **kwargs):
+        """Return 304 when the client's list is current"""
+        etag = self.get_etag(request)
+        if self._not_modified(request, etag):
+            return self._not_modified_response(etag)
+
+        return self._tagged(super().list(request, *args, **kwargs), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return 304 when the client's object is current"""
+        instance = self.get_object()
+        etag = self.get_object_etag(instance)
+        if self._not_modified(request, etag):
+            return self._not_modified_response(etag)
+
+        serializer = self.get_serializer(instance)
+
+        return self._tagged(Response(serializer.data), etag)
+
+    def update(self, request, *args, **kwargs):
+        """Reject updates made against a stale If-Match ETag"""
+        if_match = request.META.get('HTTP_IF_MATCH')
+        if if_match:
+            etags = parse_etags(if_match)
+            if '*' not in etags and \
+                    self.get_object_etag(self.get_object()) not in etags:
+                return Response(status=status.HTTP_412_PRECONDITION_FAILED)
+
+        response = super().update(request, *args, **kwargs)
+        response['ETag'] = self.get_object_etag(self.get_object())
+
+        return response
+
+    def _not_modified(self, request, etag):
+        """Return whether If-None-Match lists the ETag"""
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if not if_none_match:
+            return False
+
+        return etag in [_strip_weak(tag) for tag in parse_etags(if_none_match)]
+
+    def _not_modified_response(self, etag):
+        """Return an empty 304 response"""
+        return Response(
+            status=status.HTTP_304_NOT_MODIFIED,
+            headers={'ETag': etag}
+        )
+
+    def _tagged(self, response, etag):
+        """Add the ETag to a successful response not read from a replica"""
+        if (response.status_code == status.HTTP_200_OK
+                and routers.current_replica() is None):
+            response['ETag'] = etag
+
+        return response
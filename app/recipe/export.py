@@ -0,0 +1,138 @@
+import csv
+import io
+from collections import defaultdict
+
+from django.conf import settings
+
+from rest_framework.renderers import BaseRenderer
+
+from core.models import Recipe
+from core.renderers import FastJSONRenderer
+
+
+FIELDS = ('id', 'title', 'time_minutes', 'price', 'link')
+RELATIONS = (('tags', 'tag'), ('ingredients', 'ingredient'))
+
+# Separates tag and ingredient names inside a CSV cell
+NAME_SEPARATOR = '|'
+
+# Spreadsheets run cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def escape_cell(value):
+    """Prefix text a spreadsheet would evaluate with a quote"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+
+    return value
+
+
+def unescape_cell(value):
+    """Undo escape_cell on a CSV cell"""
+    if value.startswith("'") and value[1:].startswith(FORMULA_PREFIXES):
+        return value[1:]
+
+    return value
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """Newline delimited JSON, exports stream their rows themselves"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render data, e.g. an error, as a single line"""
+        if data is None:
+            return bytes()
+
+        return super().render(data, None, renderer_context) + b'\n'
+
+
+class CSVRenderer(BaseRenderer):
+    """Comma separated values, exports stream their rows themselves"""
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render a mapping, e.g. an error, as key and value rows"""
+        if data is None:
+            return bytes()
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for key, value in data.items():
+            writer.writerow([escape_cell(key), escape_cell(str(value))])
+
+        return buffer.getvalue().encode('utf-8')
+
+
+def export_rows(user, chunk_size=None):
+    """Yield every recipe of a user as a dict with tag and ingredient names
+
+    Recipes are read through a server-side cursor and their names are
+    fetched per chunk, so memory use doesn't grow with the recipe book.
+    """
+    chunk_size = chunk_size or settings.RECIPE_EXPORT_CHUNK_SIZE
+    recipes = Recipe.objects.filter(user=user).order_by('id').values_list(
+        *FIELDS
+    ).iterator(chunk_size=chunk_size)
+
+    chunk = []
+    for recipe in recipes:
+        chunk.append(recipe)
+        if len(chunk) == chunk_size:
+            yield from _with_names(chunk)
+            chunk = []
+    if chunk:
+        yield from _with_names(chunk)
+
+
+def _with_names(chunk):
+    """Yield the rows of a chunk of recipes with their related names"""
+    ids = [recipe[0] for recipe in chunk]
+    names = {}
+    for field, target in RELATIONS:
+        names[field] = defaultdict(list)
+        links = getattr(Recipe, field).through.objects.filter(
+            recipe_id__in=ids
+        ).order_by(f'{target}__name').values_list(
+            'recipe_id', f'{target}__name'
+        )
+        for recipe_id, name in links:
+            names[field][recipe_id].append(name)
+
+    for recipe in chunk:
+        row = dict(zip(FIELDS, recipe))
+        row['price'] = str(row['price'])
+        for field, _target in RELATIONS:
+            row[field] = names[field].get(row['id'], [])
+        yield row
+
+
+def ndjson_lines(rows):
+    """Encode rows as newline delimited JSON"""
+    renderer = FastJSONRenderer()
+    for row in rows:
+        yield renderer.render(row) + b'\n'
+
+
+class _Echo:
+    """File-like object returning what is written, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    """Encode rows as CSV with a header, joining names in one cell
+
+    Cells that would start a formula are escaped, see escape_cell.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(FIELDS + tuple(field for field, _ in RELATIONS))
+    for row in rows:
+        yield writer.writerow([escape_cell(cell) for cell in (
+            [row[field] for field in FIELDS]
+            + [NAME_SEPARATOR.join(row[field]) for field, _ in RELATIONS]
+        )])
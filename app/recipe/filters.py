@@ -0,0 +1,58 @@
+from django.db.models import CharField, Count, F, Value
+
+from core.models import Recipe
+
+
+RELATIONS = (('tags', 'tag'), ('ingredients', 'ingredient'))
+
+
+def filter_related(queryset, field, ids, match_all=False):
+    """Filter recipes linked to any or all of the given tags or ingredients
+
+    Uses an IN subquery on the link table, so recipes matching several ids
+    are returned once. Matching all ids groups the links per recipe and
+    keeps those linking every id.
+    """
+    target = dict(RELATIONS)[field]
+    ids = set(ids)
+    links = getattr(Recipe, field).through.objects.filter(
+        **{f'{target}_id__in': ids}
+    ).values('recipe_id')
+    if match_all:
+        links = links.annotate(
+            matched=Count(f'{target}_id')
+        ).filter(matched=len(ids)).values('recipe_id')
+
+    return queryset.filter(id__in=links)
+
+
+def facet_counts(queryset):
+    """Count the recipes in queryset using each tag and ingredient
+
+    Both link tables are aggregated in a single UNION ALL query.
+    """
+    recipe_ids = queryset.order_by().values('id')
+    counts = None
+    for field, target in RELATIONS:
+        facet = getattr(Recipe, field).through.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values(
+            facet_id=F(f'{target}_id'),
+            name=F(f'{target}__name')
+        ).annotate(
+            kind=Value(field, output_field=CharField()),
+            count=Count('recipe_id')
+        )
+        counts = facet if counts is None else counts.union(facet, all=True)
+
+    facets = {field: [] for field, _target in RELATIONS}
+    for row in counts:
+        facets[row['kind']].append({
+            'id': row['facet_id'],
+            'name': row['name'],
+            'count': row['count'],
+        })
+    for values in facets.values():
+        values.sort(key=lambda value: (-value['count'], value['name']))
+
+    return facets
@@ -0,0 +1,120 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, features
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+
+from core import metrics
+from core.models import Recipe, RecipeImageVariant
+from recipe.cache import bump_version
+
+
+logger = logging.getLogger(__name__)
+
+PILLOW_FORMATS = {'jpeg': 'JPEG', 'webp': 'WEBP'}
+
+_executor = None
+
+
+def _get_executor():
+    """Return the shared image processing thread pool"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.RECIPE_IMAGE_WORKERS,
+            thread_name_prefix='recipe-image'
+        )
+
+    return _executor
+
+
+def _supported_formats():
+    """Return the configured variant formats Pillow can encode"""
+    return [
+        fmt for fmt in settings.RECIPE_IMAGE_FORMATS
+        if fmt != 'webp' or features.check('webp')
+    ]
+
+
+def schedule_variants(recipe):
+    """Generate image variants for a recipe once the upload is committed"""
+    image_name = recipe.image.name
+    if not settings.RECIPE_IMAGE_ASYNC:
+        create_variants(recipe.id, image_name)
+        return
+
+    transaction.on_commit(
+        lambda: _get_executor().submit(_run, recipe.id, image_name)
+    )
+
+
+def _run(recipe_id, image_name):
+    """Create variants in a worker thread and release its connection"""
+    try:
+        create_variants(recipe_id, image_name)
+    except Exception:
+        logger.exception('Failed to create variants for recipe %s',
+                         recipe_id)
+    finally:
+        connection.close()
+
+
+@metrics.IMAGE_VARIANTS_DURATION.time()
+def create_variants(recipe_id, image_name):
+    """Resize a recipe image into every configured size and format"""
+    recipe = Recipe.objects.filter(id=recipe_id).first()
+    if recipe is None or recipe.image.name != image_name:
+        # The recipe was deleted or a newer upload replaced the image
+        return
+
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    with recipe.image.open('rb') as image_file:
+        original = Image.open(image_file)
+        original.load()
+
+    variants = []
+    for label, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        resized = original.copy()
+        resized.thumbnail((size, size))
+        if resized.mode not in ('RGB', 'RGBA'):
+            resized = resized.convert('RGB')
+        for fmt in _supported_formats():
+            image = resized
+            if fmt == 'jpeg' and image.mode == 'RGBA':
+                image = image.convert('RGB')
+            buffer = io.BytesIO()
+            image.save(buffer, format=PILLOW_FORMATS[fmt], quality=85)
+            variant = RecipeImageVariant(recipe=recipe, label=label,
+                                         format=fmt)
+            variant.image.save(
+                f'{stem}_{label}.{fmt}',
+                ContentFile(buffer.getvalue()),
+                save=False
+            )
+            variants.append(variant)
+
+    with transaction.atomic():
+        # Resizing takes a while, a newer upload may have replaced the
+        # image and scheduled its own variants since the check above
+        recipe = Recipe.objects.select_for_update().filter(
+            id=recipe_id
+        ).first()
+        stale = recipe is None or recipe.image.name != image_name
+        if not stale:
+            delete_variants(recipe)
+            RecipeImageVariant.objects.bulk_create(variants)
+    if stale:
+        for variant in variants:
+            variant.image.delete(save=False)
+        return
+    bump_version(recipe.user_id)
+
+
+def delete_variants(recipe):
+    """Remove a recipe's image variants, their files go on commit"""
+    recipe.image_variants.all().delete()
@@ -0,0 +1,41 @@
+from django.conf import settings
+
+from rest_framework.pagination import CursorPagination, \
+                                      PageNumberPagination
+
+
+class NameCursorPagination(CursorPagination):
+    """Keyset pagination for tags and ingredients ordered by name
+
+    Names are unique per user, so they alone give a stable order and it
+    is read straight from the (user, name) index.
+    """
+    ordering = '-name'
+    page_size = settings.RECIPE_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.RECIPE_MAX_PAGE_SIZE
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Keyset pagination for recipes ordered by newest first"""
+    ordering = '-id'
+    page_size = settings.RECIPE_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.RECIPE_MAX_PAGE_SIZE
+
+
+class RecipeSearchPagination(PageNumberPagination):
+    """Numbered pages for search results ordered by rank
+
+    Only the best RECIPE_SEARCH_MAX_RESULTS matches are paged, which bounds
+    both the count and the OFFSET of deep pages.
+    """
+    page_size = settings.RECIPE_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.RECIPE_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Page through the top matches only"""
+        return super().paginate_queryset(
+            queryset[:settings.RECIPE_SEARCH_MAX_RESULTS], request, view
+        )
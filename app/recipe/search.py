@@ -0,0 +1,114 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, \
+                                           SearchVector, TrigramSimilarity
+from django.db import connection
+from django.db.models import BooleanField, Case, Exists, F, Func, \
+                             OuterRef, Q, Subquery, TextField, Value, When
+
+from core.models import Tag, Ingredient, Recipe
+
+
+RELATIONS = {Tag: Recipe.tags.through, Ingredient: Recipe.ingredients.through}
+
+
+def is_supported():
+    """Return True when the database has full-text search"""
+    return connection.vendor == 'postgresql'
+
+
+def _names(model):
+    """Return a subquery joining the names of a recipe's tags or ingredients"""
+    names = model.objects.filter(recipe=OuterRef('pk')).annotate(
+        names=Func(F('name'), Value(' '), function='string_agg')
+    ).values('names')
+
+    return Subquery(names, output_field=TextField())
+
+
+def search_vector(tag_model=Tag, ingredient_model=Ingredient):
+    """Return the weighted search vector of a recipe row
+
+    Titles rank above tag and ingredient names. Models can be passed in
+    so migrations can use their historical versions.
+    """
+    config = settings.RECIPE_SEARCH_CONFIG
+
+    return (
+        SearchVector('title', weight='A', config=config)
+        + SearchVector(_names(tag_model), _names(ingredient_model),
+                       weight='B', config=config)
+    )
+
+
+def update_search_vectors(recipe_ids):
+    """Recompute the search vectors of the given recipes in one query"""
+    if not is_supported() or not recipe_ids:
+        return
+
+    Recipe.objects.filter(id__in=recipe_ids).update(
+        search_vector=search_vector()
+    )
+
+
+def recipes_using(model, ids):
+    """Return ids of recipes linked to the given tags or ingredients"""
+    through = RELATIONS[model]
+    field = f'{model._meta.model_name}_id'
+
+    return list(through.objects.filter(
+        **{f'{field}__in': ids}
+    ).values_list('recipe_id', flat=True).distinct())
+
+
+def search_recipes(queryset, terms):
+    """Filter recipes matching the search terms, best matches first
+
+    Databases without full-text search fall back to a case-insensitive
+    substring match ordered by newest first.
+    """
+    if is_supported():
+        query = SearchQuery(terms, config=settings.RECIPE_SEARCH_CONFIG)
+        return queryset.annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).filter(search_vector=query).order_by('-search_rank', '-id')
+
+    matches = Q(title__icontains=terms)
+    for model, through in RELATIONS.items():
+        name = model._meta.model_name
+        queryset = queryset.annotate(**{
+            f'{name}_match': Exists(through.objects.filter(
+                recipe_id=OuterRef('pk'),
+                **{f'{name}__name__icontains': terms}
+            ))
+        })
+        matches |= Q(**{f'{name}_match': True})
+
+    return queryset.filter(matches).order_by('-id')
+
+
+def suggest_names(queryset, prefix, limit):
+    """Return up to limit objects whose names start with or resemble prefix
+
+    Prefix matches come first, then the closest trigram matches. Databases
+    without pg_trgm only return substring matches.
+    """
+    starts = Case(
+        When(name__istartswith=prefix, then=Value(True)),
+        default=Value(False),
+        output_field=BooleanField()
+    )
+    if is_supported():
+        # ~* and % can both use the trigram index, unlike UPPER() LIKE
+        return queryset.filter(
+            Q(name__iregex=f'^{re.escape(prefix)}')
+            | Q(name__trigram_similar=prefix)
+        ).annotate(
+            starts=starts,
+            similarity=TrigramSimilarity('name', prefix)
+        ).order_by('-starts', '-similarity', 'name')[:limit]
+
+    return queryset.filter(name__icontains=prefix).annotate(
+        starts=starts
+    ).order_by('-starts', 'name')[:limit]
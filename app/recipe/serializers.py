@@ -1,57 +1,331 @@
+from django.utils.translation import ugettext_lazy as _
+
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 
+from core.instrumentation import TimedDataMixin
 from core.models import Tag, Ingredient, Recipe
+from recipe.bulk import bulk_create
+from recipe.search import recipes_using, update_search_vectors
+
+
+class UserUniqueNameMixin:
+    """Reject names the requesting user already has for this model"""
+
+    def validate_name(self, value):
+        """Validate name is unique for the authenticated user"""
+        request = self.context.get('request')
+        bulk = isinstance(self.parent, serializers.ListSerializer)
+        if request is None or bulk:
+            # Bulk requests check every name at once in NameListSerializer
+            return value
+
+        queryset = self.Meta.model.objects.filter(
+            user=request.user,
+            name=value
+        )
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+        if queryset.exists():
+            msg = _('An object with this name already exists')
+            raise serializers.ValidationError(msg, code='unique')
+
+        return value
+
+
+class NameListSerializer(TimedDataMixin, serializers.ListSerializer):
+    """Bulk create and update tags or ingredients"""
+
+    def to_internal_value(self, data):
+        """Validate names are unique per user with a single query"""
+        validated = super().to_internal_value(data)
+        names = [item['name'] for item in validated if 'name' in item]
+        owners = dict(self.child.Meta.model.objects.filter(
+            user=self.context['request'].user,
+            name__in=names
+        ).values_list('name', 'id'))
+        instances = self.instance or [None] * len(validated)
+
+        errors = []
+        seen = set()
+        for item, instance in zip(validated, instances):
+            name = item.get('name')
+            owner = owners.get(name, getattr(instance, 'id', None))
+            if name in seen or owner != getattr(instance, 'id', None):
+                msg = _('An object with this name already exists')
+                errors.append({'name': [msg]})
+            else:
+                errors.append({})
+            if name is not None:
+                seen.add(name)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        return validated
+
+    def create(self, validated_data):
+        """Insert all objects with bulk_create"""
+        model = self.child.Meta.model
 
+        return bulk_create(model, [model(**item) for item in validated_data])
 
-class TagSerializer(serializers.ModelSerializer):
+    def update(self, instances, validated_data):
+        """Save all changed fields with bulk_update"""
+        fields = set()
+        for instance, item in zip(instances, validated_data):
+            for attr, value in item.items():
+                setattr(instance, attr, value)
+                fields.add(attr)
+        if fields:
+            model = self.child.Meta.model
+            model.objects.bulk_update(instances, fields)
+            if 'name' in fields:
+                update_search_vectors(recipes_using(
+                    model, [instance.id for instance in instances]
+                ))
+
+        return instances
+
+
+class TagSerializer(TimedDataMixin, UserUniqueNameMixin,
+                    serializers.ModelSerializer):
     """Serializer for Tag objects"""
 
     class Meta:
         model = Tag
         fields = ('id', 'name')
         read_only_fields = ('id',)
+        list_serializer_class = NameListSerializer
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedDataMixin, UserUniqueNameMixin,
+                           serializers.ModelSerializer):
     """Serializer for ingredient objects"""
 
     class Meta:
         model = Ingredient
         fields = ('id', 'name')
         read_only_fields = ('id',)
+        list_serializer_class = NameListSerializer
+
+
+class BatchManyRelatedField(serializers.ManyRelatedField):
+    """Many related field that resolves every primary key in one query"""
+    default_error_messages = {
+        'does_not_exist': _('Invalid pks "{pk_values}" - '
+                            'objects do not exist.'),
+    }
+
+    def to_internal_value(self, data):
+        """Resolve all submitted ids with a single id__in query"""
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        ids = []
+        for item in data:
+            try:
+                ids.append(int(item))
+            except (TypeError, ValueError):
+                self.child_relation.fail(
+                    'incorrect_type',
+                    data_type=type(item).__name__
+                )
+
+        queryset = self.child_relation.get_queryset()
+        # Bulk serializers resolve every item's ids up front
+        resolved = self.context.get('related_objects', {}).get(
+            queryset.model
+        )
+        if resolved is None:
+            resolved = queryset.in_bulk(ids) if ids else {}
+
+        missing = [str(pk) for pk in dict.fromkeys(ids) if pk not in resolved]
+        if missing:
+            self.fail('does_not_exist', pk_values=', '.join(missing))
+
+        return [resolved[pk] for pk in ids]
+
+
+class UserPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field limited to the requesting user's objects"""
 
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        """Validate many=True fields with BatchManyRelatedField"""
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
 
-class RecipeSerializer(serializers.ModelSerializer):
-    """Serializer for Recipe objects"""
-    ingredients = serializers.PrimaryKeyRelatedField(
+        return BatchManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        """Return only objects owned by the authenticated user"""
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is not None:
+            queryset = queryset.filter(user=request.user)
+
+        return queryset
+
+
+class RecipeListSerializer(TimedDataMixin, serializers.ListSerializer):
+    """Bulk create and update recipes with their tags and ingredients"""
+    relations = (('tags', Tag), ('ingredients', Ingredient))
+
+    def to_internal_value(self, data):
+        """Resolve every referenced tag and ingredient up front"""
+        if isinstance(data, list):
+            self._context['related_objects'] = self._resolve_related(data)
+
+        return super().to_internal_value(data)
+
+    def _resolve_related(self, data):
+        """Fetch the user's tags and ingredients with one query each"""
+        related = {}
+        for field, model in self.relations:
+            ids = set()
+            for item in data:
+                values = item.get(field) if isinstance(item, dict) else None
+                for value in values if isinstance(values, list) else []:
+                    try:
+                        ids.add(int(value))
+                    except (TypeError, ValueError):
+                        continue
+            relation = self.child.fields[field].child_relation
+            related[model] = relation.get_queryset().in_bulk(ids)
+
+        return related
+
+    def create(self, validated_data):
+        """Insert recipes and their M2M rows with bulk_create"""
+        links = [
+            {field: item.pop(field, []) for field, _model in self.relations}
+            for item in validated_data
+        ]
+        recipes = bulk_create(
+            Recipe,
+            [Recipe(**item) for item in validated_data]
+        )
+        self._set_related(recipes, links)
+        update_search_vectors([recipe.id for recipe in recipes])
+
+        return recipes
+
+    def update(self, instances, validated_data):
+        """Save changed fields with bulk_update and replace M2M rows"""
+        links = []
+        fields = set()
+        for instance, item in zip(instances, validated_data):
+            links.append({
+                field: item.pop(field)
+                for field, _model in self.relations if field in item
+            })
+            for attr, value in item.items():
+                setattr(instance, attr, value)
+                fields.add(attr)
+        if fields:
+            Recipe.objects.bulk_update(instances, fields)
+        self._set_related(instances, links, replace=True)
+        update_search_vectors([instance.id for instance in instances])
+
+        return instances
+
+    def _set_related(self, recipes, links, replace=False):
+        """Write tag and ingredient links for recipes in bulk"""
+        for field, model in self.relations:
+            through = getattr(Recipe, field).through
+            target = f'{model._meta.model_name}_id'
+            updated = [
+                (recipe, link[field])
+                for recipe, link in zip(recipes, links) if field in link
+            ]
+            if replace:
+                through.objects.filter(
+                    recipe_id__in=[recipe.id for recipe, _objs in updated]
+                ).delete()
+            through.objects.bulk_create([
+                through(recipe_id=recipe.id, **{target: obj.id})
+                for recipe, objs in updated
+                for obj in set(objs)
+            ])
+
+
+class ImageVariantsField(serializers.Field):
+    """Map of ready image variant names to their URLs"""
+
+    def get_attribute(self, instance):
+        """Return the recipe's variants, using any prefetched rows"""
+        return instance.image_variants.all()
+
+    def to_representation(self, variants):
+        """Return URLs keyed by label and format, e.g. thumbnail_webp"""
+        request = self.context.get('request')
+        urls = {}
+        for variant in variants:
+            url = variant.image.url
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[f'{variant.label}_{variant.format}'] = url
+
+        return urls
+
+
+class RecipeSerializer(TimedDataMixin, serializers.ModelSerializer):
+    """Serializer for Recipe objects
+
+    The serializer context can hold 'fields', the names to output, and
+    'expand', the relations to nest as objects instead of ids.
+    """
+    ingredients = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
 
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
+    image_variants = ImageVariantsField(read_only=True)
+    expandable = {'ingredients': IngredientSerializer, 'tags': TagSerializer}
+    default_expand = ()
 
     class Meta:
         model = Recipe
         fields = (
             'id', 'title', 'ingredients', 'tags', 'price', 'link',
-            'time_minutes'
+            'time_minutes', 'image_variants'
         )
         read_only_fields = ('id', )
+        list_serializer_class = RecipeListSerializer
+
+    def get_fields(self):
+        """Nest expanded relations and drop fields that weren't asked for"""
+        fields = super().get_fields()
+        expand = self.context.get('expand')
+        for name in self.default_expand if expand is None else expand:
+            fields[name] = self.expandable[name](many=True, read_only=True)
+
+        only = self.context.get('fields')
+        if only is not None:
+            for name in set(fields) - set(only):
+                del fields[name]
+
+        return fields
 
 
 class RecipeDetailSerializer(RecipeSerializer):
     """Serializer for Recipe Details"""
-    ingredients = IngredientSerializer(many=True, read_only=True)
-    tags = TagSerializer(many=True, read_only=True)
+    default_expand = ('ingredients', 'tags')
 
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+class RecipeImageSerializer(TimedDataMixin, serializers.ModelSerializer):
     """Serializer for uploading recipe images"""
+    image_variants = ImageVariantsField(read_only=True)
 
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'image_variants')
         read_only_fields = ('id',)
@@ -0,0 +1,136 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, pre_delete, \
+                                     post_delete, m2m_changed
+from django.dispatch import receiver
+
+from core.models import Tag, Ingredient, Recipe, RecipeImageVariant, \
+                        ImageBlob
+from recipe.cache import bump_version
+from recipe.search import recipes_using, update_search_vectors
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Invalidate cached responses for the owner of a changed object"""
+    bump_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_user_cache_m2m(sender, instance, action, **kwargs):
+    """Invalidate cached responses when recipe tags or ingredients change"""
+    if action.startswith('post_'):
+        bump_version(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_cache_account(sender, instance, **kwargs):
+    """Invalidate cached data versions when a user's account changes"""
+    bump_version(instance.pk)
+
+
+def _loaded_image_name(instance):
+    """Return the recipe's image name, or None if the field is deferred"""
+    if 'image' not in instance.__dict__:
+        return None
+    value = instance.__dict__['image']
+
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_init, sender=Recipe)
+def track_recipe_image(sender, instance, **kwargs):
+    """Remember the image a recipe was loaded with"""
+    instance._loaded_image = _loaded_image_name(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def count_recipe_image(sender, instance, **kwargs):
+    """Move the recipe's image reference when its image changes"""
+    previous = instance._loaded_image
+    current = _loaded_image_name(instance)
+    if previous is None or current is None or previous == current:
+        return
+
+    if current:
+        ImageBlob.objects.acquire(current)
+    if previous:
+        ImageBlob.objects.release(previous, instance.image.storage)
+    instance._loaded_image = current
+
+
+@receiver(post_delete, sender=Recipe)
+def release_recipe_image(sender, instance, **kwargs):
+    """Release a deleted recipe's image reference"""
+    if instance._loaded_image:
+        ImageBlob.objects.release(
+            instance._loaded_image,
+            instance.image.storage
+        )
+
+
+@receiver(post_delete, sender=RecipeImageVariant)
+def delete_variant_file(sender, instance, **kwargs):
+    """Delete an image variant's file once the deletion commits"""
+    name = instance.image.name
+    storage = instance.image.storage
+    transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver(post_init, sender=Recipe)
+def track_recipe_title(sender, instance, **kwargs):
+    """Remember the title a recipe was loaded with"""
+    instance._loaded_title = instance.__dict__.get('title')
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, created, **kwargs):
+    """Update a recipe's search vector when its title changes"""
+    if created or instance.title != instance._loaded_title:
+        update_search_vectors([instance.id])
+    instance._loaded_title = instance.title
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def index_recipe_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    """Update search vectors when recipe tags or ingredients change"""
+    if not reverse:
+        if action.startswith('post_'):
+            update_search_vectors([instance.id])
+    elif action == 'pre_clear':
+        instance._search_recipe_ids = recipes_using(
+            type(instance), [instance.pk]
+        )
+    elif action == 'post_clear':
+        update_search_vectors(instance._search_recipe_ids)
+    elif action.startswith('post_'):
+        update_search_vectors(list(pk_set))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def index_renamed(sender, instance, created, **kwargs):
+    """Update the search vectors of recipes using a renamed object"""
+    if not created:
+        update_search_vectors(recipes_using(sender, [instance.pk]))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def find_indexed_recipes(sender, instance, **kwargs):
+    """Remember recipes using an object before its links are deleted"""
+    instance._search_recipe_ids = recipes_using(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def index_deleted(sender, instance, **kwargs):
+    """Update the search vectors of recipes that used a deleted object"""
+    update_search_vectors(instance._search_recipe_ids)
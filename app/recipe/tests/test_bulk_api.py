@@ -0,0 +1,302 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+RECIPE_BULK_URL = reverse('recipe:recipe-bulk')
+TAG_BULK_URL = reverse('recipe:tag-bulk')
+INGREDIENT_BULK_URL = reverse('recipe:ingredient-bulk')
+
+
+def sample_recipe(user, **params):
+    """Create and return sample recipe"""
+    defaults = {
+        'title': 'test recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class BulkRecipeApiTests(TestCase):
+    """Test bulk recipe endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Dinner')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user,
+            name='Rice'
+        )
+
+    def test_bulk_create_recipes(self):
+        """Test creating a list of recipes with tags and ingredients"""
+        payload = [
+            {
+                'title': f'Recipe {n}',
+                'time_minutes': 10,
+                'price': '5.00',
+                'tags': [self.tag.id],
+                'ingredients': [self.ingredient.id],
+            }
+            for n in range(3)
+        ]
+
+        res = self.client.post(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 3)
+        self.assertEqual(
+            [recipe['title'] for recipe in res.data],
+            ['Recipe 0', 'Recipe 1', 'Recipe 2']
+        )
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 3)
+        for recipe in recipes:
+            self.assertEqual(list(recipe.tags.all()), [self.tag])
+            self.assertEqual(
+                list(recipe.ingredients.all()),
+                [self.ingredient]
+            )
+
+    def test_bulk_create_reports_item_errors(self):
+        """Test invalid items are reported and nothing is created"""
+        user2 = get_user_model().objects.create_user(
+            'test2@email.com',
+            'testpass123'
+        )
+        other_tag = Tag.objects.create(user=user2, name='Lunch')
+        payload = [
+            {'title': 'Valid', 'time_minutes': 10, 'price': '5.00'},
+            {'title': 'No time', 'price': '5.00'},
+            {'title': 'Other tag', 'time_minutes': 10, 'price': '5.00'},
+        ]
+        for item in payload:
+            item.update({'tags': [], 'ingredients': []})
+        payload[2]['tags'] = [other_tag.id]
+
+        res = self.client.post(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('time_minutes', res.data[1])
+        self.assertIn('tags', res.data[2])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_resolves_relations_once(self):
+        """Test validation does not query per referenced tag"""
+        tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {n}')
+            for n in range(10)
+        ]
+        payload = [
+            {
+                'title': f'Recipe {n}',
+                'time_minutes': 10,
+                'price': '5.00',
+                'tags': [tag.id for tag in tags],
+                'ingredients': [],
+            }
+            for n in range(2)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        tag_selects = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "core_tag"' in query['sql']
+        ]
+        # One query to validate every tag id and one to prefetch the response
+        self.assertEqual(len(tag_selects), 2)
+
+    def test_bulk_update_recipes(self):
+        """Test partially updating a list of recipes"""
+        recipe1 = sample_recipe(user=self.user, title='Old 1')
+        recipe2 = sample_recipe(user=self.user, title='Old 2')
+        recipe2.tags.add(self.tag)
+        payload = [
+            {'id': recipe1.id, 'title': 'New 1', 'tags': [self.tag.id]},
+            {'id': recipe2.id, 'tags': []},
+        ]
+
+        res = self.client.patch(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe1.refresh_from_db()
+        recipe2.refresh_from_db()
+        self.assertEqual(recipe1.title, 'New 1')
+        self.assertEqual(recipe2.title, 'Old 2')
+        self.assertEqual(list(recipe1.tags.all()), [self.tag])
+        self.assertEqual(recipe2.tags.count(), 0)
+
+    def test_bulk_update_other_users_recipe_fails(self):
+        """Test bulk updates can't touch another user's recipes"""
+        user2 = get_user_model().objects.create_user(
+            'test2@email.com',
+            'testpass123'
+        )
+        recipe = sample_recipe(user=user2, title='Theirs')
+
+        res = self.client.patch(
+            RECIPE_BULK_URL,
+            [{'id': recipe.id, 'title': 'Mine'}],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data[0])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Theirs')
+
+    def test_bulk_update_duplicate_ids_fails(self):
+        """Test a recipe can't be listed twice in one bulk update"""
+        recipe = sample_recipe(user=self.user, title='Old')
+        payload = [
+            {'id': recipe.id, 'title': 'First'},
+            {'id': recipe.id, 'title': 'Second'},
+        ]
+
+        res = self.client.patch(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('id', res.data[1])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Old')
+
+    def test_bulk_delete_recipes(self):
+        """Test deleting a list of recipes"""
+        recipes = [sample_recipe(user=self.user) for _ in range(3)]
+
+        res = self.client.delete(
+            RECIPE_BULK_URL,
+            [recipe.id for recipe in recipes[:2]],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            list(Recipe.objects.values_list('id', flat=True)),
+            [recipes[2].id]
+        )
+
+    def test_bulk_delete_missing_recipe_fails(self):
+        """Test nothing is deleted when any id is not found"""
+        recipe = sample_recipe(user=self.user)
+
+        res = self.client.delete(
+            RECIPE_BULK_URL,
+            [recipe.id, recipe.id + 100],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
+
+    def test_bulk_requires_list(self):
+        """Test bulk endpoints reject a single object"""
+        res = self.client.post(
+            RECIPE_BULK_URL,
+            {'title': 'Tacos', 'time_minutes': 10, 'price': '5.00'},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BulkTagApiTests(TestCase):
+    """Test bulk tag and ingredient endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_tags(self):
+        """Test creating a list of tags"""
+        payload = [{'name': 'Breakfast'}, {'name': 'Lunch'}]
+
+        res = self.client.post(TAG_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(Tag.objects.values_list('name', flat=True)),
+            ['Breakfast', 'Lunch']
+        )
+        self.assertTrue(all(tag['id'] for tag in res.data))
+
+    def test_bulk_create_duplicate_names_fails(self):
+        """Test names must be unique in the batch and for the user"""
+        Tag.objects.create(user=self.user, name='Lunch')
+        payload = [{'name': 'Brunch'}, {'name': 'Lunch'}, {'name': 'Brunch'}]
+
+        res = self.client.post(TAG_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('name', res.data[1])
+        self.assertIn('name', res.data[2])
+        self.assertEqual(Tag.objects.count(), 1)
+
+    def test_bulk_rename_ingredients(self):
+        """Test renaming a list of ingredients"""
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        pepper = Ingredient.objects.create(user=self.user, name='Pepper')
+        payload = [
+            {'id': salt.id, 'name': 'Sea Salt'},
+            {'id': pepper.id, 'name': 'Pepper'},
+        ]
+
+        res = self.client.patch(INGREDIENT_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        salt.refresh_from_db()
+        self.assertEqual(salt.name, 'Sea Salt')
+        self.assertEqual(res.data[1]['name'], 'Pepper')
+
+    def test_bulk_rename_to_taken_name_fails(self):
+        """Test renaming to another ingredient's name fails"""
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        Ingredient.objects.create(user=self.user, name='Pepper')
+
+        res = self.client.patch(
+            INGREDIENT_BULK_URL,
+            [{'id': salt.id, 'name': 'Pepper'}],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', res.data[0])
+
+    def test_bulk_delete_ingredients(self):
+        """Test deleting a list of ingredients"""
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+
+        res = self.client.delete(
+            INGREDIENT_BULK_URL,
+            [ingredient.id],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Ingredient.objects.exists())
@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+from recipe import cache as recipe_cache
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def sample_recipe(user, **params):
+    """Create and return sample recipe"""
+    defaults = {
+        'title': 'test recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ResponseCacheTests(TestCase):
+    """Test the per-user versioned list response cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_served_from_cache(self):
+        """Test a repeated list request is a cache hit without queries"""
+        sample_recipe(user=self.user)
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(RECIPE_URL)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached.data, res.data)
+        self.assertEqual(recipe_cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_query_params_normalized(self):
+        """Test query param order does not change the cache key"""
+        self.client.get(RECIPE_URL, {'tags': '1', 'ingredients': '2'})
+        res = self.client.get(RECIPE_URL + '?ingredients=2&tags=1')
+
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+    def test_write_invalidates_cache(self):
+        """Test creating a recipe invalidates the cached list"""
+        self.client.get(RECIPE_URL)
+        sample_recipe(user=self.user)
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_m2m_change_invalidates_cache(self):
+        """Test adding a tag to a recipe invalidates cached lists"""
+        recipe = sample_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        recipe.tags.add(tag)
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+
+    def test_cache_isolated_per_user(self):
+        """Test cached responses are never shared between users"""
+        sample_recipe(user=self.user)
+        self.client.get(RECIPE_URL)
+        user2 = get_user_model().objects.create_user(
+            'test2@email.com',
+            'testpass123'
+        )
+        self.client.force_authenticate(user2)
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(len(res.data['results']), 0)
+
+    def test_other_user_write_keeps_cache(self):
+        """Test another user's writes do not invalidate this user's cache"""
+        self.client.get(RECIPE_URL)
+        user2 = get_user_model().objects.create_user(
+            'test2@email.com',
+            'testpass123'
+        )
+        sample_recipe(user=user2)
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res['X-Cache'], 'HIT')
@@ -0,0 +1,141 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail url"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, **params):
+    """Create and return sample recipe"""
+    defaults = {
+        'title': 'test recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalRecipeApiTests(TestCase):
+    """Test ETag conditional requests on the recipe api"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(user=self.user)
+
+    def test_list_not_modified(self):
+        """Test a current ETag returns 304 without touching the database"""
+        res = self.client.get(RECIPE_URL)
+        self.assertIn('ETag', res)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(res.content)
+
+    def test_retrieve_not_modified(self):
+        """Test recipe detail honours If-None-Match"""
+        url = detail_url(self.recipe.id)
+        res = self.client.get(url)
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_differs_per_url(self):
+        """Test list and detail representations have different ETags"""
+        list_res = self.client.get(RECIPE_URL)
+        detail_res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertNotEqual(list_res['ETag'], detail_res['ETag'])
+
+    def test_write_changes_etag(self):
+        """Test a stale ETag returns the new content after a write"""
+        res = self.client.get(RECIPE_URL)
+        sample_recipe(user=self.user, title='Paella')
+
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_update_with_stale_etag_fails(self):
+        """Test If-Match with a stale ETag rejects the update"""
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)['ETag']
+        self.client.patch(url, {'title': 'First'}, HTTP_IF_MATCH=etag)
+
+        res = self.client.patch(url, {'title': 'Second'}, HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.title, 'First')
+
+    def test_update_with_current_etag(self):
+        """Test If-Match with the current ETag allows the update"""
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.patch(url, {'title': 'Paella'}, HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_update_after_other_recipe_changed(self):
+        """Test changing another recipe doesn't invalidate If-Match"""
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)['ETag']
+        other = sample_recipe(user=self.user, title='Other')
+        self.client.patch(detail_url(other.id), {'title': 'Changed'})
+
+        res = self.client.patch(url, {'title': 'Paella'}, HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_with_etag_of_other_representation(self):
+        """Test an ETag from a ?fields= response works for If-Match"""
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url, {'fields': 'title'})['ETag']
+
+        res = self.client.patch(url, {'title': 'Paella'}, HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_tag_change_invalidates_etag(self):
+        """Test linking a tag changes the recipe's ETag"""
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)['ETag']
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+
+        res = self.client.patch(url, {'title': 'Paella'}, HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_update_with_etag_from_update(self):
+        """Test the ETag an update returns matches the stored recipe"""
+        url = detail_url(self.recipe.id)
+        res = self.client.patch(url, {'title': 'Paella', 'price': '7.5'})
+
+        res = self.client.patch(url, {'title': 'Risotto'},
+                                HTTP_IF_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['ETag'], self.client.get(url)['ETag'])
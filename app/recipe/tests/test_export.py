@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.export import export_rows
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def sample_recipe(user, title, tags=(), ingredients=()):
+    """Create a recipe with tags and ingredients of the given names"""
+    recipe = Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=10,
+        price=5.50
+    )
+    for name in tags:
+        recipe.tags.add(Tag.objects.get_or_create(user=user, name=name)[0])
+    for name in ingredients:
+        recipe.ingredients.add(
+            Ingredient.objects.get_or_create(user=user, name=name)[0]
+        )
+
+    return recipe
+
+
+class RecipeExportTests(TestCase):
+    """Test streaming a user's recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(self.user, 'Tacos',
+                                    tags=['Mexican', 'Dinner'],
+                                    ingredients=['Beef'])
+
+    def test_export_ndjson(self):
+        """Test exporting recipes as newline delimited JSON"""
+        sample_recipe(self.user, 'Toast')
+        other = get_user_model().objects.create_user(
+            'other@email.com',
+            'testpass123'
+        )
+        sample_recipe(other, 'Secret')
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['title'] for row in rows], ['Tacos', 'Toast'])
+        self.assertEqual(rows[0]['tags'], ['Dinner', 'Mexican'])
+        self.assertEqual(rows[0]['ingredients'], ['Beef'])
+        self.assertEqual(rows[0]['price'], '5.50')
+
+    def test_export_csv(self):
+        """Test exporting recipes as CSV"""
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(rows[0]['title'], 'Tacos')
+        self.assertEqual(rows[0]['tags'], 'Dinner|Mexican')
+        self.assertEqual(rows[0]['ingredients'], 'Beef')
+
+    def test_export_csv_escapes_formulas(self):
+        """Test CSV cells that spreadsheets would evaluate are quoted"""
+        sample_recipe(self.user, '=HYPERLINK("http://evil")',
+                      tags=['@SUM(A1)', 'Dinner'], ingredients=['-1+1'])
+
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+
+        content = b''.join(res.streaming_content).decode()
+        row = list(csv.DictReader(io.StringIO(content)))[1]
+        self.assertEqual(row['title'], '\'=HYPERLINK("http://evil")')
+        self.assertEqual(row['tags'], "'@SUM(A1)|Dinner")
+        self.assertEqual(row['ingredients'], "'-1+1")
+
+    def test_export_login_required(self):
+        """Test exporting requires authentication"""
+        res = APIClient().get(EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_export_names_fetched_per_chunk(self):
+        """Test names are queried once per chunk, not per recipe"""
+        for n in range(4):
+            sample_recipe(self.user, f'Recipe {n}', tags=['Dinner'])
+
+        # One cursor, then tags and ingredients for each of 3 chunks
+        with self.assertNumQueries(7):
+            rows = list(export_rows(self.user, chunk_size=2))
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[-1]['tags'], ['Dinner'])
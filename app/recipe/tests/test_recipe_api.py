@@ -1,17 +1,20 @@
 import tempfile
 import os
+import shutil
+from unittest.mock import patch
 
 from PIL import Image
 
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Recipe, Tag, Ingredient
 
+from recipe.images import create_variants
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 RECIPE_URL = reverse('recipe:recipe-list')
@@ -84,7 +87,7 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_user_limited_recipes(self):
         """Test users can only access their recipes"""
@@ -100,8 +103,31 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_recipes_paginated_by_cursor(self):
+        """Test recipes are paged newest first using a cursor"""
+        recipes = [
+            sample_recipe(user=self.user, title=f'Recipe {n}')
+            for n in range(5)
+        ]
+
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [recipes[4].id, recipes[3].id]
+        )
+        self.assertIsNone(res.data['previous'])
+
+        seen = [r['id'] for r in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            seen.extend(r['id'] for r in res.data['results'])
+
+        self.assertEqual(seen, [r.id for r in reversed(recipes)])
 
     def test_detail_view(self):
         """Test recipe detail view"""
@@ -211,9 +237,20 @@ class RecipeImageUploadTests(TestCase):
                                                          'testpass123')
         self.client.force_authenticate(self.user)
         self.recipe = sample_recipe(user=self.user)
-
-    def tearDown(self):
-        self.recipe.image.delete()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def _upload(self, size=(10, 10)):
+        """Upload a JPEG of the given size to the sample recipe"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            img = Image.new('RGB', size)
+            img.save(ntf, format='JPEG')
+            ntf.seek(0)
+            return self.client.post(url, {'image': ntf}, format='multipart')
 
     def test_image_upload(self):
         """Test Recipe image upload"""
@@ -229,6 +266,66 @@ class RecipeImageUploadTests(TestCase):
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    @patch('recipe.views.schedule_variants')
+    def test_image_upload_schedules_variants(self, mock_schedule):
+        """Test uploading defers resizing to the background worker"""
+        res = self._upload()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_variants'], {})
+        mock_schedule.assert_called_once()
+
+    @override_settings(RECIPE_IMAGE_ASYNC=False)
+    def test_image_variants_created(self):
+        """Test resized variants are exposed once processed"""
+        res = self._upload(size=(1200, 800))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('thumbnail_jpeg', res.data['image_variants'])
+        self.assertIn('medium_webp', res.data['image_variants'])
+        variant = self.recipe.image_variants.get(
+            label='thumbnail',
+            format='jpeg'
+        )
+        with Image.open(variant.image.path) as thumbnail:
+            self.assertEqual(thumbnail.size, (150, 100))
+
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertIn('thumbnail_webp', res.data['image_variants'])
+
+    def test_stale_variant_job_ignored(self):
+        """Test a job for a replaced image does not create variants"""
+        self._upload()
+
+        create_variants(self.recipe.id, 'uploads/recipe/replaced.jpg')
+
+        self.assertFalse(self.recipe.image_variants.exists())
+
+    @override_settings(RECIPE_IMAGE_ASYNC=False)
+    def test_variant_job_replaced_while_resizing(self):
+        """Test a job whose image is replaced mid-resize keeps newer ones"""
+        self._upload()
+        self.recipe.refresh_from_db()
+        image_name = self.recipe.image.name
+        newer = list(self.recipe.image_variants.order_by('id'))
+        variant_dir = os.path.dirname(newer[0].image.path)
+        files = set(os.listdir(variant_dir))
+
+        def replace_image():
+            Recipe.objects.filter(id=self.recipe.id).update(
+                image='uploads/recipe/newer.jpg'
+            )
+            return ['jpeg']
+
+        with patch('recipe.images._supported_formats',
+                   side_effect=replace_image):
+            create_variants(self.recipe.id, image_name)
+
+        self.assertEqual(list(self.recipe.image_variants.order_by('id')),
+                         newer)
+        self.assertEqual(set(os.listdir(variant_dir)), files)
+        Recipe.objects.filter(id=self.recipe.id).update(image=image_name)
+
     def test_img_upload_bad_req(self):
         """Tests invalid image uplaod fails"""
         url = image_upload_url(self.recipe.id)
@@ -254,9 +351,9 @@ class RecipeImageUploadTests(TestCase):
         serializer1 = RecipeSerializer(recipe1)
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
 
     def test_filter_by_ingredients(self):
         """Test returning recipes with specific ingredients"""
@@ -276,6 +373,118 @@ class RecipeImageUploadTests(TestCase):
         serializer1 = RecipeSerializer(recipe1)
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
+
+    def test_filter_by_tags_no_duplicates(self):
+        """Test recipes matching several tags are returned once"""
+        recipe = sample_recipe(user=self.user, title='Hamburger')
+        tag1 = sample_tag(user=self.user, name='American')
+        tag2 = sample_tag(user=self.user, name='Dinner')
+        recipe.tags.add(tag1, tag2)
+
+        res = self.client.get(RECIPE_URL, {'tags': f'{tag1.id},{tag2.id}'})
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_filter_match_all(self):
+        """Test match=all only returns recipes with every tag"""
+        recipe1 = sample_recipe(user=self.user, title='Hamburger')
+        recipe2 = sample_recipe(user=self.user, title='Hot Dog')
+        tag1 = sample_tag(user=self.user, name='American')
+        tag2 = sample_tag(user=self.user, name='Dinner')
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag1)
+
+        res = self.client.get(
+            RECIPE_URL,
+            {'tags': f'{tag1.id},{tag2.id}', 'match': 'all'}
+        )
+
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [recipe1.id]
+        )
+
+    def test_filter_match_invalid(self):
+        """Test an unknown match mode is rejected"""
+        res = self.client.get(RECIPE_URL, {'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_facets(self):
+        """Test facet counts cover the filtered recipes"""
+        recipe1 = sample_recipe(user=self.user, title='Hamburger')
+        recipe2 = sample_recipe(user=self.user, title='Hot Dog')
+        sample_recipe(user=self.user, title='Salad')
+        tag1 = sample_tag(user=self.user, name='American')
+        tag2 = sample_tag(user=self.user, name='Dinner')
+        ingredient = sample_ingredient(user=self.user, name='Bun')
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag1)
+        recipe1.ingredients.add(ingredient)
+
+        res = self.client.get(
+            RECIPE_URL,
+            {'tags': str(tag1.id), 'facets': 1}
+        )
+
+        self.assertEqual(res.data['facets'], {
+            'tags': [
+                {'id': tag1.id, 'name': 'American', 'count': 2},
+                {'id': tag2.id, 'name': 'Dinner', 'count': 1},
+            ],
+            'ingredients': [
+                {'id': ingredient.id, 'name': 'Bun', 'count': 1},
+            ],
+        })
+
+    def test_facets_boolean_words(self):
+        """Test facets are toggled by boolean words as well as numbers"""
+        sample_recipe(user=self.user)
+
+        res = self.client.get(RECIPE_URL, {'facets': 'true'})
+        self.assertIn('facets', res.data)
+
+        res = self.client.get(RECIPE_URL, {'facets': 'false'})
+        self.assertNotIn('facets', res.data)
+
+    def test_facets_invalid(self):
+        """Test a facets value that is not a boolean is rejected"""
+        res = self.client.get(RECIPE_URL, {'facets': 'maybe'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('facets', res.data)
+
+    def test_list_expand(self):
+        """Test list responses can nest tag objects"""
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(sample_tag(user=self.user))
+
+        res = self.client.get(RECIPE_URL, {'expand': 'tags'})
+
+        result = res.data['results'][0]
+        self.assertEqual(result['tags'][0]['name'], 'Dessert')
+        self.assertEqual(result['ingredients'], [])
+
+    def test_detail_without_expand(self):
+        """Test detail responses can return ids instead of objects"""
+        recipe = sample_recipe(user=self.user)
+        tag = sample_tag(user=self.user)
+        recipe.tags.add(tag)
+
+        res = self.client.get(
+            detail_url(recipe.id),
+            {'fields': 'id,tags', 'expand': ''}
+        )
+
+        self.assertEqual(res.data, {'id': recipe.id, 'tags': [tag.id]})
+
+    def test_unknown_fields_rejected(self):
+        """Test unknown field and expand names are rejected"""
+        res = self.client.get(RECIPE_URL, {'fields': 'id,secret'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(RECIPE_URL, {'expand': 'price'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,230 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail url"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, index):
+    """Create and return a recipe with its own tags and ingredients"""
+    recipe = Recipe.objects.create(
+        user=user,
+        title=f'Recipe {index}',
+        time_minutes=10,
+        price=5.00
+    )
+    for n in range(3):
+        recipe.tags.add(
+            Tag.objects.create(user=user, name=f'Tag {index}-{n}')
+        )
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=user, name=f'Ingr {index}-{n}')
+        )
+
+    return recipe
+
+
+class RecipeQueryCountTests(TestCase):
+    """Test the recipe api runs a constant number of queries"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_query_count_flat(self):
+        """Test listing recipes does not query per recipe"""
+        sample_recipe(self.user, 0)
+        with self.assertNumQueries(4):
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        for index in range(1, 10):
+            sample_recipe(self.user, index)
+        with self.assertNumQueries(4):
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 10)
+        self.assertEqual(len(res.data['results'][0]['tags']), 3)
+        self.assertEqual(len(res.data['results'][0]['ingredients']), 3)
+
+    def test_retrieve_query_count(self):
+        """Test recipe detail prefetches nested tags and ingredients"""
+        recipe = sample_recipe(self.user, 0)
+
+        with self.assertNumQueries(4):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 3)
+        self.assertEqual(len(res.data['ingredients']), 3)
+        self.assertIn('name', res.data['tags'][0])
+
+    def test_filtered_list_query_count_flat(self):
+        """Test filtering recipes by tags does not query per recipe"""
+        recipes = [sample_recipe(self.user, index) for index in range(5)]
+        tag_ids = ','.join(
+            str(recipe.tags.first().id) for recipe in recipes
+        )
+        ingredient_ids = ','.join(
+            str(recipe.ingredients.first().id) for recipe in recipes
+        )
+
+        with self.assertNumQueries(4):
+            res = self.client.get(
+                RECIPE_URL,
+                {'tags': tag_ids, 'ingredients': ingredient_ids}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_facets_single_query(self):
+        """Test facets for every tag and ingredient add one query"""
+        for index in range(5):
+            sample_recipe(self.user, index)
+
+        with self.assertNumQueries(5):
+            res = self.client.get(RECIPE_URL, {'facets': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['facets']['tags']), 15)
+        self.assertEqual(len(res.data['facets']['ingredients']), 15)
+        self.assertEqual(len(res.data['results']), 5)
+
+
+class RecipeValidationQueryTests(TestCase):
+    """Test recipe tag and ingredient ids are validated in bulk"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def _create_with_ingredients(self, count):
+        """Post a recipe with new ingredients and return ingredient queries"""
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=f'Ingr {n}')
+            for n in range(count)
+        ]
+        payload = {
+            'title': 'Stew',
+            'time_minutes': 60,
+            'price': '9.00',
+            'tags': [],
+            'ingredients': [ingredient.id for ingredient in ingredients],
+        }
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(RECIPE_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        Ingredient.objects.all().delete()
+
+        return [
+            query for query in queries.captured_queries
+            if 'FROM "core_ingredient"' in query['sql']
+        ]
+
+    def test_ingredient_ids_validated_in_one_query(self):
+        """Test ingredient queries don't grow with the number of ids"""
+        self.assertEqual(
+            len(self._create_with_ingredients(40)),
+            len(self._create_with_ingredients(1))
+        )
+
+    def test_missing_ids_reported_together(self):
+        """Test every missing id is reported in a single error"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        payload = {
+            'title': 'Stew',
+            'time_minutes': 60,
+            'price': '9.00',
+            'tags': [tag.id, tag.id + 100, tag.id + 200],
+            'ingredients': [],
+        }
+
+        res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data['tags']), 1)
+        self.assertIn(str(tag.id + 100), res.data['tags'][0])
+        self.assertIn(str(tag.id + 200), res.data['tags'][0])
+
+    def test_other_users_ids_rejected(self):
+        """Test recipes can't reference another user's tags"""
+        user2 = get_user_model().objects.create_user(
+            'test2@email.com',
+            'testpass123'
+        )
+        tag = Tag.objects.create(user=user2, name='Vegan')
+        payload = {
+            'title': 'Stew',
+            'time_minutes': 60,
+            'price': '9.00',
+            'tags': [tag.id],
+            'ingredients': [],
+        }
+
+        res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data)
+
+
+class RecipeFieldsQueryTests(TestCase):
+    """Test sparse fieldsets only load what they output"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+        for index in range(3):
+            sample_recipe(self.user, index)
+
+    def test_titles_skip_relations(self):
+        """Test listing titles never queries the M2M tables"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPE_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        self.assertNotIn('core_recipe_tags', sql)
+        self.assertNotIn('"core_recipe"."price"', sql)
+        self.assertEqual(
+            set(res.data['results'][0]),
+            {'id', 'title'}
+        )
+
+    def test_expanded_list_query_count(self):
+        """Test expanding relations still prefetches them in bulk"""
+        with self.assertNumQueries(3):
+            res = self.client.get(
+                RECIPE_URL,
+                {'fields': 'id,tags,ingredients',
+                 'expand': 'tags,ingredients'}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        tag = res.data['results'][0]['tags'][0]
+        self.assertEqual(set(tag), {'id', 'name'})
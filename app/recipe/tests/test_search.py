@@ -0,0 +1,153 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def sample_recipe(user, title):
+    """Create and return a sample recipe"""
+    return Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=10,
+        price=5.00
+    )
+
+
+class RecipeSearchTests(TestCase):
+    """Test searching recipes by title, tag and ingredient"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def _search(self, terms):
+        """Return the titles of recipes matching the search"""
+        res = self.client.get(RECIPE_URL, {'search': terms})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_search_title(self):
+        """Test recipes are found by title"""
+        sample_recipe(self.user, 'Chicken Curry')
+        sample_recipe(self.user, 'Beef Stew')
+
+        self.assertEqual(self._search('chicken'), ['Chicken Curry'])
+
+    def test_search_tags_and_ingredients(self):
+        """Test recipes are found by tag and ingredient names"""
+        tagged = sample_recipe(self.user, 'Tacos')
+        tagged.tags.add(Tag.objects.create(user=self.user, name='Mexican'))
+        with_ingredient = sample_recipe(self.user, 'Pasta')
+        with_ingredient.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Basil')
+        )
+
+        self.assertEqual(self._search('mexican'), ['Tacos'])
+        self.assertEqual(self._search('basil'), ['Pasta'])
+
+    def test_search_limited_to_user(self):
+        """Test other users' recipes are never returned"""
+        other = get_user_model().objects.create_user(
+            'other@email.com',
+            'testpass123'
+        )
+        sample_recipe(other, 'Chicken Curry')
+
+        self.assertEqual(self._search('chicken'), [])
+
+    def test_search_follows_renamed_tag(self):
+        """Test renaming a tag updates which recipes match"""
+        recipe = sample_recipe(self.user, 'Tacos')
+        tag = Tag.objects.create(user=self.user, name='Mexican')
+        recipe.tags.add(tag)
+
+        tag.name = 'Spicy'
+        tag.save()
+
+        self.assertEqual(self._search('mexican'), [])
+        self.assertEqual(self._search('spicy'), ['Tacos'])
+
+    def test_search_follows_deleted_ingredient(self):
+        """Test deleting an ingredient removes it from the search"""
+        recipe = sample_recipe(self.user, 'Pasta')
+        ingredient = Ingredient.objects.create(user=self.user, name='Basil')
+        recipe.ingredients.add(ingredient)
+
+        ingredient.delete()
+
+        self.assertEqual(self._search('basil'), [])
+
+    def test_search_bulk_created(self):
+        """Test recipes created in bulk are searchable"""
+        tag = Tag.objects.create(user=self.user, name='Mexican')
+        res = self.client.post(reverse('recipe:recipe-bulk'), [
+            {'title': 'Tacos', 'time_minutes': 10, 'price': 5.00,
+             'tags': [tag.id], 'ingredients': []},
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self._search('mexican'), ['Tacos'])
+
+    def test_search_paginated_by_page(self):
+        """Test search results are numbered pages with a count"""
+        for n in range(3):
+            sample_recipe(self.user, f'Chicken {n}')
+
+        res = self.client.get(RECIPE_URL, {'search': 'chicken',
+                                           'page_size': 2})
+
+        self.assertEqual(res.data['count'], 3)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIn('page=2', res.data['next'])
+
+    @override_settings(RECIPE_SEARCH_MAX_RESULTS=3)
+    def test_search_page_depth_capped(self):
+        """Test only the top matches can be paged through"""
+        for n in range(5):
+            sample_recipe(self.user, f'Chicken {n}')
+
+        res = self.client.get(RECIPE_URL, {'search': 'chicken',
+                                           'page_size': 2, 'page': 2})
+        self.assertEqual(res.data['count'], 3)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertIsNone(res.data['next'])
+
+        res = self.client.get(RECIPE_URL, {'search': 'chicken',
+                                           'page_size': 2, 'page': 3})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL')
+    def test_search_ranked(self):
+        """Test title matches rank above tag matches"""
+        sample_recipe(self.user, 'Chicken Curry')
+        tagged = sample_recipe(self.user, 'Fried Rice')
+        tagged.tags.add(Tag.objects.create(user=self.user, name='Chicken'))
+
+        self.assertEqual(
+            self._search('chicken'),
+            ['Chicken Curry', 'Fried Rice']
+        )
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL')
+    def test_search_uses_stored_vector(self):
+        """Test the vector is stored instead of computed per query"""
+        sample_recipe(self.user, 'Chicken Curry')
+
+        recipe = Recipe.objects.get()
+        self.assertIn("'chicken':1A", recipe.search_vector)
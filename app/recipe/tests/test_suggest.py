@@ -0,0 +1,87 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient
+
+
+TAG_SUGGEST_URL = reverse('recipe:tag-suggest')
+INGREDIENT_SUGGEST_URL = reverse('recipe:ingredient-suggest')
+
+
+class SuggestApiTests(TestCase):
+    """Test tag and ingredient autocomplete"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def _suggest(self, url, prefix, **params):
+        """Return the suggested names for a prefix"""
+        res = self.client.get(url, {'q': prefix, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [item['name'] for item in res.data]
+
+    def test_prefix_matches_first(self):
+        """Test names starting with the query come before other matches"""
+        for name in ('Sea Salt', 'Salt', 'Salsa', 'Pepper'):
+            Ingredient.objects.create(user=self.user, name=name)
+
+        names = self._suggest(INGREDIENT_SUGGEST_URL, 'sal')
+
+        self.assertCountEqual(names[:2], ['Salsa', 'Salt'])
+        self.assertIn('Sea Salt', names)
+        self.assertNotIn('Pepper', names)
+
+    def test_suggest_limited_to_user(self):
+        """Test other users' tags are never suggested"""
+        other = get_user_model().objects.create_user(
+            'other@email.com',
+            'testpass123'
+        )
+        Tag.objects.create(user=other, name='Vegan')
+
+        self.assertEqual(self._suggest(TAG_SUGGEST_URL, 'veg'), [])
+
+    @override_settings(RECIPE_SUGGEST_LIMIT=3)
+    def test_suggest_capped(self):
+        """Test no more than the configured number of names return"""
+        for n in range(5):
+            Tag.objects.create(user=self.user, name=f'Dinner {n}')
+
+        self.assertEqual(len(self._suggest(TAG_SUGGEST_URL, 'din')), 3)
+        self.assertEqual(
+            len(self._suggest(TAG_SUGGEST_URL, 'din', limit=2)),
+            2
+        )
+        self.assertEqual(
+            len(self._suggest(TAG_SUGGEST_URL, 'din', limit=100)),
+            3
+        )
+
+    def test_empty_query(self):
+        """Test an empty query suggests nothing"""
+        Tag.objects.create(user=self.user, name='Dinner')
+
+        self.assertEqual(self._suggest(TAG_SUGGEST_URL, ''), [])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL')
+    def test_fuzzy_matches(self):
+        """Test misspelt queries still find similar names"""
+        Ingredient.objects.create(user=self.user, name='Tomato')
+
+        self.assertEqual(
+            self._suggest(INGREDIENT_SUGGEST_URL, 'tomatoe'),
+            ['Tomato']
+        )
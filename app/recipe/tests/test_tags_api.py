@@ -47,7 +47,7 @@ class PrivateTagsApiTests(TestCase):
         tags = Tag.objects.all().order_by('-name')
         serializer = TagSerializer(tags, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_user_limited_tags(self):
         """Test only retrieve authenticated enduser tags"""
@@ -61,8 +61,29 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+
+    def test_tags_paginated_by_cursor(self):
+        """Test tags are paged by name using a cursor"""
+        for name in ('Asian', 'Brunch', 'Cajun', 'Dessert'):
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {'page_size': 3})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [t['name'] for t in res.data['results']],
+            ['Dessert', 'Cajun', 'Brunch']
+        )
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            [t['name'] for t in res.data['results']],
+            ['Asian']
+        )
+        self.assertIsNone(res.data['next'])
 
     def test_create_tag(self):
         """Test creating new tag"""
@@ -75,6 +96,17 @@ class PrivateTagsApiTests(TestCase):
         ).exists()
         self.assertTrue(exists)
 
+    def test_create_duplicate_tag_fails(self):
+        """Test creating a tag with an existing name fails"""
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            Tag.objects.filter(user=self.user, name='Vegan').count(), 1
+        )
+
     def test_tag_creation_invalid(self):
         """Test tag creation with invalid input"""
 
@@ -99,8 +131,8 @@ class PrivateTagsApiTests(TestCase):
 
         serializer1 = TagSerializer(tag1)
         serializer2 = TagSerializer(tag2)
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retrieve_tags_unique(self):
         """Test filtering tags returns unique items"""
@@ -123,4 +155,4 @@ class PrivateTagsApiTests(TestCase):
 
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
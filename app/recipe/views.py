@@ -1,20 +1,41 @@
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.translation import ugettext_lazy as _
+
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import BooleanField
 from rest_framework.response import Response
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+from core import metrics
 from core.models import Tag, Ingredient, Recipe
 from recipe import serializers
+from recipe.bulk import BulkMixin
+from recipe.cache import CachedListMixin
+from recipe.conditional import ConditionalMixin
+from recipe.export import NDJSONRenderer, CSVRenderer, export_rows, \
+                          ndjson_lines, csv_lines
+from recipe.filters import facet_counts, filter_related
+from recipe.images import delete_variants, schedule_variants
+from recipe.pagination import NameCursorPagination, \
+                              RecipeCursorPagination, RecipeSearchPagination
+from recipe.search import search_recipes, suggest_names
+from user.authentication import CachedTokenAuthentication
 
 
-class BaseRecipeView(viewsets.GenericViewSet,
+class BaseRecipeView(BulkMixin,
+                     CachedListMixin,
+                     viewsets.GenericViewSet,
                      mixins.ListModelMixin,
                      mixins.CreateModelMixin,
                      mixins.DestroyModelMixin):
     """Base Viewset Attributes"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = NameCursorPagination
 
     def get_queryset(self):
         """Return objects for authenticated user"""
@@ -23,20 +44,53 @@ class BaseRecipeView(viewsets.GenericViewSet,
         )
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            queryset = self._assigned_only(queryset)
+
+        return queryset.filter(user=self.request.user).order_by('-name')
 
-        return queryset.filter(user=self.request.user
-                               ).order_by('-name').distinct()
+    def _assigned_only(self, queryset):
+        """Filter to objects used by a recipe with an EXISTS subquery"""
+        assigned = self.recipe_through.objects.filter(
+            **{self.recipe_through_field: OuterRef('pk')}
+        )
+
+        return queryset.annotate(
+            assigned=Exists(assigned)
+        ).filter(assigned=True)
 
     def perform_create(self, serializer):
         """Create a new object"""
         serializer.save(user=self.request.user)
 
+    @action(methods=['GET'], detail=False)
+    def suggest(self, request):
+        """Return the best name matches for autocomplete"""
+        prefix = request.query_params.get('q', '').strip()
+        if not prefix:
+            return Response([])
+
+        try:
+            limit = int(request.query_params.get('limit', 0))
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= settings.RECIPE_SUGGEST_LIMIT:
+            limit = settings.RECIPE_SUGGEST_LIMIT
+
+        queryset = self.queryset.filter(user=request.user).only('id', 'name')
+        serializer = self.get_serializer(
+            suggest_names(queryset, prefix, limit),
+            many=True
+        )
+
+        return Response(serializer.data)
+
 
 class TagViewSet(BaseRecipeView):
     """Manage Tags in Database"""
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    recipe_through = Recipe.tags.through
+    recipe_through_field = 'tag'
 
 
 class IngredientViewSet(BaseRecipeView):
@@ -44,33 +98,167 @@ class IngredientViewSet(BaseRecipeView):
 
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    recipe_through = Recipe.ingredients.through
+    recipe_through_field = 'ingredient'
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(BulkMixin, ConditionalMixin, CachedListMixin,
+                    viewsets.ModelViewSet):
     """Manage Recipes in Database"""
 
     queryset = Recipe.objects.all()
     serializer_class = serializers.RecipeSerializer
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeCursorPagination
+    shaped_actions = ('list', 'retrieve')
+    # The image changes the variants a recipe is shown with
+    etag_fields = (
+        'title', 'ingredients', 'tags', 'price', 'link', 'time_minutes',
+        'image'
+    )
 
     def _params_to_ints(self, qs):
         """Convert a list of string ID to integers"""
         return [int(str_id) for str_id in qs.split(',')]
 
+    @property
+    def paginator(self):
+        """Page ranked search results by number, other lists by cursor"""
+        if not hasattr(self, '_paginator') and self._search_terms():
+            self._paginator = RecipeSearchPagination()
+
+        return super().paginator
+
+    def _search_terms(self):
+        """Return the stripped search parameter of a list request"""
+        if self.action != 'list':
+            return ''
+
+        return self.request.query_params.get('search', '').strip()
+
     def get_queryset(self):
         """Get recipes for user"""
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
+        match = self.request.query_params.get('match', 'any')
+        if match not in ('any', 'all'):
+            raise ValidationError({'match': [_('Must be "any" or "all".')]})
         queryset = self.queryset
         if tags:
             tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = filter_related(queryset, 'tags', tag_ids,
+                                      match_all=match == 'all')
         if ingredients:
             ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            queryset = filter_related(queryset, 'ingredients',
+                                      ingredient_ids,
+                                      match_all=match == 'all')
+
+        queryset = self._prefetch_related(queryset).defer('search_vector')
+        queryset = queryset.filter(user=self.request.user)
+        terms = self._search_terms()
+        if terms:
+            return search_recipes(queryset, terms)
+
+        return queryset.order_by('-id')
+
+    def paginate_queryset(self, queryset):
+        """Remember the filtered recipes so facets can count them"""
+        self._filtered_queryset = queryset
+        self._facets = self._bool_param('facets')
+
+        return super().paginate_queryset(queryset)
+
+    def get_paginated_response(self, data):
+        """Add tag and ingredient counts to the page when requested"""
+        response = super().get_paginated_response(data)
+        if self._facets:
+            response.data['facets'] = facet_counts(self._filtered_queryset)
+
+        return response
 
-        return queryset.filter(user=self.request.user)
+    def _prefetch_related(self, queryset):
+        """Load only the columns and relations the serializer outputs"""
+        if self.action == 'upload_image':
+            return queryset
+
+        fields = expand = None
+        if self.action in self.shaped_actions:
+            fields, expand = self._output_shape()
+        if expand is None:
+            expand = self.get_serializer_class().default_expand
+
+        lookups = []
+        for name, model in (('tags', Tag), ('ingredients', Ingredient)):
+            if fields is not None and name not in fields:
+                continue
+            if name in expand:
+                lookups.append(name)
+            else:
+                lookups.append(
+                    Prefetch(name, queryset=model.objects.only('id'))
+                )
+        if fields is None or 'image_variants' in fields:
+            lookups.append('image_variants')
+        if fields is not None:
+            columns = {field.name for field in Recipe._meta.concrete_fields}
+            queryset = queryset.only('id', *(fields & columns))
+
+        return queryset.prefetch_related(*lookups)
+
+    def _output_shape(self):
+        """Return the requested output fields and expanded relations
+
+        Either is None when its query parameter was not given.
+        """
+        if not hasattr(self, '_shape'):
+            serializer_class = self.get_serializer_class()
+            self._shape = (
+                self._names_param('fields', serializer_class.Meta.fields),
+                self._names_param('expand', serializer_class.expandable),
+            )
+
+        return self._shape
+
+    def _bool_param(self, param):
+        """Parse a boolean query parameter such as 1, true or no"""
+        value = self.request.query_params.get(param)
+        if value is None:
+            return False
+
+        try:
+            return BooleanField().to_internal_value(value)
+        except ValidationError as exc:
+            raise ValidationError({param: exc.detail})
+
+    def _names_param(self, param, allowed):
+        """Parse a comma separated list of names, rejecting unknown ones"""
+        value = self.request.query_params.get(param)
+        if value is None:
+            return None
+
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = names - set(allowed)
+        if unknown:
+            msg = _('Unknown names: {names}.').format(
+                names=', '.join(sorted(unknown))
+            )
+            raise ValidationError({param: [msg]})
+
+        return names
+
+    def get_serializer_context(self):
+        """Pass the requested fields and expansions to read serializers"""
+        context = super().get_serializer_context()
+        if self.action in self.shaped_actions:
+            context['fields'], context['expand'] = self._output_shape()
+
+        return context
+
+    def get_bulk_queryset(self, ids):
+        """Return recipes for bulk responses with their relations"""
+        return self._prefetch_related(super().get_bulk_queryset(ids))
 
     def get_serializer_class(self):
         """Return correct serializer class"""
@@ -95,10 +283,32 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
 
         if serializer.is_valid():
-            serializer.save()
+            upload = serializer.validated_data.get('image')
+            if upload is not None:
+                metrics.IMAGE_UPLOAD_BYTES.observe(upload.size)
+            with metrics.IMAGE_UPLOAD_DURATION.time():
+                serializer.save()
+            delete_variants(recipe)
+            schedule_variants(recipe)
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK
             )
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(methods=['GET'], detail=False,
+            renderer_classes=(NDJSONRenderer, CSVRenderer))
+    def export(self, request):
+        """Stream every recipe of the user as NDJSON or CSV"""
+        renderer = request.accepted_renderer
+        encode = csv_lines if renderer.format == 'csv' else ndjson_lines
+        response = StreamingHttpResponse(
+            encode(export_rows(request.user)),
+            content_type=renderer.media_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{renderer.format}"'
+        )
+
+        return response
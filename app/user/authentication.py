@@ -0,0 +1,118 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import ugettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core import metrics
+
+
+TOKEN_KEY = 'auth:token:{digest}'
+
+_local_tokens = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _cache_key(key):
+    """Return the shared cache key for a token without storing the token"""
+    return TOKEN_KEY.format(digest=hashlib.sha256(key.encode()).hexdigest())
+
+
+def _get_local(key):
+    """Return the credentials cached in this process, if fresh"""
+    with _local_lock:
+        entry = _local_tokens.get(key)
+        if entry is None:
+            return None
+        expires, credentials = entry
+        if expires < time.monotonic():
+            del _local_tokens[key]
+            return None
+        _local_tokens.move_to_end(key)
+
+        return credentials
+
+
+def _set_local(key, credentials):
+    """Cache credentials in this process"""
+    expires = time.monotonic() + settings.TOKEN_AUTH_LOCAL_TTL
+    with _local_lock:
+        _local_tokens[key] = (expires, credentials)
+        _local_tokens.move_to_end(key)
+        while len(_local_tokens) > settings.TOKEN_AUTH_LOCAL_MAX_SIZE:
+            _local_tokens.popitem(last=False)
+
+
+def invalidate_token(key):
+    """Forget a cached token in this process and the shared cache"""
+    with _local_lock:
+        _local_tokens.pop(key, None)
+    cache.delete(_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches token to user lookups
+
+    Lookups are cached in process memory for TOKEN_AUTH_LOCAL_TTL seconds
+    and in the shared cache for TOKEN_AUTH_CACHE_TTL seconds. Invalidation
+    clears this process and the shared cache, so other processes may use a
+    stale entry until their local TTL expires.
+
+    Only the user's id and active flag are cached, never the password
+    hash. Requests from the cache get a user whose other fields load in
+    one query the first time one is used.
+    """
+
+    def authenticate_credentials(self, key):
+        """Return the cached user for a token or look it up"""
+        credentials = _get_local(key)
+        if credentials is not None:
+            metrics.cache_lookup('auth_token', True, local=True)
+        else:
+            credentials = cache.get(_cache_key(key))
+            metrics.cache_lookup('auth_token', credentials is not None)
+            if credentials is None:
+                user, token = super().authenticate_credentials(key)
+                credentials = {
+                    'user_id': user.pk,
+                    'is_active': user.is_active,
+                    'key': token.key,
+                }
+                cache.set(
+                    _cache_key(key),
+                    credentials,
+                    settings.TOKEN_AUTH_CACHE_TTL
+                )
+                _set_local(key, credentials)
+
+                return (user, token)
+            _set_local(key, credentials)
+
+        if not credentials['is_active']:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+
+        return self._load(credentials)
+
+    def _load(self, credentials):
+        """Return new user and token instances with other fields deferred"""
+        user = get_user_model().from_db(
+            None, ['id', 'is_active'],
+            [credentials['user_id'], credentials['is_active']]
+        )
+        token = Token.from_db(
+            None, ['key', 'user_id'],
+            [credentials['key'], credentials['user_id']]
+        )
+        token.user = user
+
+        return (user, token)
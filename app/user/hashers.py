@@ -0,0 +1,105 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+_executor = None
+_slots = None
+_init_lock = threading.Lock()
+_worker = threading.local()
+_limit = threading.local()
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool stays full past the caller's limit"""
+
+
+@contextmanager
+def limit_wait(timeout):
+    """Give up on a full hashing pool after timeout seconds in this thread"""
+    previous = getattr(_limit, 'timeout', None)
+    _limit.timeout = timeout
+    try:
+        yield
+    finally:
+        _limit.timeout = previous
+
+
+def _get_pool():
+    """Return the shared hashing thread pool and its queue slots"""
+    global _executor, _slots
+    with _init_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix='password-hash'
+            )
+            _slots = threading.BoundedSemaphore(
+                settings.PASSWORD_HASH_WORKERS
+                + settings.PASSWORD_HASH_QUEUE
+            )
+
+    return _executor, _slots
+
+
+def run_in_pool(func, *args):
+    """Run a hashing function on the bounded pool and wait for it
+
+    Waits for a free slot unless the thread is inside limit_wait, in which
+    case HashingBusy is raised once the pool and its queue stay full for
+    the given number of seconds.
+    """
+    if getattr(_worker, 'active', False):
+        # Hashers call each other, e.g. PBKDF2 verify calls encode
+        return func(*args)
+
+    executor, slots = _get_pool()
+    if not slots.acquire(timeout=getattr(_limit, 'timeout', None)):
+        raise HashingBusy()
+    try:
+        return executor.submit(_run_as_worker, func, *args).result()
+    finally:
+        slots.release()
+
+
+def _run_as_worker(func, *args):
+    """Run a function on a pool thread, marking the thread as a worker"""
+    _worker.active = True
+    try:
+        return func(*args)
+    finally:
+        _worker.active = False
+
+
+class PooledHasherMixin:
+    """Run a password hasher's expensive operations on the shared pool"""
+
+    def encode(self, password, salt, *args, **kwargs):
+        """Hash the password on the pool"""
+        return run_in_pool(
+            lambda: super(PooledHasherMixin, self).encode(
+                password, salt, *args, **kwargs
+            )
+        )
+
+    def verify(self, password, encoded):
+        """Check the password on the pool"""
+        return run_in_pool(super().verify, password, encoded)
+
+
+class PooledArgon2PasswordHasher(PooledHasherMixin,
+                                 hashers.Argon2PasswordHasher):
+    """Argon2 hasher bounded by the hashing pool"""
+
+
+class PooledBCryptSHA256PasswordHasher(PooledHasherMixin,
+                                       hashers.BCryptSHA256PasswordHasher):
+    """bcrypt hasher bounded by the hashing pool"""
+
+
+class PooledPBKDF2PasswordHasher(PooledHasherMixin,
+                                 hashers.PBKDF2PasswordHasher):
+    """PBKDF2 hasher bounded by the hashing pool"""
@@ -2,9 +2,12 @@ from django.contrib.auth import get_user_model, authenticate
 from django.utils.translation import ugettext_lazy as _
 
 from rest_framework import serializers
+from rest_framework.authtoken.models import Token
 
+from core.instrumentation import TimedDataMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedDataMixin, serializers.ModelSerializer):
     """Serializer for the User object"""
 
     class Meta:
@@ -24,6 +27,8 @@ class UserSerializer(serializers.ModelSerializer):
         if password:
             user.set_password(password)
             user.save()
+            # Tokens issued before the change stop working
+            Token.objects.filter(user=user).delete()
 
         return user
 
@@ -0,0 +1,140 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user import authentication
+
+
+ENDUSER_URL = reverse('user:enduser')
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test token lookups are cached and invalidated"""
+
+    def setUp(self):
+        cache.clear()
+        authentication._local_tokens.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123',
+            name='name'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_lookup_cached(self):
+        """Test only the first request looks the token up"""
+        with self.assertNumQueries(1):
+            res = self.client.get(ENDUSER_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        auth = authentication.CachedTokenAuthentication()
+        with self.assertNumQueries(0):
+            user, token = auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_cached_user_fields_load_once(self):
+        """Test a cached user's other fields load in one query"""
+        self.client.get(ENDUSER_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ENDUSER_URL)
+
+        self.assertEqual(res.data, {'email': 'test@email.com', 'name': 'name'})
+
+    def test_cache_holds_no_password(self):
+        """Test only the user id, active flag and token are cached"""
+        self.client.get(ENDUSER_URL)
+
+        self.assertEqual(
+            cache.get(authentication._cache_key(self.token.key)),
+            {'user_id': self.user.pk, 'is_active': True,
+             'key': self.token.key}
+        )
+
+    def test_shared_cache_used_by_other_processes(self):
+        """Test an empty process cache falls back to the shared cache"""
+        self.client.get(ENDUSER_URL)
+        authentication._local_tokens.clear()
+
+        auth = authentication.CachedTokenAuthentication()
+        with self.assertNumQueries(0):
+            auth.authenticate_credentials(self.token.key)
+
+    def test_lookups_counted_by_cache_level(self):
+        """Test process, shared cache and database lookups are counted"""
+        def count(result):
+            return REGISTRY.get_sample_value('app_cache_requests_total', {
+                'cache': 'auth_token', 'result': result
+            }) or 0
+        before = {result: count(result)
+                  for result in ('local_hit', 'hit', 'miss')}
+        auth = authentication.CachedTokenAuthentication()
+
+        auth.authenticate_credentials(self.token.key)
+        auth.authenticate_credentials(self.token.key)
+        authentication._local_tokens.clear()
+        auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(
+            {result: count(result) - before[result] for result in before},
+            {'local_hit': 1, 'hit': 1, 'miss': 1}
+        )
+
+    def test_invalid_token_rejected(self):
+        """Test an unknown token is not authenticated"""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_invalidated(self):
+        """Test a deleted token stops working immediately"""
+        self.client.get(RECIPE_URL)
+
+        self.token.delete()
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_invalidated(self):
+        """Test deactivating a user stops their token working"""
+        self.client.get(RECIPE_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_revokes_token(self):
+        """Test changing password through the api revokes cached tokens"""
+        self.client.get(ENDUSER_URL)
+
+        res = self.client.patch(ENDUSER_URL, {'password': 'newpassword'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(ENDUSER_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+
+    def test_cached_user_not_shared(self):
+        """Test changes to request.user do not leak into the cache"""
+        auth = authentication.CachedTokenAuthentication()
+        auth.authenticate_credentials(self.token.key)
+        user, _token = auth.authenticate_credentials(self.token.key)
+        user.name = 'changed'
+
+        user, _token = auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user.name, 'name')
@@ -0,0 +1,106 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user import hashers
+
+
+TOKEN_URL = reverse('user:token')
+
+
+class PooledHasherTests(TestCase):
+    """Test passwords are hashed on the bounded pool"""
+
+    def test_encode_and_verify(self):
+        """Test pooled hashes round trip"""
+        encoded = make_password('testpass123')
+
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$'))
+        self.assertTrue(check_password('testpass123', encoded))
+        self.assertFalse(check_password('wrongpass', encoded))
+
+    def test_hashing_runs_on_pool(self):
+        """Test the hash is computed on a pool thread"""
+        threads = []
+        original = hashers.hashers.PBKDF2PasswordHasher.encode
+
+        def encode(hasher, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return original(hasher, *args, **kwargs)
+
+        with patch.object(hashers.hashers.PBKDF2PasswordHasher, 'encode',
+                          encode):
+            make_password('testpass123')
+
+        self.assertTrue(threads[0].startswith('password-hash'))
+
+    def test_full_pool_busy(self):
+        """Test hashing fails fast when every slot is taken"""
+        hashers._get_pool()
+        with patch.object(hashers, '_slots', threading.BoundedSemaphore(1)):
+            hashers._slots.acquire()
+            with hashers.limit_wait(0):
+                with self.assertRaises(hashers.HashingBusy):
+                    make_password('testpass123')
+
+    def test_full_pool_waits_without_limit(self):
+        """Test hashing outside requests waits for a free slot"""
+        hashers._get_pool()
+        with patch.object(hashers, '_slots', threading.BoundedSemaphore(1)):
+            hashers._slots.acquire()
+            timer = threading.Timer(0.1, hashers._slots.release)
+            timer.start()
+            encoded = make_password('testpass123')
+            timer.join()
+
+        self.assertTrue(check_password('testpass123', encoded))
+
+    @override_settings(PASSWORD_HASH_TIMEOUT=0)
+    def test_full_pool_login_throttled(self):
+        """Test logging in answers 429 when every slot is taken"""
+        get_user_model().objects.create_user('test@email.com', 'testpass123')
+        hashers._get_pool()
+        with patch.object(hashers, '_slots', threading.BoundedSemaphore(1)):
+            hashers._slots.acquire()
+            res = APIClient().post(TOKEN_URL, {
+                'email': 'test@email.com',
+                'password': 'testpass123'
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class RehashOnLoginTests(TestCase):
+    """Test old password hashes are upgraded when users log in"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_login_upgrades_hash(self):
+        """Test logging in rehashes with the preferred hasher"""
+        user = get_user_model().objects.create_user(
+            'test@email.com',
+            'testpass123'
+        )
+
+        with self.settings(PASSWORD_HASHERS=[
+            'user.hashers.PooledPBKDF2PasswordHasher',
+            'django.contrib.auth.hashers.MD5PasswordHasher',
+        ]):
+            user.password = make_password('testpass123', hasher='md5')
+            user.save()
+            res = self.client.post(TOKEN_URL, {
+                'email': 'test@email.com',
+                'password': 'testpass123'
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
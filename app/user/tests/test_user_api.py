@@ -1,10 +1,12 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from user import authentication
 from user.apps import UserConfig
 
 
@@ -138,6 +140,90 @@ class PrivateUserApiTests(TestCase):
         self.assertTrue(self.user.check_password(payload['password']))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_profile_not_modified(self):
+        """Test retrieving profile with a current ETag returns 304"""
+        res = self.client.get(ENDUSER_URL)
+
+        res = self.client.get(ENDUSER_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_profile_update_changes_etag(self):
+        """Test updating the profile invalidates its ETag"""
+        res = self.client.get(ENDUSER_URL)
+        self.client.patch(ENDUSER_URL, {'name': 'diffname'})
+
+        res = self.client.get(ENDUSER_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['name'], 'diffname')
+
+
+class TokenUserApiTests(TestCase):
+    """Test the profile endpoint with tokens from the token endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        authentication._local_tokens.clear()
+        self.user = create_user(
+            email='test@email.com',
+            password='testpass123',
+            name='name'
+        )
+        self.client = APIClient()
+        self._login('testpass123')
+
+    def _login(self, password):
+        """Obtain a token for the test user and send it from now on"""
+        res = self.client.post(
+            TOKEN_URL,
+            {'email': 'test@email.com', 'password': password}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        token = res.data['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def test_retrieve_profile(self):
+        """Test retrieving the profile with a token"""
+        res = self.client.get(ENDUSER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'email': 'test@email.com', 'name': 'name'})
+
+    def test_retrieve_profile_cached_queries(self):
+        """Test a cached token needs one query for the profile fields"""
+        self.client.get(ENDUSER_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ENDUSER_URL)
+
+        self.assertEqual(res.data['name'], 'name')
+
+    def test_update_name(self):
+        """Test updating the name keeps the token working"""
+        self.client.get(ENDUSER_URL)
+
+        res = self.client.patch(ENDUSER_URL, {'name': 'diffname'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['name'], 'diffname')
+        res = self.client.get(ENDUSER_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['name'], 'diffname')
+
+    def test_update_password_revokes_token(self):
+        """Test changing password requires a new token"""
+        self.client.get(ENDUSER_URL)
+
+        res = self.client.patch(ENDUSER_URL, {'password': 'newpassword'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(ENDUSER_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self._login('newpassword')
+        res = self.client.get(ENDUSER_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
 
 class UserAppTest(TestCase):
 
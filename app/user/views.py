@@ -1,24 +1,48 @@
-from rest_framework import generics, authentication, permissions
+from django.conf import settings
+from django.utils.translation import ugettext_lazy as _
+
+from rest_framework import exceptions, generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from recipe.conditional import ConditionalMixin
+from user import hashers
+from user.authentication import CachedTokenAuthentication
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
-class CreateUserView(generics.CreateAPIView):
+class HashingThrottleMixin:
+    """Answer 429 instead of queueing when the hashing pool is full"""
+
+    def dispatch(self, request, *args, **kwargs):
+        """Only wait PASSWORD_HASH_TIMEOUT seconds for the hashing pool"""
+        with hashers.limit_wait(settings.PASSWORD_HASH_TIMEOUT):
+            return super().dispatch(request, *args, **kwargs)
+
+    def handle_exception(self, exc):
+        """Turn a full hashing pool into a throttled response"""
+        if isinstance(exc, hashers.HashingBusy):
+            exc = exceptions.Throttled(
+                detail=_('Too many login attempts, try again shortly.')
+            )
+        return super().handle_exception(exc)
+
+
+class CreateUserView(HashingThrottleMixin, generics.CreateAPIView):
     """Create a new user in the system"""
     serializer_class = UserSerializer
 
 
-class CreateTokenView(ObtainAuthToken):
+class CreateTokenView(HashingThrottleMixin, ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(HashingThrottleMixin, ConditionalMixin,
+                     generics.RetrieveUpdateAPIView):
     """Manage Authenticated User"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
@@ -0,0 +1,11 @@
+#!/bin/sh
+
+set -e
+
+python manage.py wait_for_db
+python manage.py collectstatic --noinput
+python manage.py migrate
+
+# Workers write metrics here so /metrics can merge them
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}
+exec gunicorn app.wsgi:application